@@ -0,0 +1,90 @@
+"""
+Dynamic micro-batching for CPU-bound model calls.
+
+Concurrent /llm requests each need one query embedding. Encoding them one
+at a time wastes the SIMD width of the CPU and serializes on the GIL;
+MicroBatcher instead collects items that arrive within max_wait_ms (or until
+max_batch_size items are waiting), runs one batched call in the CPU
+executor, and resolves each caller's future with its own result.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Set
+
+from app.executors import run_cpu_bound
+
+
+class MicroBatcher:
+    """
+    Batch single-item async calls into one call of batch_fn(items) -> results.
+
+    max_batch_size: flush as soon as this many items are waiting
+    max_wait_ms: flush at most this long after the first item of a batch
+                 arrived (0 = flush on the next event loop iteration)
+
+    Must be used from a single event loop. Several batches may run in the
+    CPU executor at once (bounded by CPU_WORKERS).
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[tuple[Any, asyncio.Future]] = []
+        self._timer = None
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[tuple[Any, asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+
+        try:
+            results = await run_cpu_bound(self.batch_fn, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # Caller may have been cancelled
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_observed_batch": self.max_observed_batch,
+        }
@@ -0,0 +1,522 @@
+"""
+In-process caches for the RAG pipeline.
+
+TTLCache is a bounded, thread-safe LRU cache with optional time-to-live and
+hit/miss counters. EmbeddingCache builds on it to memoize query embeddings,
+optionally persisting them to SQLite so warm state survives restarts.
+AnswerCache memoizes full /llm answers and is invalidated whenever the
+index generation (bumped by ingestion) changes. OCRCache stores OCR page
+text on disk, addressed by page content.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text for cache keys (Unicode NFC, collapsed whitespace)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with optional TTL eviction. Safe to share across threads.
+
+    max_size: maximum number of entries (least recently used evicted first)
+    ttl: seconds before an entry expires (0 = never)
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    del self._data[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, created_at: Optional[float] = None):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (created_at or time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> List[tuple[Hashable, Any]]:
+        """Snapshot of live (non-expired) entries, least recently used first"""
+        with self._lock:
+            return [(key, value) for key, (created_at, value) in self._data.items() if not self._expired(created_at)]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteVectorStore:
+    """
+    Persistent key -> float32 vector store backing EmbeddingCache.
+
+    Keeps at most max_entries rows (oldest pruned first) and drops rows older
+    than ttl seconds (0 = never). Pruning runs at startup and every
+    prune_every inserts, so the file stays bounded in long-running processes.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl: float = 0, prune_every: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prune_every = max(1, prune_every)
+        self._inserts = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON embeddings(created_at)")
+        self._conn.commit()
+        self.prune()
+
+    def get(self, key: str) -> Optional[tuple[float, np.ndarray]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        vector, created_at = row
+        if self.ttl > 0 and time.time() - created_at > self.ttl:
+            return None
+        return created_at, np.frombuffer(vector, dtype=np.float32)
+
+    def put(self, key: str, vector: np.ndarray, created_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, np.asarray(vector, dtype=np.float32).tobytes(), created_at)
+            )
+            self._conn.commit()
+            self._inserts += 1
+            due = self._inserts % self.prune_every == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows and cap the table at max_entries"""
+        with self._lock:
+            if self.ttl > 0:
+                self._conn.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key NOT IN "
+                "(SELECT key FROM embeddings ORDER BY created_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class EmbeddingCache:
+    """
+    Query-embedding cache keyed on (model name, normalized query text).
+
+    Lookups hit the in-memory LRU first, then the optional SQLite store
+    (promoting hits back into memory). Only successful encodes are cached.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl: float = 0, path: Optional[str] = None):
+        self.memory = TTLCache(max_size=max_size, ttl=ttl)
+        self.disk = SQLiteVectorStore(path, max_entries=max(max_size * 10, 10_000), ttl=ttl) if path else None
+        self.disk_hits = 0
+
+    @staticmethod
+    def _disk_key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        text = normalize_query(text)
+        vector = self.memory.get((model_name, text))
+        if vector is not None or self.disk is None:
+            return vector
+
+        entry = self.disk.get(self._disk_key(model_name, text))
+        if entry is None:
+            return None
+        created_at, stored = entry
+        vector = stored.tolist()
+        self.memory.put((model_name, text), vector, created_at=created_at)
+        self.disk_hits += 1
+        return vector
+
+    def put(self, model_name: str, text: str, vector: List[float]):
+        text = normalize_query(text)
+        created_at = time.time()
+        self.memory.put((model_name, text), vector, created_at=created_at)
+        if self.disk is not None:
+            self.disk.put(self._disk_key(model_name, text), np.asarray(vector), created_at)
+
+    def stats(self) -> Dict:
+        stats = self.memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["persistent"] = self.disk is not None
+        if self.disk is not None:
+            stats["disk_size"] = len(self.disk)
+        return stats
+
+
+DEFAULT_INDEX_GENERATION_PATH = Path(__file__).resolve().parent.parent / "data" / "index_generation"
+INDEX_GENERATION_CHECK_INTERVAL = float(os.getenv("INDEX_GENERATION_CHECK_INTERVAL", "1.0"))  # Seconds
+
+
+class IndexGeneration:
+    """
+    Monotonic counter identifying the current contents of the vector index.
+
+    Stored in a small file so ingestion scripts running in another process
+    can bump it; caches compare it on every lookup and drop stale entries.
+    Lookups are served from memory: the file is stat'ed at most every
+    check_interval seconds and only re-read when it was replaced, so a bump
+    from another process is seen within check_interval (immediately in the
+    process that bumped).
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = INDEX_GENERATION_CHECK_INTERVAL):
+        self.path = Path(path or os.getenv("INDEX_GENERATION_PATH") or DEFAULT_INDEX_GENERATION_PATH)
+        self.check_interval = check_interval
+        self._value = 0
+        self._signature = None  # (inode, mtime) of the file last read
+        self._checked_at = float("-inf")
+
+    def _read(self) -> int:
+        try:
+            return int(self.path.read_text().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._value
+        self._checked_at = now
+        try:
+            stat = self.path.stat()
+            signature = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        if signature != self._signature:
+            self._signature = signature
+            self._value = self._read() if signature is not None else 0
+        return self._value
+
+    def bump(self) -> int:
+        """Increment the generation (atomic replace) and return the new value"""
+        generation = self._read() + 1
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(str(generation))
+        os.replace(tmp_path, self.path)
+        self._value = generation
+        self._checked_at = float("-inf")  # Re-stat on the next lookup to record the new file
+        return generation
+
+
+def bump_index_generation() -> int:
+    """Invalidate answer caches after the index contents change (call from ingestion)"""
+    return IndexGeneration().bump()
+
+
+class AnswerCache:
+    """
+    Cache of full RAG answers in front of retrieval and generation.
+
+    Exact hits match the normalized question plus temperature and max_tokens.
+    When semantic_threshold > 0, a miss falls back to the cached entry whose
+    query embedding has the highest cosine similarity above the threshold
+    (same temperature and max_tokens only). All entries are dropped when the
+    index generation changes, and put() skips answers built from an older
+    generation than the current one (pass the generation recorded at lookup).
+    """
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        ttl: float = 3600,
+        semantic_threshold: float = 0.0,
+        generation: Optional[IndexGeneration] = None
+    ):
+        self.entries = TTLCache(max_size=max_size, ttl=ttl)
+        self.semantic_threshold = semantic_threshold
+        self.generation = generation or IndexGeneration()
+        self._generation_seen = self.generation.current()
+        self._lock = threading.Lock()
+        self.semantic_hits = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    @staticmethod
+    def _key(question: str, temperature: float, max_tokens: int) -> tuple:
+        return normalize_query(question), float(temperature), int(max_tokens)
+
+    def _check_generation(self) -> int:
+        generation = self.generation.current()
+        with self._lock:
+            if generation != self._generation_seen:
+                self.entries.clear()
+                self._generation_seen = generation
+                self.invalidations += 1
+        return generation
+
+    def current_generation(self) -> int:
+        """Generation to record before a lookup and pass back to put()"""
+        return self._check_generation()
+
+    def get(self, question: str, temperature: float, max_tokens: int) -> Optional[Dict]:
+        """Exact lookup: {"answer", "sources"} for the normalized question, or None"""
+        self._check_generation()
+        return self.entries.get(self._key(question, temperature, max_tokens))
+
+    def get_similar(self, embedding: List[float], temperature: float, max_tokens: int) -> Optional[Dict]:
+        """Semantic lookup: most similar cached question above semantic_threshold, or None"""
+        if self.semantic_threshold <= 0:
+            return None
+        self._check_generation()
+
+        candidates = [
+            value for (_, t, m), value in self.entries.items()
+            if t == float(temperature) and m == int(max_tokens) and value.get("embedding") is not None
+        ]
+        if not candidates:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        similarities = np.stack([value["embedding"] for value in candidates]) @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.semantic_threshold:
+            return None
+        self.semantic_hits += 1
+        return candidates[best]
+
+    def put(
+        self,
+        question: str,
+        temperature: float,
+        max_tokens: int,
+        answer: str,
+        sources: List[Dict],
+        embedding: Optional[List[float]] = None,
+        generation: Optional[int] = None
+    ):
+        current = self._check_generation()
+        if generation is not None and generation != current:
+            self.stale_puts += 1  # The index changed while this answer was generated
+            return
+        unit = None
+        if embedding is not None:
+            unit = np.asarray(embedding, dtype=np.float32)
+            unit /= np.linalg.norm(unit) or 1.0
+        self.entries.put(
+            self._key(question, temperature, max_tokens),
+            {"answer": answer, "sources": sources, "embedding": unit}
+        )
+
+    def stats(self) -> Dict:
+        stats = self.entries.stats()
+        stats["semantic_threshold"] = self.semantic_threshold
+        stats["semantic_hits"] = self.semantic_hits
+        stats["index_generation"] = self._generation_seen
+        stats["invalidations"] = self.invalidations
+        stats["stale_puts"] = self.stale_puts
+        return stats
+
+
+DEFAULT_OCR_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "ocr_cache"
+
+
+class OCRCache:
+    """
+    Content-addressed on-disk cache of OCR page text.
+
+    Page entries are keyed by a hash of the rendered page pixels plus the
+    render settings (DPI, grayscale, JPEG quality), model and prompt
+    version, so a re-uploaded or partially changed document only re-OCRs
+    pages whose rendering differs. Document entries (keyed by a hash of the
+    PDF bytes and the render mode) list the page keys, letting an identical
+    re-upload skip rendering entirely.
+
+    Files live under directory/<key[:2]>/<key>.json. When the total size
+    exceeds max_bytes, least recently used files (by mtime, refreshed on
+    read) are deleted.
+
+    Hits and misses are counted per level: hits/misses/hit_ratio are page
+    lookups, document_* are document lookups (pages read as part of a
+    document lookup are not counted again).
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = Path(directory or DEFAULT_OCR_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._files: Dict[Path, tuple[float, int]] = {}  # path -> (mtime, size)
+        self._total_bytes = 0
+        self.hits = {"page": 0, "document": 0}
+        self.misses = {"page": 0, "document": 0}
+        self.evictions = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in self.directory.glob("*/*.json"):
+            stat = path.stat()
+            self._files[path] = (stat.st_mtime, stat.st_size)
+            self._total_bytes += stat.st_size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read(self, key: str, level: Optional[str]) -> Optional[Any]:
+        """Load an entry, counting the lookup under `level` ("page", "document" or None)"""
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                if level:
+                    self.misses[level] += 1
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))  # Mark as recently used
+        except FileNotFoundError:
+            pass  # Evicted since the read; the data is still good
+        with self._lock:
+            if path in self._files:
+                self._files[path] = (now, self._files[path][1])
+            if level:
+                self.hits[level] += 1
+        return data
+
+    def _write(self, key: str, data: Any):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if path in self._files:
+                self._total_bytes -= self._files[path][1]
+            self._files[path] = (time.time(), len(payload))
+            self._total_bytes += len(payload)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used files until under max_bytes (caller holds the lock)"""
+        for path, (_, size) in sorted(self._files.items(), key=lambda item: item[1][0]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            del self._files[path]
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def get_page(self, key: str, level: Optional[str] = "page") -> Optional[str]:
+        data = self._read(key, level)
+        return data["text"] if data is not None else None
+
+    def put_page(self, key: str, text: str):
+        self._write(key, {"text": text})
+
+    def get_document(self, key: str) -> Optional[List[Dict]]:
+        """Return [{page_number, num_images, text, source}] if the document and all its pages are cached"""
+        data = self._read(key, level=None)
+        if data is None:
+            with self._lock:
+                self.misses["document"] += 1
+            return None
+        pages = []
+        for page in data["pages"]:
+            text = self.get_page(page["key"], level=None)
+            if text is None:
+                with self._lock:
+                    self.misses["document"] += 1
+                return None
+            pages.append({
+                "page_number": page["page_number"],
+                "num_images": page["num_images"],
+                "text": text,
+                "source": page.get("source")  # Path the page originally took (vlm, empty, text_layer)
+            })
+        with self._lock:
+            self.hits["document"] += 1
+        return pages
+
+    def put_document(self, key: str, pages: List[Dict]):
+        """Record page keys for a document: [{page_number, num_images, key, source}]"""
+        self._write(key, {"pages": pages})
+
+    def stats(self) -> Dict:
+        stats = {
+            "directory": str(self.directory),
+            "files": len(self._files),
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+        for level, prefix in (("page", ""), ("document", "document_")):
+            hits, misses = self.hits[level], self.misses[level]
+            stats[f"{prefix}hits"] = hits
+            stats[f"{prefix}misses"] = misses
+            stats[f"{prefix}hit_ratio"] = round(hits / (hits + misses), 4) if hits + misses else 0.0
+        return stats
@@ -0,0 +1,189 @@
+"""
+Shared HTTP clients for the upstream services.
+
+The SDK defaults are tuned for scripts, not for a server: the OpenAI client
+drops idle connections after 5 s (so a steady request stream keeps paying
+TLS handshakes) and waits up to 10 minutes for a response. Every upstream
+here gets its own explicitly sized connection pool, long keep-alive,
+HTTP/2 when the h2 package is installed, and its own timeouts:
+
+    azure_llm   interactive /llm completions
+    azure_vlm   OCR page calls (long outputs, longer read timeout)
+    pinecone    vector queries and upserts (urllib3, HTTP/1.1 only)
+
+Chat and OCR use separate Azure pools, so a burst of OCR pages cannot take
+the connections that chat requests need. Each setting can be overridden per
+upstream with <UPSTREAM>_MAX_CONNECTIONS, <UPSTREAM>_TIMEOUT and
+<UPSTREAM>_CONNECT_TIMEOUT (e.g. AZURE_VLM_MAX_CONNECTIONS). Pool use is
+exported at /metrics (rag_http_pool_*, rag_http_connection_wait_seconds).
+"""
+
+import os
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import httpx
+from openai import AsyncAzureOpenAI, AzureOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient
+
+from app.metrics import CONNECTION_WAIT_SECONDS, CONNECTIONS_OPENED, POOL_REQUESTS, register_pool
+
+try:
+    import h2  # noqa: F401  (httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true" and HTTP2_AVAILABLE
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120"))  # Seconds an idle connection is kept
+
+
+class UpstreamConfig(NamedTuple):
+    max_connections: int
+    timeout: float  # Read / write / pool wait, seconds
+    connect_timeout: float = 5.0
+
+
+UPSTREAM_DEFAULTS = {
+    "azure_llm": UpstreamConfig(max_connections=32, timeout=60.0),
+    "azure_vlm": UpstreamConfig(max_connections=16, timeout=120.0),
+    "pinecone": UpstreamConfig(max_connections=16, timeout=20.0),
+}
+
+
+def upstream_config(upstream: str) -> UpstreamConfig:
+    """Defaults for `upstream`, overridden by <UPSTREAM>_* environment variables"""
+    defaults = UPSTREAM_DEFAULTS[upstream]
+    prefix = upstream.upper()
+    return UpstreamConfig(
+        max_connections=int(os.getenv(f"{prefix}_MAX_CONNECTIONS", str(defaults.max_connections))),
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", str(defaults.timeout))),
+        connect_timeout=float(os.getenv(f"{prefix}_CONNECT_TIMEOUT", str(defaults.connect_timeout)))
+    )
+
+
+class _MeteredStream(httpx.AsyncByteStream):
+    """Response body that reports when its connection goes back to the pool"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close()
+
+
+class MeteredTransport(httpx.AsyncHTTPTransport):
+    """
+    AsyncHTTPTransport that tracks pool use for one upstream.
+
+    A request counts as in the pool from the moment it is sent until its
+    response body is closed (streamed completions hold their connection until
+    the last token). The wait until its headers go out covers queueing for a
+    free connection plus any TCP/TLS connect.
+    """
+
+    def __init__(self, upstream: str, **kwargs):
+        super().__init__(**kwargs)
+        self.upstream = upstream
+
+    @property
+    def connections(self):
+        return self._pool.connections
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        in_flight = POOL_REQUESTS.labels(upstream=self.upstream)
+        start = time.perf_counter()
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event: str, info: Dict):
+            if event.endswith("send_request_headers.started"):
+                CONNECTION_WAIT_SECONDS.labels(upstream=self.upstream).observe(time.perf_counter() - start)
+            elif event == "connection.connect_tcp.complete":
+                CONNECTIONS_OPENED.labels(upstream=self.upstream).inc()
+            if outer_trace is not None:
+                await outer_trace(event, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        in_flight.inc()
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            in_flight.dec()
+            raise
+
+        closed = False
+
+        def release():
+            nonlocal closed
+            if not closed:
+                closed = True
+                in_flight.dec()
+
+        response.stream = _MeteredStream(response.stream, release)
+        return response
+
+
+def _azure_kwargs() -> Dict:
+    return {
+        "api_key": os.getenv("AZURE_OPENAI_API_KEY"),
+        "api_version": os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
+        "azure_endpoint": os.getenv("AZURE_OPENAI_ENDPOINT"),
+    }
+
+
+def _httpx_settings(config: UpstreamConfig) -> Tuple[httpx.Limits, httpx.Timeout]:
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_connections,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+    return limits, httpx.Timeout(config.timeout, connect=config.connect_timeout)
+
+
+def create_azure_client(upstream: str = "azure_llm") -> AsyncAzureOpenAI:
+    """Async Azure OpenAI client with its own pool for `upstream` (azure_llm or azure_vlm)"""
+    config = upstream_config(upstream)
+    limits, timeout = _httpx_settings(config)
+    transport = MeteredTransport(upstream, limits=limits, http2=HTTP2_ENABLED)
+    register_pool(upstream, config.max_connections, lambda: transport.connections)
+    http_client = DefaultAsyncHttpxClient(transport=transport, timeout=timeout)
+    return AsyncAzureOpenAI(**_azure_kwargs(), timeout=timeout, http_client=http_client)
+
+
+def create_sync_azure_client(upstream: str = "azure_llm") -> AzureOpenAI:
+    """Blocking Azure OpenAI client with the same pool settings (for scripts)"""
+    limits, timeout = _httpx_settings(upstream_config(upstream))
+    http_client = DefaultHttpxClient(limits=limits, timeout=timeout, http2=HTTP2_ENABLED)
+    return AzureOpenAI(**_azure_kwargs(), timeout=timeout, http_client=http_client)
+
+
+def pinecone_request_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout passed to every Pinecone data-plane call"""
+    config = upstream_config("pinecone")
+    return config.connect_timeout, config.timeout
+
+
+def create_pinecone_index(index_name: Optional[str] = None):
+    """
+    Pinecone index handle whose urllib3 pool holds PINECONE_MAX_CONNECTIONS
+    keep-alive connections. With PINECONE_INDEX_HOST set (and no explicit
+    index_name) the index is addressed directly, skipping the control-plane
+    lookup of its host.
+    """
+    from pinecone import Pinecone
+
+    config = upstream_config("pinecone")
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    pc.openapi_config.connection_pool_maxsize = config.max_connections  # Copied into the index client
+    register_pool("pinecone", config.max_connections)
+    host = os.getenv("PINECONE_INDEX_HOST")
+    if host and index_name is None:
+        return pc.Index(host=host)
+    return pc.Index(index_name or os.getenv("PINECONE_INDEX_NAME", "hackathon"))
@@ -0,0 +1,72 @@
+"""
+Embedding model loading with selectable CPU inference backends.
+
+The API runs on CPU-only containers, where full-precision PyTorch
+bge-large-en-v1.5 dominates both RAM and per-query latency. EMBEDDING_BACKEND
+picks how the same model is executed:
+
+- torch       PyTorch fp32 (reference; what ingestion used)
+- torch-int8  PyTorch with dynamic int8 quantization of the Linear layers
+- onnx        ONNX Runtime fp32
+- onnx-int8   ONNX Runtime with a dynamically quantized int8 graph
+
+All backends produce 1024-dim vectors in the same space as the index;
+scripts/check_embedding_parity.py measures the drift.
+"""
+
+import os
+from pathlib import Path
+
+from sentence_transformers import SentenceTransformer
+
+EMBEDDING_MODEL_NAME = "BAAI/bge-large-en-v1.5"
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+DEFAULT_ONNX_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "onnx_models"
+
+
+def load_embedding_model(model_name: str, backend: str = "torch") -> SentenceTransformer:
+    """Load model_name for the given backend (see module docstring)"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend} (expected one of {', '.join(EMBEDDING_BACKENDS)})")
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+
+    return _load_onnx_int8(model_name)
+
+
+def _load_onnx_int8(model_name: str) -> SentenceTransformer:
+    """
+    Load an int8 ONNX graph, quantizing and caching it on first use.
+
+    EMBEDDING_ONNX_FILE can point at a pre-quantized file inside the model
+    repo (e.g. onnx/model_qint8_avx512_vnni.onnx); otherwise the fp32 graph
+    is quantized once into EMBEDDING_ONNX_CACHE_DIR.
+    """
+    onnx_file = os.getenv("EMBEDDING_ONNX_FILE")
+    if onnx_file:
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": onnx_file})
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    config = os.getenv("EMBEDDING_ONNX_QUANT_CONFIG", "avx2")  # arm64 | avx2 | avx512 | avx512_vnni
+    cache_dir = Path(os.getenv("EMBEDDING_ONNX_CACHE_DIR") or DEFAULT_ONNX_CACHE_DIR) / model_name.replace("/", "__")
+    quantized_file = f"model_qint8_{config}.onnx"
+
+    if not (cache_dir / "onnx" / quantized_file).exists():
+        print(f"Quantizing {model_name} to int8 ONNX ({config}), one-time...")
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save_pretrained(str(cache_dir))
+        export_dynamic_quantized_onnx_model(model, config, str(cache_dir))
+
+    return SentenceTransformer(str(cache_dir), backend="onnx", model_kwargs={"file_name": f"onnx/{quantized_file}"})
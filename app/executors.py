@@ -0,0 +1,22 @@
+"""
+Shared executors for CPU-bound work.
+
+SentenceTransformer.encode and PyMuPDF rendering hold the CPU for tens to
+hundreds of milliseconds; running them on the event loop stalls every other
+request in the worker. They run here instead, in a bounded thread pool so a
+burst of requests cannot oversubscribe the CPU.
+"""
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+
+
+async def run_cpu_bound(func, *args, **kwargs):
+    """Run a CPU-bound function in the bounded executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, partial(func, *args, **kwargs))
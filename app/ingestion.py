@@ -0,0 +1,444 @@
+"""
+PDF ingestion library shared by the API and the scripts.
+
+Building blocks:
+- PageChunker: streaming chunking across page boundaries; each chunk
+  records the exact pages it starts and ends on
+- ingest_pdf(): OCR, chunk, embed and upsert a single PDF
+- IngestionPipeline: the same for many PDFs at once
+
+PDFs are opened by path and pages flow through generators and bounded
+queues, so memory stays flat even for 1000-page archives.
+
+IngestionPipeline runs four stages, each sized for the resource it uses,
+with bounded queues between them so a fast stage waits for a slow one:
+
+1. Render  - process pool (CPU): PDF pages are rendered to images in page
+             ranges, so large PDFs are spread over all cores and the GIL
+             does not serialize rendering. The API passes its shared
+             thread pool instead, for single uploads.
+2. OCR     - OCR_CONCURRENCY async workers (I/O): VLM calls, with the
+             on-disk OCR cache skipping pages already seen. Pages are put
+             back in order per document and chunked as they become contiguous.
+3. Embed   - one stage (CPU, multi-threaded inside the model): chunks from
+             all documents are encoded together in large batches.
+4. Upsert  - async workers (I/O): bulk upserts of upsert_batch_size vectors.
+
+Per-PDF results (status, vector IDs, timing) are reported as soon as the
+last vector of a document is upserted.
+"""
+
+import os
+import re
+import time
+import asyncio
+import inspect
+import multiprocessing
+from bisect import bisect_right
+from pathlib import Path
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import fitz  # PyMuPDF
+
+from app.ocr import OCR_CONCURRENCY, PDFPageRenderer, RenderedPage, ocr_cache, ocr_page
+from app.vector_store import VectorStore
+
+# Pipeline tuning (configurable via env vars)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0")) or (os.cpu_count() or 1)
+INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", "8"))
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "128"))
+INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "100"))
+INGEST_UPSERT_CONCURRENCY = int(os.getenv("INGEST_UPSERT_CONCURRENCY", "4"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "64"))
+
+CHUNK_SIZE = 600
+CHUNK_OVERLAP = 100
+
+_IMAGE_REFERENCE = re.compile(r"!\[Image\]\([^)]+\)")
+
+
+def clean_page_text(text: str) -> str:
+    """Strip image references from OCR output before chunking"""
+    return _IMAGE_REFERENCE.sub("", text).strip()
+
+
+class Chunk(NamedTuple):
+    index: int  # Position in the document
+    text: str
+    page_number: int  # Page the chunk starts on
+    page_end: int  # Page the chunk ends on
+
+
+class PageChunker:
+    """
+    Streaming chunker over the pages of one document.
+
+    Pages are fed in order and joined with blank lines, then cut into
+    chunk_size-character chunks with `overlap` characters of overlap,
+    breaking at word boundaries where possible; only the not-yet-chunked
+    tail is kept in memory. Each chunk records the pages of
+    its first and last character.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._text = ""  # Unchunked tail of the document
+        self._offset = 0  # Document offset of _text[0]
+        self._start = 0  # Document offset of the next chunk
+        self._page_starts: List[int] = []  # Document offset where each buffered page begins
+        self._page_numbers: List[int] = []
+        self._count = 0
+
+    @property
+    def _length(self) -> int:
+        return self._offset + len(self._text)
+
+    def feed(self, page_number: int, text: str) -> List[Chunk]:
+        """Add the next page; returns the chunks that are now complete"""
+        text = clean_page_text(text)
+        if not text:
+            return []
+        if self._length > 0:
+            self._text += "\n\n"
+        self._page_starts.append(self._length)
+        self._page_numbers.append(page_number)
+        self._text += text
+        return self._drain(final=False)
+
+    def finish(self) -> List[Chunk]:
+        """End of document: returns the remaining chunks"""
+        return self._drain(final=True)
+
+    def _page_at(self, position: int) -> int:
+        return self._page_numbers[bisect_right(self._page_starts, position) - 1]
+
+    def _drain(self, final: bool) -> List[Chunk]:
+        chunks = []
+        length = self._length
+        while self._start < length:
+            start = self._start
+            end = start + self.chunk_size
+            if end >= length and not final:
+                break  # The word-boundary check needs the character at `end`
+
+            chunk = self._text[start - self._offset:end - self._offset]
+
+            # Try to break at word boundary
+            if end < length and not self._text[end - self._offset].isspace():
+                last_space = chunk.rfind(" ")
+                if last_space > self.chunk_size - 100:  # Keep chunk reasonably sized
+                    chunk = chunk[:last_space]
+                    end = start + last_space
+
+            stripped = chunk.strip()
+            if stripped:
+                first = start + len(chunk) - len(chunk.lstrip())
+                last = start + len(chunk.rstrip()) - 1
+                chunks.append(Chunk(self._count, stripped, self._page_at(first), self._page_at(last)))
+                self._count += 1
+            self._start = end - self.overlap if end < length else length
+
+        # Drop text and pages that no future chunk can reach
+        self._text = self._text[self._start - self._offset:]
+        self._offset = self._start
+        keep_from = max(0, bisect_right(self._page_starts, self._offset) - 1)
+        del self._page_starts[:keep_from]
+        del self._page_numbers[:keep_from]
+        return chunks
+
+
+def vector_id(pdf_name: str, chunk: Chunk) -> str:
+    """Deterministic vector ID: re-ingesting a PDF overwrites its vectors in place"""
+    return chunk_vector_id(pdf_name, chunk.index)
+
+
+def chunk_vector_id(pdf_name: str, index: int) -> str:
+    return f"{pdf_name}_chunk_{index}"
+
+
+def stored_chunk_ids(vector_store: VectorStore, pdf_name: str, start: int = 0, batch_size: int = 100) -> List[str]:
+    """
+    IDs of pdf_name's stored chunks from chunk index `start` on.
+
+    Chunk indices are contiguous, so IDs are probed by value in batches until
+    a batch finds none. Unlike listing by prefix (Pinecone serverless only),
+    this works on every backend and needs no record of earlier uploads.
+    """
+    found = []
+    while True:
+        batch = [chunk_vector_id(pdf_name, index) for index in range(start, start + batch_size)]
+        existing = vector_store.existing_ids(batch)
+        if not existing:
+            return found
+        found.extend(chunk_id for chunk_id in batch if chunk_id in existing)
+        start += batch_size
+
+
+def chunk_metadata(pdf_name: str, chunk: Chunk) -> Dict:
+    return {"pdf_name": pdf_name, "page_number": chunk.page_number, "page_end": chunk.page_end, "content": chunk.text}
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+
+def render_page_range(pdf_path: str, first_page: int, last_page: int) -> List[RenderedPage]:
+    """Render pages first_page..last_page (1-indexed, inclusive); runs in a worker process"""
+    with PDFPageRenderer(pdf_path, cache=ocr_cache) as renderer:
+        return [renderer.render_page(page_num) for page_num in range(first_page, last_page + 1)]
+
+
+class _Document:
+    """Progress of one PDF through the pipeline"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pdf_name = Path(path).name
+        self.start = time.time()
+        self.total_pages: Optional[int] = None
+        self.pages_done = 0
+        self.chunks_emitted = 0
+        self.chunks_upserted = 0
+        self.vector_ids: List[str] = []
+        self.error: Optional[str] = None
+        self.reported = False
+        self.chunker = PageChunker()
+        self.ocr_pages: Dict[int, str] = {}  # OCR'd pages waiting for an earlier page
+        self.next_page = 1  # Next page to feed to the chunker
+
+    @property
+    def finished(self) -> bool:
+        return (
+            self.total_pages is not None
+            and self.pages_done >= self.total_pages
+            and self.chunks_upserted >= self.chunks_emitted
+        )
+
+    def result(self) -> Dict:
+        if self.error:
+            # vector_ids: whatever was upserted before the failure, for cleanup
+            return {"pdf_name": self.pdf_name, "status": "error", "error": self.error,
+                    "vector_ids": sorted(self.vector_ids), "time_total": time.time() - self.start}
+        return {
+            "pdf_name": self.pdf_name,
+            "status": "success",
+            "num_pages": self.total_pages,
+            "num_vectors": len(self.vector_ids),
+            "vector_ids": sorted(self.vector_ids),
+            "time_total": time.time() - self.start,
+        }
+
+
+class IngestionPipeline:
+    """
+    Ingest many PDFs through the render / OCR / embed / upsert stages.
+
+    client: AsyncAzureOpenAI used for VLM OCR
+    vector_store: destination VectorStore
+    embed_fn: list[str] -> list of vectors (e.g. SentenceTransformer.encode)
+    workers: render processes (default INGEST_WORKERS = CPU cores)
+    executor: render in this executor (e.g. the API's shared cpu_executor)
+        instead of a process pool started for each run()
+    """
+
+    def __init__(
+        self,
+        client,
+        vector_store: VectorStore,
+        embed_fn: Callable[[List[str]], Sequence[Sequence[float]]],
+        workers: int = INGEST_WORKERS,
+        ocr_concurrency: int = OCR_CONCURRENCY,
+        embed_batch_size: int = INGEST_EMBED_BATCH_SIZE,
+        upsert_batch_size: int = INGEST_UPSERT_BATCH_SIZE,
+        upsert_concurrency: int = INGEST_UPSERT_CONCURRENCY,
+        pages_per_task: int = INGEST_PAGES_PER_TASK,
+        queue_size: int = INGEST_QUEUE_SIZE,
+        executor: Optional[Executor] = None,
+    ):
+        self.client = client
+        self.vector_store = vector_store
+        self.embed_fn = embed_fn
+        self.workers = max(1, workers)
+        self.ocr_concurrency = max(1, ocr_concurrency)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.upsert_batch_size = max(1, upsert_batch_size)
+        self.upsert_concurrency = max(1, upsert_concurrency)
+        self.pages_per_task = max(1, pages_per_task)
+        self.queue_size = max(1, queue_size)
+        self.executor = executor
+
+    async def run(self, pdf_paths: Sequence[str], on_result: Optional[Callable[[Dict], object]] = None) -> List[Dict]:
+        """
+        Ingest pdf_paths; on_result(result) is called as each PDF completes.
+        on_result may be a coroutine function; run() waits for those calls.
+        """
+        loop = asyncio.get_running_loop()
+        documents = [_Document(str(path)) for path in pdf_paths]
+        results: List[Dict] = []
+        callbacks: List[asyncio.Future] = []
+
+        page_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size * 4)
+        upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=max(2, self.upsert_concurrency * 2))
+
+        def report(document: _Document):
+            if document.finished and not document.reported:
+                document.reported = True
+                result = document.result()
+                results.append(result)
+                if on_result:
+                    outcome = on_result(result)
+                    if inspect.isawaitable(outcome):
+                        callbacks.append(asyncio.ensure_future(outcome))
+
+        def fail(document: _Document, error: Exception):
+            if document.error is None:
+                document.error = f"{type(error).__name__}: {error}"
+
+        # Spawned workers: never fork a parent holding model threads
+        pool = self.executor or ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        render_slots = asyncio.Semaphore(self.workers * 2)
+
+        async def render(document: _Document, first_page: int, last_page: int):
+            try:
+                pages = await loop.run_in_executor(pool, render_page_range, document.path, first_page, last_page)
+                for page in pages:
+                    await page_queue.put((document, page))
+            except Exception as e:
+                fail(document, e)
+                document.pages_done += last_page - first_page + 1
+                report(document)
+            finally:
+                render_slots.release()
+
+        async def producer():
+            tasks = []
+            for document in documents:
+                document.start = time.time()
+                try:
+                    document.total_pages = await loop.run_in_executor(pool, pdf_page_count, document.path)
+                except Exception as e:
+                    document.total_pages = 0
+                    fail(document, e)
+                    report(document)
+                    continue
+                if document.total_pages == 0:
+                    report(document)
+                for first_page in range(1, document.total_pages + 1, self.pages_per_task):
+                    last_page = min(first_page + self.pages_per_task - 1, document.total_pages)
+                    await render_slots.acquire()
+                    tasks.append(asyncio.create_task(render(document, first_page, last_page)))
+            await asyncio.gather(*tasks)
+            for _ in range(self.ocr_concurrency):
+                await page_queue.put(None)  # One stop signal per OCR worker
+
+        async def ocr_worker():
+            while (item := await page_queue.get()) is not None:
+                document, page = item
+                try:
+                    if document.error is None:
+                        if page.cached_text is not None:
+                            text = page.cached_text
+                        else:
+                            text = await ocr_page(self.client, page.image_base64, page.page_number)
+                            if ocr_cache is not None and page.cache_key:
+                                await asyncio.to_thread(ocr_cache.put_page, page.cache_key, text)
+                        # Chunk pages in order; out-of-order pages wait (as text) for earlier ones
+                        document.ocr_pages[page.page_number] = text
+                        while document.next_page in document.ocr_pages:
+                            chunks = document.chunker.feed(document.next_page, document.ocr_pages.pop(document.next_page))
+                            document.next_page += 1
+                            if document.next_page > document.total_pages:
+                                chunks += document.chunker.finish()
+                            for chunk in chunks:
+                                document.chunks_emitted += 1
+                                await chunk_queue.put((document, chunk))
+                except Exception as e:
+                    fail(document, e)
+                document.pages_done += 1
+                report(document)
+
+        async def embedder():
+            done = False
+            while not done:
+                batch = [await chunk_queue.get()]
+                # Fill the batch with whatever else is already waiting
+                while len(batch) < self.embed_batch_size and not chunk_queue.empty():
+                    batch.append(chunk_queue.get_nowait())
+                if batch[-1] is None:
+                    batch.pop()
+                    done = True
+                if not batch:
+                    continue
+                try:
+                    vectors = await asyncio.to_thread(self.embed_fn, [chunk.text for _, chunk in batch])
+                except Exception as e:
+                    for document, _ in batch:
+                        fail(document, e)
+                        document.chunks_upserted += 1
+                        report(document)
+                    continue
+                for start in range(0, len(batch), self.upsert_batch_size):
+                    end = start + self.upsert_batch_size
+                    await upsert_queue.put(list(zip(batch[start:end], vectors[start:end])))
+            for _ in range(self.upsert_concurrency):
+                await upsert_queue.put(None)
+
+        async def upserter():
+            while (batch := await upsert_queue.get()) is not None:
+                ids, vectors, metadata = [], [], []
+                for (document, chunk), vector in batch:
+                    ids.append(vector_id(document.pdf_name, chunk))
+                    vectors.append(vector)
+                    metadata.append(chunk_metadata(document.pdf_name, chunk))
+                try:
+                    await asyncio.to_thread(self.vector_store.upsert, ids, vectors, metadata)
+                    for ((document, _), _), upserted_id in zip(batch, ids):
+                        document.vector_ids.append(upserted_id)
+                except Exception as e:
+                    for (document, _), _ in batch:
+                        fail(document, e)
+                for (document, _), _ in batch:
+                    document.chunks_upserted += 1
+                    report(document)
+
+        async def ocr_stage():
+            await asyncio.gather(*(ocr_worker() for _ in range(self.ocr_concurrency)))
+            await chunk_queue.put(None)
+
+        try:
+            await asyncio.gather(
+                producer(),
+                ocr_stage(),
+                embedder(),
+                *(upserter() for _ in range(self.upsert_concurrency)),
+            )
+            await asyncio.gather(*callbacks)
+        finally:
+            if pool is not self.executor:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+
+async def ingest_pdf(
+    pdf_path: str,
+    client,
+    vector_store: VectorStore,
+    embed_fn: Callable[[List[str]], Sequence[Sequence[float]]],
+    **pipeline_options
+) -> Dict:
+    """
+    OCR, chunk, embed and upsert one PDF.
+
+    Returns {pdf_name, status, num_pages, num_vectors, vector_ids, time_total},
+    or {pdf_name, status: "error", error, ...} on failure.
+    """
+    pipeline = IngestionPipeline(client, vector_store, embed_fn, **pipeline_options)
+    results = await pipeline.run([pdf_path])
+    return results[0]
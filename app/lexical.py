@@ -0,0 +1,222 @@
+"""
+Lexical (BM25) retrieval over chunk text.
+
+Dense embeddings miss exact matches on well names, years and Cyrillic or
+Azerbaijani terms; BM25 catches them. BM25Index is a compact inverted index
+in CSR layout, stored as .npy arrays plus a JSON sidecar:
+
+    vocab.json       term -> row in the postings offsets, plus corpus stats
+    offsets.npy      int64 [num_terms + 1], postings of term t are offsets[t]:offsets[t+1]
+    postings.npy     int32 chunk rows, sorted per term
+    tf.npy           uint16 term frequency per posting
+    doc_lengths.npy  int32 tokens per chunk
+    documents.json   columnar id / pdf_name / page_number / content
+
+The arrays are opened with mmap_mode="r", so loading is instant and the OS
+page cache shares them across workers. A query touches only the postings of
+its terms; for the ~2,100-chunk corpus that is well under a millisecond.
+
+The index is built from the vector store contents after ingestion
+(scripts/ingest_hackathon_data.py) and fused with dense results by
+reciprocal_rank_fusion().
+"""
+
+import os
+import re
+import json
+import shutil
+import unicodedata
+from pathlib import Path
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_LEXICAL_INDEX_PATH = Path(__file__).resolve().parent.parent / "data" / "lexical_index"
+
+DOCUMENT_COLUMNS = ("id", "pdf_name", "page_number", "content")
+
+_WORD = re.compile(r"\w+")
+_COMPOUND = re.compile(r"\w+(?:[-/.]\w+)+")  # Well names and codes: QD-12, 2/3, 305.7
+_FOLD = str.maketrans({"ı": "i", "ə": "e"})  # Azerbaijani letters NFKD does not decompose
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase, accent-folded word tokens.
+
+    Diacritics are dropped (ş -> s, ö -> o, й -> и) so OCR variants and
+    Latin/ASCII spellings match; compound codes like "QD-12" are kept as one
+    token in addition to their parts.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = text.casefold().translate(_FOLD)
+    return _WORD.findall(text) + _COMPOUND.findall(text)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an mmap-loaded inverted index (see module docstring).
+
+    Build with BM25Index.build(records) and save(); load with
+    BM25Index.load(directory).
+    """
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        tf: np.ndarray,
+        doc_lengths: np.ndarray,
+        documents: Dict[str, List],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.postings = postings
+        self.tf = tf
+        self.doc_lengths = doc_lengths
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+
+        num_docs = len(doc_lengths)
+        avg_length = float(np.mean(doc_lengths)) if num_docs else 0.0
+        # Per-document part of the BM25 denominator, computed once
+        self._length_norm = (k1 * (1 - b + b * np.asarray(doc_lengths, dtype=np.float32) / max(avg_length, 1.0))).astype(np.float32)
+        document_frequency = np.diff(np.asarray(offsets)).astype(np.float32)
+        self._idf = np.log1p((num_docs - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[str, Dict]]) -> "BM25Index":
+        """Index (vector_id, metadata) records; metadata needs content, pdf_name, page_number"""
+        documents: Dict[str, List] = {column: [] for column in DOCUMENT_COLUMNS}
+        term_postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths = []
+
+        for row, (vector_id, metadata) in enumerate(records):
+            content = metadata.get("content") or ""
+            documents["id"].append(vector_id)
+            documents["pdf_name"].append(metadata.get("pdf_name", "unknown.pdf"))
+            documents["page_number"].append(int(metadata.get("page_number") or 0))
+            documents["content"].append(content)
+
+            counts = Counter(tokenize(content))
+            doc_lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                term_postings.setdefault(term, []).append((row, count))
+
+        terms = sorted(term_postings)
+        vocab = {term: index for index, term in enumerate(terms)}
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(term_postings[term]) for term in terms])
+        postings = np.empty(offsets[-1], dtype=np.int32)
+        tf = np.empty(offsets[-1], dtype=np.uint16)
+        for index, term in enumerate(terms):
+            rows, counts = zip(*term_postings[term])
+            postings[offsets[index]:offsets[index + 1]] = rows
+            tf[offsets[index]:offsets[index + 1]] = np.minimum(counts, np.iinfo(np.uint16).max)
+
+        return cls(vocab, offsets, postings, tf, np.asarray(doc_lengths, dtype=np.int32), documents)
+
+    def save(self, directory: str):
+        """Write the index to `directory`, replacing any previous index"""
+        directory = Path(directory)
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        old_dir = directory.with_name(directory.name + ".old")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        np.save(tmp_dir / "offsets.npy", np.asarray(self.offsets))
+        np.save(tmp_dir / "postings.npy", np.asarray(self.postings))
+        np.save(tmp_dir / "tf.npy", np.asarray(self.tf))
+        np.save(tmp_dir / "doc_lengths.npy", np.asarray(self.doc_lengths))
+        with open(tmp_dir / "documents.json", "w", encoding="utf-8") as f:
+            json.dump(self.documents, f, ensure_ascii=False)
+        with open(tmp_dir / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "terms": self.vocab}, f, ensure_ascii=False)
+
+        # Swap directories; readers that already mmap'd the old files keep them
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str) -> "BM25Index":
+        directory = Path(directory)
+        with open(directory / "vocab.json", encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(directory / "documents.json", encoding="utf-8") as f:
+            documents = json.load(f)
+        return cls(
+            vocab["terms"],
+            np.load(directory / "offsets.npy", mmap_mode="r"),
+            np.load(directory / "postings.npy", mmap_mode="r"),
+            np.load(directory / "tf.npy", mmap_mode="r"),
+            np.load(directory / "doc_lengths.npy", mmap_mode="r"),
+            documents,
+            k1=vocab["k1"],
+            b=vocab["b"],
+        )
+
+    def search(self, query: str, top_k: int = 20) -> List[Tuple[int, float]]:
+        """Return up to top_k (row, bm25_score) pairs, best first"""
+        if len(self) == 0:
+            return []
+        term_ids = {self.vocab[term] for term in tokenize(query) if term in self.vocab}
+        if not term_ids:
+            return []
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            rows = self.postings[start:end]
+            tf = self.tf[start:end].astype(np.float32)
+            scores[rows] += self._idf[term_id] * tf * (self.k1 + 1) / (tf + self._length_norm[rows])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(int(row), float(scores[row])) for row in candidates]
+
+    def document(self, row: int) -> Dict:
+        """{id, pdf_name, page_number, content} of an indexed chunk"""
+        return {column: self.documents[column][row] for column in DOCUMENT_COLUMNS}
+
+
+def load_lexical_index(directory: Optional[str] = None) -> Optional[BM25Index]:
+    """Load the index from LEXICAL_INDEX_PATH (or `directory`); None if it was never built"""
+    directory = Path(directory or os.getenv("LEXICAL_INDEX_PATH") or DEFAULT_LEXICAL_INDEX_PATH)
+    if not (directory / "vocab.json").exists():
+        return None
+    return BM25Index.load(str(directory))
+
+
+def build_lexical_index(records: Iterable[Tuple[str, Dict]], directory: Optional[str] = None) -> BM25Index:
+    """Build the BM25 index from (vector_id, metadata) records and save it"""
+    index = BM25Index.build(records)
+    index.save(str(directory or os.getenv("LEXICAL_INDEX_PATH") or DEFAULT_LEXICAL_INDEX_PATH))
+    return index
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked ID lists: score(id) = sum over lists of 1 / (k + rank).
+
+    Rank-based, so BM25 and cosine scores need no calibration against each
+    other. Returns (id, fused_score) pairs, best first.
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -7,39 +7,83 @@ Optimized based on comprehensive benchmarking:
 
 import os
 import re
+import json
 import time
-import base64
-import gc
-from typing import List, Dict
+import asyncio
+import tempfile
+import threading
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional, Union
 from pathlib import Path
-from io import BytesIO
 
-import fitz  # PyMuPDF
-from PIL import Image
 from fastapi import FastAPI, HTTPException, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from openai import AzureOpenAI
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+from openai import AsyncAzureOpenAI, RateLimitError
 
-# Load environment variables
+# Load environment variables (before app modules read their settings)
 load_dotenv()
 
+from app.batching import MicroBatcher
+from app.clients import create_azure_client, create_pinecone_index
+from app.cache import AnswerCache, EmbeddingCache, IndexGeneration
+from app.embeddings import EMBEDDING_MODEL_NAME, load_embedding_model
+from app.executors import CPU_WORKERS, cpu_executor, run_cpu_bound
+from app.ingestion import ingest_pdf, stored_chunk_ids
+from app.lexical import BM25Index, build_lexical_index, load_lexical_index, reciprocal_rank_fusion
+from app.metrics import LLM_STAGE_SECONDS, instrument_app, register_cache, time_stage, track_upstream
+from app.ratelimit import PRIORITY_BULK, PRIORITY_INTERACTIVE, deployment_limiter, estimate_tokens
+from app.vector_store import LocalVectorStore, VectorStore, create_vector_store
+from app.ocr import PDFPageRenderer, iter_ocr_pages, ocr_cache, ocr_document, ocr_page_sources
+from app.ocr_jobs import OCRJobQueue, OCRJobStore
+
 # Get the directory where main.py is located for absolute path resolution
 BASE_DIR = Path(__file__).resolve().parent
 
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm start: preload the embedding model and build clients in the background.
+
+    The server accepts connections immediately (liveness), while /health/ready
+    returns 503 until warm_up() has finished, so the load balancer only routes
+    traffic once first-request latency is representative.
+    """
+    warmup_task = None
+    if os.getenv("PRELOAD_MODELS", "true").lower() == "true":
+        warmup_task = asyncio.create_task(warm_up())
+    else:
+        readiness["ready"] = True
+    ocr_job_queue.start()  # Also resumes OCR jobs interrupted by a restart
+
+    yield
+
+    if warmup_task is not None:
+        warmup_task.cancel()
+    await ocr_job_queue.stop()
+    for client in list(azure_clients.values()):
+        await client.close()
+    azure_clients.clear()
+    cpu_executor.shutdown(wait=False, cancel_futures=True)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="SOCAR Historical Documents AI System",
     description="RAG-based chatbot for SOCAR oil & gas historical documents with OCR capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Security Headers Middleware for production
@@ -80,59 +124,177 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
 )
 
+# Prometheus: per-handler HTTP metrics plus the stage metrics in app/metrics.py at /metrics
+instrument_app(app)
+
 # Mount static files and templates using absolute paths for production reliability
 STATIC_DIR = BASE_DIR / "static"
 TEMPLATES_DIR = BASE_DIR / "templates"
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
-# Initialize clients (lazy loading for faster startup)
-azure_client = None
+# Initialize clients (preloaded by warm_up() at startup, lazily otherwise).
+# Each getter uses double-checked locking so concurrent first requests
+# cannot build the same client or load the model twice.
+azure_clients: Dict[str, AsyncAzureOpenAI] = {}  # One pooled client per upstream (app/clients.py)
 pinecone_index = None
+vector_store = None
 embedding_model = None
+_client_lock = threading.RLock()  # Re-entrant: get_vector_store() calls get_pinecone_index()
+_model_lock = threading.Lock()
 
+# Readiness state reported by /health/ready
+readiness = {"ready": False, "error": None, "warmup_seconds": None}
 
-def get_azure_client():
-    """Lazy load Azure OpenAI client"""
-    global azure_client
-    if azure_client is None:
-        azure_client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-        )
-    return azure_client
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | torch-int8 | onnx | onnx-int8
+EMBEDDING_CACHE_KEY = f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}"  # Backends differ slightly; never mix
+
+# Query-embedding cache (set EMBEDDING_CACHE_PATH to persist across restarts)
+embedding_cache = EmbeddingCache(
+    max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("EMBEDDING_CACHE_TTL", "0")),
+    path=os.getenv("EMBEDDING_CACHE_PATH") or None
+)
+
+# Full-answer cache in front of retrieval + generation (invalidated by ingestion)
+index_generation = IndexGeneration()
+answer_cache = AnswerCache(
+    max_size=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    semantic_threshold=float(os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD", "0")),
+    generation=index_generation
+)
+
+# Hit ratios exported at /metrics (rag_cache_hit_ratio{cache})
+register_cache("embedding", embedding_cache)
+register_cache("answer", answer_cache)
+register_cache("ocr", ocr_cache)
+
+# Hybrid retrieval: BM25 over chunk text fused with dense results (RRF)
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "false").lower() == "true"  # Opt-in until measured on the eval set
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Per retriever, before fusion
+RRF_K = 60
+lexical_index: Optional[BM25Index] = None
+_lexical_generation: Optional[int] = None
+_lexical_lock = threading.Lock()
+
+
+def get_azure_client(upstream: str = "azure_llm") -> AsyncAzureOpenAI:
+    """Lazy load the async Azure OpenAI client for chat (azure_llm) or OCR (azure_vlm)"""
+    client = azure_clients.get(upstream)
+    if client is None:
+        with _client_lock:
+            client = azure_clients.get(upstream)
+            if client is None:
+                client = azure_clients[upstream] = create_azure_client(upstream)
+    return client
 
 
 def get_pinecone_index():
     """Lazy load Pinecone index"""
     global pinecone_index
     if pinecone_index is None:
-        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-        pinecone_index = pc.Index(os.getenv("PINECONE_INDEX_NAME", "hackathon"))
+        with _client_lock:
+            if pinecone_index is None:
+                pinecone_index = create_pinecone_index()
     return pinecone_index
 
 
+def get_vector_store() -> VectorStore:
+    """Lazy load the vector store selected by VECTOR_DB_TYPE (pinecone or local)"""
+    global vector_store
+    if vector_store is None:
+        with _client_lock:
+            if vector_store is None:
+                vector_store = create_vector_store(get_pinecone_index)
+    return vector_store
+
+
 def get_embedding_model():
     """Lazy load local embedding model (same as ingestion: BAAI/bge-large-en-v1.5)"""
     global embedding_model
     if embedding_model is None:
-        print("Loading BAAI/bge-large-en-v1.5 embedding model...")
-        embedding_model = SentenceTransformer("BAAI/bge-large-en-v1.5")
-        print("✅ Embedding model loaded")
+        with _model_lock:
+            if embedding_model is None:
+                print(f"Loading {EMBEDDING_MODEL_NAME} embedding model ({EMBEDDING_BACKEND} backend)...")
+                embedding_model = load_embedding_model(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND)
+                print("✅ Embedding model loaded")
     return embedding_model
 
 
-def get_embedding(text: str) -> List[float]:
+def get_lexical_index() -> Optional[BM25Index]:
+    """
+    BM25 index (LEXICAL_INDEX_PATH), or None when hybrid search is off or
+    the index was never built. Reloaded when ingestion bumps the index generation.
     """
-    Generate embedding for semantic search.
+    global lexical_index, _lexical_generation
+    if not HYBRID_SEARCH:
+        return None
+    generation = index_generation.current()
+    if generation != _lexical_generation:
+        with _lexical_lock:
+            if generation != _lexical_generation:
+                lexical_index = load_lexical_index()
+                _lexical_generation = generation
+                if lexical_index is not None:
+                    print(f"✅ Lexical index loaded ({len(lexical_index)} chunks)")
+    return lexical_index
+
+
+def warm_up_blocking():
+    """Load the embedding model, run a dummy encode, and build all clients"""
+    model = get_embedding_model()
+    model.encode("warm-up query")  # First encode pays one-off allocation/kernel setup costs
+    get_azure_client("azure_llm")
+    get_azure_client("azure_vlm")
+    get_vector_store().describe()  # Opens the connection pool to the vector DB
+    get_lexical_index()
+
+
+async def warm_up():
+    """Run warm-up off the event loop, retrying until it succeeds, then mark the app ready"""
+    delay = 1.0
+    while True:
+        start_time = time.time()
+        try:
+            await run_in_threadpool(warm_up_blocking)
+            readiness.update(ready=True, error=None, warmup_seconds=round(time.time() - start_time, 2))
+            print(f"✅ Warm-up complete in {readiness['warmup_seconds']}s - ready for traffic")
+            return
+        except Exception as e:
+            readiness["error"] = str(e)
+            print(f"⚠️  Warm-up failed ({e}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+
+def encode_batch(texts: List[str]) -> List[List[float]]:
+    """Encode several queries in one batched model call (used by the micro-batcher)"""
+    model = get_embedding_model()
+    return model.encode(texts, batch_size=len(texts)).tolist()
+
+
+# Micro-batcher: concurrent queries arriving within a few ms share one encode call
+embedding_batcher = MicroBatcher(
+    encode_batch,
+    max_batch_size=int(os.getenv("EMBED_BATCH_MAX_SIZE", "32")),
+    max_wait_ms=float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+)
 
-    Uses BAAI/bge-large-en-v1.5 (same as document ingestion) for consistent embeddings.
-    Returns 1024-dimensional vector matching Pinecone index.
+
+async def embed_query(text: str) -> List[float]:
+    """
+    Async query embedding: served from the embedding cache, otherwise batched
+    with other in-flight queries by the micro-batcher.
     """
+    cached = embedding_cache.get(EMBEDDING_CACHE_KEY, text)
+    if cached is not None:
+        return cached
+
     try:
-        model = get_embedding_model()
-        embedding = model.encode(text).tolist()
+        with time_stage(LLM_STAGE_SECONDS, "embed"):
+            embedding = await embedding_batcher.submit(text)
+        embedding_cache.put(EMBEDDING_CACHE_KEY, text, embedding)
         return embedding
     except Exception as e:
         print(f"Embedding error: {e}")
@@ -140,6 +302,27 @@ def get_embedding(text: str) -> List[float]:
         return [0.0] * 1024
 
 
+async def embed_queries(texts: List[str]) -> List[List[float]]:
+    """
+    Embed many queries at once (used by /llm/batch).
+
+    Cache hits are served directly; the distinct misses are encoded in
+    EMBED_BATCH_MAX_SIZE slices that run in parallel in the CPU executor,
+    instead of trickling through the micro-batcher one query at a time.
+    """
+    embeddings = {text: embedding_cache.get(EMBEDDING_CACHE_KEY, text) for text in dict.fromkeys(texts)}
+    misses = [text for text, embedding in embeddings.items() if embedding is None]
+    size = embedding_batcher.max_batch_size
+    slices = [misses[start:start + size] for start in range(0, len(misses), size)]
+
+    encoded = await asyncio.gather(*(run_cpu_bound(encode_batch, batch) for batch in slices))
+    for batch, vectors in zip(slices, encoded):
+        for text, embedding in zip(batch, vectors):
+            embeddings[text] = embedding
+            embedding_cache.put(EMBEDDING_CACHE_KEY, text, embedding)
+    return [embeddings[text] for text in texts]
+
+
 # Request/Response models
 class ChatMessage(BaseModel):
     role: str
@@ -171,50 +354,159 @@ class AnswerResponse(BaseModel):
     response_time: float
 
 
-def retrieve_documents(query: str, top_k: int = 3) -> List[Dict]:
+class BatchQuestionRequest(BaseModel):
+    questions: List[str]
+    temperature: float = 0.2
+    max_tokens: int = 1000
+
+
+class BatchAnswer(BaseModel):
+    answer: str
+    sources: List[Dict]
+    response_time: float
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class BatchAnswerResponse(BaseModel):
+    results: List[BatchAnswer]
+    succeeded: int
+    failed: int
+    response_time: float
+
+
+def match_to_document(match: Dict) -> Dict:
+    """Vector store match -> {pdf_name, page_number, content, score}"""
+    # Ensure page_number is always an integer (Pinecone may return float)
+    page_num = match['metadata'].get('page_number', 0)
+    page_num = int(page_num) if isinstance(page_num, (int, float)) else 0
+
+    return {
+        'pdf_name': match['metadata'].get('pdf_name', 'unknown.pdf'),
+        'page_number': page_num,
+        'content': match['metadata'].get('content', ''),  # Changed from 'text' to 'content'
+        'score': match.get('score', 0.0)
+    }
+
+
+async def retrieve_documents(query: str, top_k: int = 3, query_embedding: Optional[List[float]] = None) -> List[Dict]:
     """
-    Retrieve relevant documents from Pinecone vector database.
+    Retrieve relevant documents from the vector store (Pinecone or local).
     Best strategy from benchmark: vanilla top-3 with BAAI/bge-large-en-v1.5
 
     Uses BAAI/bge-large-en-v1.5 embeddings (1024-dim, same as ingestion).
+    Embedding is micro-batched in the CPU executor, the vector query runs in the I/O threadpool.
+    Pass query_embedding to reuse an embedding that was already computed.
+
+    With a lexical index (HYBRID_SEARCH), dense and BM25 candidates are
+    retrieved concurrently and fused with reciprocal rank fusion; 'score'
+    is then the fused score.
     """
-    index = get_pinecone_index()
+    store = await run_in_threadpool(get_vector_store)
+    lexical = await run_in_threadpool(get_lexical_index)
 
     # Generate query embedding
-    query_embedding = get_embedding(query)
+    if query_embedding is None:
+        query_embedding = await embed_query(query)
+
+    if lexical is None:
+        # Search vector database
+        matches = await query_vector_store(store, query_embedding, top_k)
+        return [match_to_document(match) for match in matches]
 
-    # Search vector database
-    results = index.query(
-        vector=query_embedding,
-        top_k=top_k,
-        include_metadata=True
+    dense_matches, lexical_hits = await asyncio.gather(
+        query_vector_store(store, query_embedding, max(top_k, HYBRID_CANDIDATES)),
+        search_lexical_index(lexical, query, max(top_k, HYBRID_CANDIDATES))
     )
+    return fuse_candidates(dense_matches, lexical_hits, lexical, top_k)
 
-    # Extract documents
-    documents = []
-    for match in results['matches']:
-        # Ensure page_number is always an integer (Pinecone may return float)
-        page_num = match['metadata'].get('page_number', 0)
-        page_num = int(page_num) if isinstance(page_num, (int, float)) else 0
-
-        documents.append({
-            'pdf_name': match['metadata'].get('pdf_name', 'unknown.pdf'),
-            'page_number': page_num,
-            'content': match['metadata'].get('content', ''),  # Changed from 'text' to 'content'
-            'score': match.get('score', 0.0)
+
+async def query_vector_store(store: VectorStore, query_embedding: List[float], top_k: int) -> List[Dict]:
+    """store.query in the I/O threadpool, timed as the vector_query stage"""
+    with time_stage(LLM_STAGE_SECONDS, "vector_query"), track_upstream("vector_store"):
+        return await run_in_threadpool(store.query, query_embedding, top_k)
+
+
+async def search_lexical_index(lexical: BM25Index, query: str, top_k: int) -> List[tuple[int, float]]:
+    """BM25 search in the I/O threadpool, timed as the lexical_query stage"""
+    with time_stage(LLM_STAGE_SECONDS, "lexical_query"):
+        return await run_in_threadpool(lexical.search, query, top_k)
+
+
+def fuse_candidates(dense_matches: List[Dict], lexical_hits: List[tuple[int, float]], lexical: BM25Index, top_k: int) -> List[Dict]:
+    """Reciprocal rank fusion of dense matches and BM25 hits -> top_k documents"""
+    candidates = {match['id']: match_to_document(match) for match in dense_matches}
+    lexical_ids = []
+    for row, score in lexical_hits:
+        chunk = lexical.document(row)
+        lexical_ids.append(chunk['id'])
+        candidates.setdefault(chunk['id'], {
+            'pdf_name': chunk['pdf_name'],
+            'page_number': chunk['page_number'],
+            'content': chunk['content'],
+            'score': score
         })
 
-    return documents
+    fused = reciprocal_rank_fusion([[match['id'] for match in dense_matches], lexical_ids], k=RRF_K)
+    return [{**candidates[vector_id], 'score': score} for vector_id, score in fused[:top_k]]
 
 
-def generate_answer(query: str, documents: List[Dict], temperature: float = 0.2, max_tokens: int = 1000) -> tuple[str, float]:
+async def retrieve_documents_batch(queries: List[str], query_embeddings: List[List[float]], top_k: int = 3) -> List:
     """
-    Generate answer using best-performing configuration.
-    Model: Llama-4-Maverick-17B (open-source)
-    Prompt: citation_focused (best citation score: 73.33%)
+    retrieve_documents() for many queries at once (used by /llm/batch).
+
+    The local store answers all queries with one matrix product; Pinecone has
+    no multi-vector query, so its queries fan out in parallel. Returns one
+    document list per query, or the exception that query raised.
+    """
+    store = await run_in_threadpool(get_vector_store)
+    lexical = await run_in_threadpool(get_lexical_index)
+    candidates = top_k if lexical is None else max(top_k, HYBRID_CANDIDATES)
+
+    if isinstance(store, LocalVectorStore):
+        with time_stage(LLM_STAGE_SECONDS, "vector_query"):
+            dense = await run_cpu_bound(store.query_many, query_embeddings, candidates)
+    else:
+        dense = await asyncio.gather(
+            *(query_vector_store(store, embedding, candidates) for embedding in query_embeddings),
+            return_exceptions=True
+        )
+
+    if lexical is None:
+        return [
+            matches if isinstance(matches, Exception) else [match_to_document(match) for match in matches[:top_k]]
+            for matches in dense
+        ]
+
+    lexical_hits = await run_in_threadpool(lambda: [lexical.search(query, candidates) for query in queries])
+    return [
+        matches if isinstance(matches, Exception) else fuse_candidates(matches, hits, lexical, top_k)
+        for matches, hits in zip(dense, lexical_hits)
+    ]
+
+
+async def lookup_cached_answer(query: str, temperature: float, max_tokens: int) -> tuple[Optional[Dict], Optional[List[float]]]:
     """
-    client = get_azure_client()
+    Check the answer cache before running the RAG pipeline.
+
+    Returns (cached_entry, query_embedding). The exact lookup needs no
+    embedding; the embedding is only computed (and returned for reuse by
+    retrieval) when the exact lookup misses.
+    """
+    cached = answer_cache.get(query, temperature, max_tokens)
+    if cached is not None:
+        return cached, None
+
+    query_embedding = await embed_query(query)
+    return answer_cache.get_similar(query_embedding, temperature, max_tokens), query_embedding
+
 
+LLM_MODEL = "Llama-4-Maverick-17B-128E-Instruct-FP8"
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))  # 429 and transient-error retries, paced by the deployment limiter
+
+
+def build_prompt(query: str, documents: List[Dict]) -> str:
+    """Build the citation-focused RAG prompt from retrieved documents"""
     # Build context from retrieved documents
     context_parts = []
     for i, doc in enumerate(documents, 1):
@@ -238,48 +530,214 @@ Cavab verərkən:
 2. Hər faktı mənbə ilə göstərin: (PDF: fayl_adı.pdf, Səhifə: X) - səhifə nömrəsini tam ədəd (integer) olaraq yazın, məsələn "Səhifə: 11" (11.0 yox)
 3. Kontekstdə olmayan məlumat əlavə etməyin"""
 
-    try:
-        start_time = time.time()
+    return prompt
+
+
+async def generate_answer(
+    query: str,
+    documents: List[Dict],
+    temperature: float = 0.2,
+    max_tokens: int = 1000,
+    priority: int = PRIORITY_INTERACTIVE
+) -> tuple[str, float]:
+    """
+    Generate answer using best-performing configuration.
+    Model: Llama-4-Maverick-17B (open-source)
+    Prompt: citation_focused (best citation score: 73.33%)
 
+    The call is admitted by the deployment limiter (shared with OCR) and
+    retried on 429; if the quota stays exhausted the error is a 503.
+    """
+    # Retries are handled by the limiter (which backs off for everyone), not inside the SDK
+    client = get_azure_client().with_options(max_retries=0)
+    with time_stage(LLM_STAGE_SECONDS, "prompt_build"):
+        prompt = build_prompt(query, documents)
+
+    async def request():
         # Use Llama-4-Maverick (open-source, best performer)
-        response = client.chat.completions.create(
-            model="Llama-4-Maverick-17B-128E-Instruct-FP8",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        with time_stage(LLM_STAGE_SECONDS, "llm"), track_upstream("azure_llm"):
+            return await client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
 
+    try:
+        start_time = time.time()
+        response = await deployment_limiter.call(request, estimate_tokens(prompt) + max_tokens, priority, LLM_MAX_RETRIES)
         elapsed = time.time() - start_time
         answer = response.choices[0].message.content
 
         return answer, elapsed
 
+    except RateLimitError:
+        raise HTTPException(status_code=503, detail="LLM Error: model quota exhausted, please retry shortly")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM Error: {str(e)}")
 
 
+async def stream_answer(query: str, documents: List[Dict], temperature: float = 0.2, max_tokens: int = 1000) -> AsyncIterator[str]:
+    """
+    Stream answer tokens as they are generated (same model and prompt as generate_answer).
+
+    The llm stage covers the whole stream; llm_first_token the wait for the first token.
+    The limiter lease is held until the stream ends.
+    """
+    client = get_azure_client().with_options(max_retries=0)
+    with time_stage(LLM_STAGE_SECONDS, "prompt_build"):
+        prompt = build_prompt(query, documents)
+
+    start_time = time.perf_counter()
+
+    async def request():
+        nonlocal start_time
+        start_time = time.perf_counter()  # Per attempt, after any limiter wait
+        with track_upstream("azure_llm"):
+            return await client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+
+    stream, lease = await deployment_limiter.open(
+        request, estimate_tokens(prompt) + max_tokens, PRIORITY_INTERACTIVE, LLM_MAX_RETRIES
+    )
+    answer_chars = 0
+    error = None
+    try:
+        with track_upstream("azure_llm"):
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not answer_chars:
+                        LLM_STAGE_SECONDS.labels(stage="llm_first_token").observe(time.perf_counter() - start_time)
+                    answer_chars += len(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        LLM_STAGE_SECONDS.labels(stage="llm").observe(time.perf_counter() - start_time)
+        await deployment_limiter.release(lease, error, used_tokens=estimate_tokens(prompt) + answer_chars // 4)
+
+
+def sse_event(event: str, data) -> str:
+    """Format a Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def format_sources(documents: List[Dict]) -> List[Dict]:
+    """Format sources for response (validator expects pdf_name, page_number, content)"""
+    return [
+        {
+            "pdf_name": doc['pdf_name'],
+            "page_number": doc['page_number'],  # Already converted to int
+            "content": doc['content']  # The actual document text
+        }
+        for doc in documents
+    ]
+
+
+def llm_sse_response(query: str, temperature: float, max_tokens: int) -> StreamingResponse:
+    """
+    Streaming /llm response over Server-Sent Events.
+
+    Events:
+    - sources: List of {pdf_name, page_number, content}, sent as soon as retrieval finishes
+    - token:   {"text": "..."} answer fragments as the LLM generates them
+    - done:    {"response_time": float} total time for the request
+    - error:   {"message": "..."} if retrieval or generation fails
+    """
+    async def event_stream():
+        start_time = time.time()
+        try:
+            generation = answer_cache.current_generation()
+            cached, query_embedding = await lookup_cached_answer(query, temperature, max_tokens)
+            if cached is not None:
+                yield sse_event("sources", cached["sources"])
+                yield sse_event("token", {"text": cached["answer"]})
+                yield sse_event("done", {"response_time": round(time.time() - start_time, 2), "cached": True})
+                return
+
+            documents = await retrieve_documents(query, top_k=3, query_embedding=query_embedding)
+            sources = format_sources(documents)
+            yield sse_event("sources", sources)
+
+            tokens = []
+            async for token in stream_answer(query, documents, temperature, max_tokens):
+                tokens.append(token)
+                yield sse_event("token", {"text": token})
+
+            answer_cache.put(query, temperature, max_tokens, "".join(tokens), sources, query_embedding, generation)
+            yield sse_event("done", {"response_time": round(time.time() - start_time, 2)})
+        except Exception as e:
+            yield sse_event("error", {"message": f"LLM Error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "X-Accel-Buffering": "no",  # Disable nginx proxy buffering
+            "Cache-Control": "no-cache",
+        }
+    )
+
+
 @app.get("/")
 async def root(request: Request):
     """Serve the frontend web application"""
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness probe: 503 until the embedding model and clients are warmed up"""
+    status_code = 200 if readiness["ready"] else 503
+    return JSONResponse(status_code=status_code, content={
+        "status": "ready" if readiness["ready"] else "warming_up",
+        **readiness
+    })
+
+
 @app.get("/health")
 async def health():
     """Detailed health check"""
     try:
         # Check if services are initialized
-        index = get_pinecone_index()
-        stats = index.describe_index_stats()
+        store = await run_in_threadpool(get_vector_store)
+        stats = await run_in_threadpool(store.describe)
 
         return {
             "status": "healthy",
-            "pinecone": {
+            "vector_store": {
+                "backend": type(store).__name__,
                 "connected": True,
                 "total_vectors": stats.get('total_vector_count', 0)
             },
             "azure_openai": "connected",
-            "embedding_model": "loaded"
+            "embedding_model": {"name": EMBEDDING_MODEL_NAME, "backend": EMBEDDING_BACKEND},
+            "caches": {
+                "embedding": embedding_cache.stats(),
+                "answer": answer_cache.stats(),
+                "ocr": ocr_cache.stats() if ocr_cache is not None else None
+            },
+            "embedding_batcher": embedding_batcher.stats(),
+            "lexical_index": {
+                "enabled": HYBRID_SEARCH,
+                "loaded": lexical_index is not None,
+                "chunks": len(lexical_index) if lexical_index is not None else 0
+            },
+            "ocr_jobs": ocr_job_store.stats(),
+            "ocr_pages": dict(ocr_page_sources),  # Pages served per path: vlm, cache, empty, text_layer
+            "rate_limiter": deployment_limiter.stats()
         }
     except Exception as e:
         return {
@@ -295,7 +753,7 @@ async def llm_endpoint(request: Request):
 
     Uses RAG (Retrieval Augmented Generation) with:
     - Embedding: BAAI/bge-large-en-v1.5 @ 1024-dim (local model)
-    - Retrieval: Top-3 documents (Pinecone)
+    - Retrieval: Top-3 documents (Pinecone, or local store with VECTOR_DB_TYPE=local)
     - LLM: Llama-4-Maverick-17B (open-source)
     - Prompt: Citation-focused
 
@@ -308,7 +766,9 @@ async def llm_endpoint(request: Request):
     1. QuestionRequest: {"question": "...", "temperature": 0.2, "max_tokens": 1000}
     2. ChatRequest: {"messages": [{"role": "user", "content": "..."}], ...}
 
-    ALWAYS returns: {"answer": str, "sources": List[Dict]}
+    Returns {"answer": str, "sources": List[Dict]} unless the client opts in to
+    streaming with "stream": true or "Accept: text/event-stream", in which case
+    sources and answer tokens are sent as Server-Sent Events (see llm_sse_response).
     """
     try:
         # Parse request body
@@ -388,11 +848,28 @@ async def llm_endpoint(request: Request):
                 response_time=0.0
             )
 
+        # Opt-in token streaming (JSON contract unchanged for other clients)
+        wants_stream = (isinstance(body, dict) and body.get("stream") is True) \
+            or "text/event-stream" in request.headers.get("accept", "")
+        if wants_stream:
+            return llm_sse_response(query, temperature, max_tokens)
+
+        # Serve repeat (or, if enabled, near-identical) questions from the answer cache
+        lookup_start = time.time()
+        generation = answer_cache.current_generation()  # Answers from an older index are not cached
+        cached, query_embedding = await lookup_cached_answer(query, temperature, max_tokens)
+        if cached is not None:
+            return AnswerResponse(
+                answer=cached["answer"],
+                sources=cached["sources"],
+                response_time=round(time.time() - lookup_start, 2)
+            )
+
         # Retrieve relevant documents (top-3 is optimal per benchmarks)
-        documents = retrieve_documents(query, top_k=3)
+        documents = await retrieve_documents(query, top_k=3, query_embedding=query_embedding)
 
         # Generate answer
-        answer, response_time = generate_answer(
+        answer, response_time = await generate_answer(
             query=query,
             documents=documents,
             temperature=temperature,
@@ -400,14 +877,8 @@ async def llm_endpoint(request: Request):
         )
 
         # Format sources for response (validator expects pdf_name, page_number, content)
-        sources = [
-            {
-                "pdf_name": doc['pdf_name'],
-                "page_number": doc['page_number'],  # Already converted to int
-                "content": doc['content']  # The actual document text
-            }
-            for doc in documents
-        ]
+        sources = format_sources(documents)
+        answer_cache.put(query, temperature, max_tokens, answer, sources, query_embedding, generation)
 
         # Always return AnswerResponse format (validator expects 'answer' and 'sources' keys)
         return AnswerResponse(
@@ -425,148 +896,368 @@ async def llm_endpoint(request: Request):
         )
 
 
-# ============================================================================
-# OCR ENDPOINT
-# ============================================================================
+# Completions in flight across all /llm/batch requests
+LLM_BATCH_MAX_QUESTIONS = int(os.getenv("LLM_BATCH_MAX_QUESTIONS", "256"))
+LLM_BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", "8"))
+llm_batch_semaphore = asyncio.Semaphore(LLM_BATCH_CONCURRENCY)
 
-class OCRPageResponse(BaseModel):
-    page_number: int
-    MD_text: str
 
+def batch_error(message: str) -> BatchAnswer:
+    return BatchAnswer(answer="", sources=[], response_time=0.0, error=message)
 
-def process_pdf_page(pdf_bytes: bytes, page_num: int, dpi: int = 100) -> tuple[str, int]:
+
+@app.post("/llm/batch", response_model=BatchAnswerResponse)
+async def llm_batch_endpoint(batch: BatchQuestionRequest):
     """
-    Process a single PDF page for OCR (memory efficient).
+    Answer many questions in one request (evaluation runs, nightly reports).
+
+    Same RAG pipeline and answer cache as /llm, but batched end to end:
+    one embedding pass for all questions, one retrieval round (see
+    retrieve_documents_batch), then LLM completions run concurrently, at most
+    LLM_BATCH_CONCURRENCY at a time. Repeated questions are answered once.
 
-    Returns: (base64_image, num_embedded_images)
+    Request: {"questions": ["...", ...], "temperature": 0.2, "max_tokens": 1000}
+
+    Returns {"results": [...], "succeeded", "failed", "response_time"} with one
+    result per question, in input order. A failed question gets an "error"
+    message and an empty answer; the rest of the batch is unaffected.
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    page = doc[page_num - 1]  # 0-indexed
+    if not batch.questions:
+        raise HTTPException(status_code=400, detail="No questions provided")
+    if len(batch.questions) > LLM_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many questions ({len(batch.questions)}); the limit is {LLM_BATCH_MAX_QUESTIONS} per batch"
+        )
 
-    # Convert page to image
-    zoom = dpi / 72
-    mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat)
+    start_time = time.time()
+    temperature, max_tokens = batch.temperature, batch.max_tokens
+    answers: Dict[str, BatchAnswer] = {}
+    generation = answer_cache.current_generation()
+
+    # Exact cache hits need no embedding
+    pending = []
+    for question in dict.fromkeys(q for q in batch.questions if q and q.strip()):
+        cached = answer_cache.get(question, temperature, max_tokens)
+        if cached is not None:
+            answers[question] = BatchAnswer(answer=cached["answer"], sources=cached["sources"], response_time=0.0, cached=True)
+        else:
+            pending.append(question)
 
-    # Convert to PIL Image
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    try:
+        embeddings = await embed_queries(pending)
+    except Exception as e:
+        answers.update({question: batch_error(f"Embedding Error: {str(e)}") for question in pending})
+        pending, embeddings = [], []
+
+    # Near-duplicate hits (ANSWER_CACHE_SEMANTIC_THRESHOLD), then retrieval for the rest
+    misses = []
+    for question, embedding in zip(pending, embeddings):
+        cached = answer_cache.get_similar(embedding, temperature, max_tokens)
+        if cached is not None:
+            answers[question] = BatchAnswer(answer=cached["answer"], sources=cached["sources"], response_time=0.0, cached=True)
+        else:
+            misses.append((question, embedding))
+
+    try:
+        retrieved = await retrieve_documents_batch([q for q, _ in misses], [e for _, e in misses], top_k=3)
+    except Exception as e:
+        retrieved = [e] * len(misses)
 
-    # Count embedded images
-    image_list = page.get_images()
-    num_images = len(image_list)
+    async def answer_question(question: str, embedding: List[float], documents) -> BatchAnswer:
+        if isinstance(documents, Exception):
+            return batch_error(f"Retrieval Error: {str(documents)}")
+        try:
+            async with llm_batch_semaphore:
+                answer, response_time = await generate_answer(question, documents, temperature, max_tokens, PRIORITY_BULK)
+        except Exception as e:
+            return batch_error(e.detail if isinstance(e, HTTPException) else f"LLM Error: {str(e)}")
+        sources = format_sources(documents)
+        answer_cache.put(question, temperature, max_tokens, answer, sources, embedding, generation)
+        return BatchAnswer(answer=answer, sources=sources, response_time=round(response_time, 2))
+
+    generated = await asyncio.gather(*(
+        answer_question(question, embedding, documents)
+        for (question, embedding), documents in zip(misses, retrieved)
+    ))
+    answers.update(zip((question for question, _ in misses), generated))
+
+    results = [
+        answers[question] if question and question.strip() else batch_error("Empty question provided")
+        for question in batch.questions
+    ]
+    failed = sum(result.error is not None for result in results)
+    return BatchAnswerResponse(
+        results=results,
+        succeeded=len(results) - failed,
+        failed=failed,
+        response_time=round(time.time() - start_time, 2)
+    )
 
-    doc.close()
-    del pix, page, doc  # Explicit cleanup
 
-    # Convert to base64 JPEG with good quality
-    buffered = BytesIO()
-    img.save(buffered, format="JPEG", quality=85, optimize=True)
-    img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+# ============================================================================
+# OCR ENDPOINT
+# ============================================================================
 
-    del img, buffered  # Explicit cleanup
-    gc.collect()  # Force garbage collection
+class OCRPageResponse(BaseModel):
+    page_number: int
+    MD_text: str
+    source: str = "vlm"  # vlm | cache | empty | text_layer
+    origin: Optional[str] = None  # Cache hits: the path the page took when cached (vlm | empty | text_layer)
+
+
+async def open_pdf_for_ocr(pdf: Union[bytes, str, Path]) -> PDFPageRenderer:
+    """Open an uploaded PDF (bytes or file path) for OCR, enforcing the optional OCR_MAX_PAGES limit"""
+    renderer = await run_cpu_bound(PDFPageRenderer, pdf, cache=ocr_cache)
+    total_pages = renderer.page_count
+
+    # Optional page limit (configurable via env var, default: no limit)
+    max_pages = int(os.getenv("OCR_MAX_PAGES", "0"))  # 0 = unlimited
+    if max_pages > 0 and total_pages > max_pages:
+        renderer.close()
+        raise HTTPException(
+            status_code=400,
+            detail=f"PDF has {total_pages} pages. Current limit is {max_pages} pages. Please split your PDF or increase OCR_MAX_PAGES environment variable."
+        )
 
-    return img_base64, num_images
+    return renderer
 
 
-@app.post("/ocr", response_model=List[OCRPageResponse])
+@app.post("/ocr", response_model=List[OCRPageResponse], response_model_exclude_none=True)
 async def ocr_endpoint(file: UploadFile = File(...)):
     """
     OCR endpoint for PDF text extraction with image detection.
 
-    **Memory-optimized**:
-    - Processes ONE page at a time (not all pages in memory)
-    - 100 DPI for best OCR accuracy
-    - JPEG quality 85%
-    - Immediate garbage collection after each page
+    **Pipelined**:
+    - PDF is opened once; pages are rendered lazily ahead of the VLM (bounded queue)
+    - Up to OCR_CONCURRENCY VLM calls in flight, with backoff on 429s
+    - Adaptive rendering (OCR_ADAPTIVE_RENDER): blank pages and pages with a
+      usable text layer skip the VLM; others go at ~100 DPI, grayscale when
+      monochrome, JPEG quality 75-85 by content
 
     Uses VLM (Llama-4-Maverick-17B) for best accuracy:
     - Character Success Rate: 87.75%
     - Processing: ~6s per page
 
+    Born-digital pages with a reliable text layer (see classify_page) are
+    answered from the text layer in milliseconds, without a VLM call.
+
     Returns:
-        List of {page_number, MD_text} with inline image references
+        List of {page_number, MD_text, source} with inline image references, ordered
+        by page_number. source is the path the page took: vlm, cache, empty or text_layer;
+        cached pages add origin, the path they took when first OCR'd.
     """
     try:
-        # Read PDF
+        # Read PDF and open it once for the whole request
         pdf_bytes = await file.read()
         pdf_filename = file.filename or "document.pdf"
+        renderer = await open_pdf_for_ocr(pdf_bytes)
 
-        # Get page count
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        total_pages = len(doc)
-        doc.close()
-
-        # Optional page limit (configurable via env var, default: no limit)
-        max_pages = int(os.getenv("OCR_MAX_PAGES", "0"))  # 0 = unlimited
-        if max_pages > 0 and total_pages > max_pages:
-            raise HTTPException(
-                status_code=400,
-                detail=f"PDF has {total_pages} pages. Current limit is {max_pages} pages. Please split your PDF or increase OCR_MAX_PAGES environment variable."
-            )
+        # Render ahead and run VLM calls concurrently (bounded by OCR_CONCURRENCY)
+        client = get_azure_client("azure_vlm")
+        with renderer:
+            results = await ocr_document(client, renderer, pdf_filename)
 
-        # OCR system prompt
-        system_prompt = """You are an expert OCR system for historical oil & gas documents.
-
-Extract ALL text from the image with 100% accuracy. Follow these rules:
-1. Preserve EXACT spelling - including Azerbaijani, Russian, and English text
-2. Maintain original Cyrillic characters - DO NOT transliterate
-3. Keep all numbers, symbols, and special characters exactly as shown
-4. Preserve layout structure (paragraphs, line breaks)
-5. Include ALL text - headers, body, footnotes, tables, captions
-
-Output ONLY the extracted text. No explanations, no descriptions."""
-
-        # Process each page ONE AT A TIME (memory efficient)
-        results = []
-        client = get_azure_client()
-
-        for page_num in range(1, total_pages + 1):
-            # Process single page (returns base64 image and releases memory immediately)
-            image_base64, num_images = process_pdf_page(pdf_bytes, page_num, dpi=100)
-
-            # VLM OCR
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": f"Extract all text from page {page_num}:"},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}}
-                    ]
-                }
-            ]
-
-            response = client.chat.completions.create(
-                model="Llama-4-Maverick-17B-128E-Instruct-FP8",
-                messages=messages,
-                temperature=0.0,  # Deterministic OCR
-                max_tokens=4000
-            )
+        return results
 
-            page_text = response.choices[0].message.content
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"OCR Error: {str(e)}")
 
-            # Add image references if images exist on this page
-            if num_images > 0:
-                for img_idx in range(1, num_images + 1):
-                    page_text += f"\n\n![Image]({pdf_filename}/page_{page_num}/image_{img_idx})\n\n"
 
-            results.append({
-                "page_number": page_num,
-                "MD_text": page_text
-            })
+@app.post("/ocr/stream")
+async def ocr_stream_endpoint(file: UploadFile = File(...)):
+    """
+    Streaming OCR endpoint: same pipeline as /ocr, delivered incrementally.
 
-            # Force cleanup after each page
-            del image_base64, messages, response
-            gc.collect()
+    Emits NDJSON (application/x-ndjson), one {page_number, MD_text, source} object per
+    line as soon as each page finishes, so time-to-first-page is a single VLM
+    call regardless of document length. Lines arrive in completion order;
+    clients should place them by page_number. The X-Total-Pages header gives
+    the page count up front for progress reporting.
 
-        return results
+    If a page fails mid-stream, a final {"error": "..."} line is emitted.
+    """
+    try:
+        pdf_bytes = await file.read()
+        pdf_filename = file.filename or "document.pdf"
+        renderer = await open_pdf_for_ocr(pdf_bytes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"OCR Error: {str(e)}")
+
+    client = get_azure_client("azure_vlm")
+
+    async def page_stream():
+        with renderer:
+            try:
+                async for page in iter_ocr_pages(client, renderer, pdf_filename):
+                    yield json.dumps(page, ensure_ascii=False) + "\n"
+            except Exception as e:
+                yield json.dumps({"error": f"OCR Error: {str(e)}"}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        page_stream(),
+        media_type="application/x-ndjson",
+        headers={
+            "X-Total-Pages": str(renderer.page_count),
+            "X-Accel-Buffering": "no",  # Disable nginx proxy buffering
+            "Cache-Control": "no-cache",
+        }
+    )
+
+
+# Background OCR jobs (OCR_JOBS_DIR): per-page progress survives restarts
+ocr_job_store = OCRJobStore()
+
+
+async def process_ocr_job(job: Dict, pdf_path: Path, completed_pages: List[int], save_page):
+    """OCR the pages of a job that are not stored yet, saving each one as it completes"""
+    renderer = await run_cpu_bound(PDFPageRenderer, str(pdf_path), cache=ocr_cache)
+    done = set(completed_pages)
+    remaining = [page for page in range(1, renderer.page_count + 1) if page not in done]
+
+    with renderer:
+        async for page in iter_ocr_pages(get_azure_client("azure_vlm"), renderer, job["pdf_name"], pages=remaining):
+            await save_page(page["page_number"], page["MD_text"], page["source"])
+
+
+ocr_job_queue = OCRJobQueue(ocr_job_store, process_ocr_job)
+
+
+@app.post("/ocr/jobs", status_code=202)
+async def create_ocr_job(file: UploadFile = File(...)):
+    """
+    Submit a PDF for background OCR and return immediately.
+
+    Same pipeline as /ocr, but the connection is not held open: poll
+    GET /ocr/jobs/{job_id} for progress and partial results. Each page is
+    stored as soon as it is OCR'd, so a restart resumes the job from the
+    first missing page instead of starting over.
 
+    Returns:
+        {job_id, status, total_pages, status_url}
+    """
+    pdf_filename = Path(file.filename or "document.pdf").name
+    job_id = uuid.uuid4().hex
+    pdf_path = ocr_job_store.pdf_path(job_id)
+
+    try:
+        # Stream the upload to the job directory; workers open it by path
+        with open(pdf_path, "wb") as f:
+            while block := await file.read(1024 * 1024):
+                f.write(block)
+        renderer = await open_pdf_for_ocr(pdf_path)
+        total_pages = renderer.page_count
+        renderer.close()
     except HTTPException:
+        pdf_path.unlink(missing_ok=True)
         raise
     except Exception as e:
+        pdf_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=f"OCR Error: {str(e)}")
 
+    await run_in_threadpool(ocr_job_store.create, pdf_filename, total_pages, job_id)
+    ocr_job_queue.notify()
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "total_pages": total_pages,
+        "status_url": f"/ocr/jobs/{job_id}"
+    }
+
+
+@app.get("/ocr/jobs/{job_id}")
+async def get_ocr_job(job_id: str, include_pages: bool = True):
+    """
+    Status and results of an OCR job.
+
+    Returns {job_id, pdf_name, status, total_pages, completed_pages, error,
+    created_at, updated_at, pages}. status is queued, running, complete or
+    error; pages holds every page finished so far as {page_number, MD_text, source},
+    ordered by page_number. Pass include_pages=false to poll progress only.
+    """
+    job = await run_in_threadpool(ocr_job_store.get, job_id, include_pages)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"OCR job not found: {job_id}")
+    return job
+
+
+# ============================================================================
+# INGEST ENDPOINT
+# ============================================================================
+
+INGEST_API_ENABLED = os.getenv("INGEST_API_ENABLED", "false").lower() == "true"
+_ingest_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()  # Per file name
+
+
+async def publish_index_change(store: VectorStore):
+    """Persist the local store, rebuild the lexical index and drop answers cached from the old contents"""
+    if isinstance(store, LocalVectorStore):
+        await run_in_threadpool(store.save)
+    if HYBRID_SEARCH:
+        await run_in_threadpool(lambda: build_lexical_index(store.iter_records()))
+    index_generation.bump()  # Also makes every process reload the lexical index
+
+
+@app.post("/ingest")
+async def ingest_endpoint(file: UploadFile = File(...)):
+    """
+    Add a PDF to the knowledge base (disabled unless INGEST_API_ENABLED=true).
+
+    Uses the same library as scripts/ingest_hackathon_data.py (app/ingestion.py):
+    VLM OCR, page-aware chunking (600 chars, 100 overlap), embedding with the
+    API's embedding model, and upsert into the configured vector store.
+    Re-uploading a PDF with the same file name replaces its chunks: chunks
+    the new version no longer has are deleted. Uploads of the same file name
+    run one at a time. If ingestion fails after some chunks were written
+    (overwriting part of the previous version), the document is removed
+    from the index rather than left half old, half new.
+
+    Returns:
+        {pdf_name, status, num_pages, num_vectors, vector_ids, time_total}
+    """
+    if not INGEST_API_ENABLED:
+        raise HTTPException(status_code=403, detail="Ingestion via the API is disabled (set INGEST_API_ENABLED=true)")
+
+    pdf_filename = Path(file.filename or "document.pdf").name
+    lock = _ingest_locks.setdefault(pdf_filename, asyncio.Lock())
+
+    async with lock:
+        store = await run_in_threadpool(get_vector_store)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Stream the upload to disk; the PDF is then read page by page
+            pdf_path = Path(tmp_dir) / pdf_filename
+            with open(pdf_path, "wb") as f:
+                while block := await file.read(1024 * 1024):
+                    f.write(block)
+
+            # Render in the shared CPU pool: no process pool per upload, and
+            # uploads can't oversubscribe the CPU the query path runs on
+            result = await ingest_pdf(
+                str(pdf_path), get_azure_client("azure_vlm"), store, encode_batch,
+                workers=CPU_WORKERS, executor=cpu_executor
+            )
+
+        if result["status"] != "success":
+            detail = f"Ingestion Error: {result.get('error', 'Unknown error')}"
+            if result["vector_ids"]:
+                # Some chunks overwrote the previous version's: remove the document instead of serving a mix
+                previous_ids = await run_in_threadpool(stored_chunk_ids, store, pdf_filename)
+                await run_in_threadpool(store.delete, sorted(set(previous_ids) | set(result["vector_ids"])))
+                await publish_index_change(store)
+                detail += f" ({pdf_filename} was removed from the index; upload it again)"
+            raise HTTPException(status_code=500, detail=detail)
+
+        # Chunks of an earlier, longer version follow the new ones
+        stale_ids = await run_in_threadpool(stored_chunk_ids, store, pdf_filename, result["num_vectors"])
+        if stale_ids:
+            await run_in_threadpool(store.delete, stale_ids)
+        await publish_index_change(store)
+        return result
 
 if __name__ == "__main__":
     import uvicorn
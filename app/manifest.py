@@ -0,0 +1,133 @@
+"""
+Ingestion manifest: what is in the vector index, per source PDF.
+
+One SQLite row per PDF records its content hash, status, chunk count and
+the vector IDs it produced. Ingestion consults it to skip unchanged files,
+re-ingest modified ones, delete vectors of changed/removed PDFs, and resume
+after a crash (files left "in_progress" are simply re-ingested).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_MANIFEST_PATH = Path(__file__).resolve().parent.parent / "data" / "ingestion_manifest.sqlite"
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_COMPLETE = "complete"
+STATUS_ERROR = "error"
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """
+    Per-PDF ingestion state, keyed by file name.
+
+    Defaults to data/ingestion_manifest.sqlite (override with
+    INGESTION_MANIFEST_PATH). Every write is committed immediately, so the
+    manifest is consistent up to the last finished file after a crash.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or os.getenv("INGESTION_MANIFEST_PATH") or DEFAULT_MANIFEST_PATH)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pdfs ("
+            "pdf_name TEXT PRIMARY KEY, content_hash TEXT NOT NULL, status TEXT NOT NULL, "
+            "num_chunks INTEGER NOT NULL DEFAULT 0, vector_ids TEXT NOT NULL DEFAULT '[]', "
+            "error TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, pdf_name: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pdf_name, content_hash, status, num_chunks, vector_ids, error, updated_at "
+                "FROM pdfs WHERE pdf_name = ?", (pdf_name,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT pdf_name, content_hash, status, num_chunks, vector_ids, error, updated_at "
+                "FROM pdfs ORDER BY pdf_name"
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict:
+        pdf_name, content_hash, status, num_chunks, vector_ids, error, updated_at = row
+        return {
+            "pdf_name": pdf_name,
+            "content_hash": content_hash,
+            "status": status,
+            "num_chunks": num_chunks,
+            "vector_ids": json.loads(vector_ids),
+            "error": error,
+            "updated_at": updated_at,
+        }
+
+    def is_current(self, pdf_name: str, content_hash: str) -> bool:
+        """True if this exact file content was fully ingested"""
+        entry = self.get(pdf_name)
+        return entry is not None and entry["status"] == STATUS_COMPLETE and entry["content_hash"] == content_hash
+
+    def mark_started(self, pdf_name: str, content_hash: str):
+        """Record an ingestion attempt; previously recorded vector IDs are kept for cleanup"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pdfs (pdf_name, content_hash, status, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(pdf_name) DO UPDATE SET content_hash = excluded.content_hash, "
+                "status = excluded.status, error = NULL, updated_at = excluded.updated_at",
+                (pdf_name, content_hash, STATUS_IN_PROGRESS, time.time())
+            )
+            self._conn.commit()
+
+    def mark_complete(self, pdf_name: str, content_hash: str, vector_ids: List[str]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdfs (pdf_name, content_hash, status, num_chunks, vector_ids, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, NULL, ?)",
+                (pdf_name, content_hash, STATUS_COMPLETE, len(vector_ids), json.dumps(vector_ids), time.time())
+            )
+            self._conn.commit()
+
+    def mark_error(self, pdf_name: str, error: str, vector_ids: Optional[List[str]] = None):
+        """Record a failure; vector_ids written before it are added for later cleanup"""
+        entry = self.get(pdf_name)
+        known_ids = sorted(set(entry["vector_ids"] if entry else []) | set(vector_ids or []))
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pdfs SET status = ?, error = ?, vector_ids = ?, updated_at = ? WHERE pdf_name = ?",
+                (STATUS_ERROR, error, json.dumps(known_ids), time.time(), pdf_name)
+            )
+            self._conn.commit()
+
+    def remove(self, pdf_name: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM pdfs WHERE pdf_name = ?", (pdf_name,))
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*), COALESCE(SUM(num_chunks), 0) FROM pdfs GROUP BY status"
+            ).fetchall()
+        return {status: {"pdfs": count, "chunks": chunks} for status, count, chunks in rows}
@@ -0,0 +1,204 @@
+"""
+Prometheus metrics for the /llm and /ocr pipelines.
+
+prometheus-fastapi-instrumentator (instrument_app) covers the HTTP layer:
+request counts, latency and in-progress requests per handler, served at
+/metrics. The metrics here break a request down by stage, so p99 can be
+attributed to embedding, retrieval, the LLM or the VLM:
+
+    rag_llm_stage_seconds{stage}     embed | vector_query | lexical_query | prompt_build | llm | llm_first_token
+    rag_ocr_stage_seconds{stage}     render | encode (per page) | vlm (per VLM call)
+    rag_ocr_pages_total{source}      vlm | cache | empty | text_layer
+    rag_upstream_in_flight{upstream} azure_llm | azure_vlm | vector_store
+    rag_upstream_errors_total{upstream, kind}
+                                     kind: rate_limited | timeout | connection | http_4xx | http_5xx | other
+    rag_cache_hits_total / rag_cache_misses_total / rag_cache_hit_ratio {cache}
+                                     read from the caches' stats() at scrape time
+    rag_http_pool_requests / rag_http_pool_max_connections / rag_http_pool_connections{state} {upstream}
+                                     connection pools of app/clients.py; requests near max_connections
+                                     (HTTP/1.1) mean the pool, not the upstream, caps parallelism
+    rag_http_connection_wait_seconds{upstream}, rag_http_connections_opened_total{upstream}
+    rag_ratelimit_concurrency_limit, rag_ratelimit_in_flight{priority}, rag_ratelimit_wait_seconds{priority},
+    rag_ratelimit_throttled_total    the deployment limiter of app/ratelimit.py
+
+prometheus_client is optional: without it every metric is a no-op.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+import httpx
+from openai import APIConnectionError, APITimeoutError
+
+try:
+    from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # Metrics are optional
+    REGISTRY = Counter = Gauge = Histogram = None
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Sub-millisecond prompt building up to minute-long VLM pages
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+class _NoopMetric:
+    """Stand-in for a metric when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _metric(metric_type, name: str, documentation: str, labelnames, **kwargs):
+    if metric_type is None:
+        return _NoopMetric()
+    return metric_type(name, documentation, labelnames, **kwargs)
+
+
+LLM_STAGE_SECONDS = _metric(Histogram, "rag_llm_stage_seconds", "Time per /llm pipeline stage", ["stage"], buckets=STAGE_BUCKETS)
+OCR_STAGE_SECONDS = _metric(Histogram, "rag_ocr_stage_seconds", "Time per OCR pipeline stage", ["stage"], buckets=STAGE_BUCKETS)
+OCR_PAGES = _metric(Counter, "rag_ocr_pages_total", "OCR pages served, by path", ["source"])
+UPSTREAM_IN_FLIGHT = _metric(Gauge, "rag_upstream_in_flight", "Upstream calls currently in flight", ["upstream"])
+UPSTREAM_ERRORS = _metric(Counter, "rag_upstream_errors_total", "Failed upstream calls, by kind", ["upstream", "kind"])
+POOL_REQUESTS = _metric(Gauge, "rag_http_pool_requests", "HTTP requests holding or waiting for a pooled connection", ["upstream"])
+CONNECTION_WAIT_SECONDS = _metric(
+    Histogram, "rag_http_connection_wait_seconds", "Time until request headers are sent: pool wait plus any TCP/TLS connect",
+    ["upstream"], buckets=STAGE_BUCKETS
+)
+CONNECTIONS_OPENED = _metric(Counter, "rag_http_connections_opened_total", "New upstream connections (keep-alive misses)", ["upstream"])
+RATE_LIMIT_CONCURRENCY = _metric(Gauge, "rag_ratelimit_concurrency_limit", "Current AIMD concurrency limit for the deployment", [])
+RATE_LIMIT_IN_FLIGHT = _metric(Gauge, "rag_ratelimit_in_flight", "Deployment calls admitted by the limiter", ["priority"])
+RATE_LIMIT_WAIT_SECONDS = _metric(
+    Histogram, "rag_ratelimit_wait_seconds", "Time queued in the limiter before a call starts", ["priority"], buckets=STAGE_BUCKETS
+)
+RATE_LIMIT_THROTTLED = _metric(Counter, "rag_ratelimit_throttled_total", "429 responses seen by the limiter", [])
+
+
+@contextmanager
+def time_stage(histogram, stage: str):
+    """Observe the duration of the with-block (also when it raises) under `stage`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def error_kind(error: BaseException) -> str:
+    """Classify an upstream exception for the errors counter"""
+    if isinstance(error, (APITimeoutError, httpx.TimeoutException, TimeoutError)):
+        return "timeout"
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)  # openai / pinecone
+    if status == 429:
+        return "rate_limited"
+    if isinstance(status, int):
+        return f"http_{status // 100}xx"
+    if isinstance(error, (APIConnectionError, httpx.TransportError, ConnectionError)):
+        return "connection"
+    return "other"
+
+
+@contextmanager
+def track_upstream(upstream: str):
+    """Count the with-block as an in-flight call to `upstream` and record its failure, if any"""
+    UPSTREAM_IN_FLIGHT.labels(upstream=upstream).inc()
+    try:
+        yield
+    except Exception as e:
+        UPSTREAM_ERRORS.labels(upstream=upstream, kind=error_kind(e)).inc()
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.labels(upstream=upstream).dec()
+
+
+_caches: Dict[str, object] = {}
+
+
+def register_cache(name: str, cache):
+    """Export hits, misses and hit ratio of a cache with a stats() method"""
+    if cache is not None:
+        _caches[name] = cache
+
+
+class _CacheCollector:
+    """Reads cache counters at scrape time instead of mirroring every lookup"""
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        hits = CounterMetricFamily("rag_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("rag_cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("rag_cache_hit_ratio", "Cache hits / lookups since start", labels=["cache"])
+        for name, cache in list(_caches.items()):
+            stats = cache.stats()
+            hits.add_metric([name], stats.get("hits", 0))
+            misses.add_metric([name], stats.get("misses", 0))
+            ratio.add_metric([name], stats.get("hit_ratio", 0.0))
+        yield hits
+        yield misses
+        yield ratio
+
+
+_pools: Dict[str, tuple] = {}
+
+
+def register_pool(upstream: str, max_connections: int, connections=None):
+    """Export the size of an upstream's connection pool; `connections` returns its httpcore connections"""
+    _pools[upstream] = (max_connections, connections)
+
+
+class _PoolCollector:
+    """Connection pool size and state, read at scrape time"""
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        limit = GaugeMetricFamily("rag_http_pool_max_connections", "Connection pool size", labels=["upstream"])
+        state = GaugeMetricFamily("rag_http_pool_connections", "Open pooled connections", labels=["upstream", "state"])
+        for upstream, (max_connections, connections) in list(_pools.items()):
+            limit.add_metric([upstream], max_connections)
+            if connections is not None:
+                open_connections = list(connections())
+                idle = sum(connection.is_idle() for connection in open_connections)
+                state.add_metric([upstream, "idle"], idle)
+                state.add_metric([upstream, "active"], len(open_connections) - idle)
+        yield limit
+        yield state
+
+
+if REGISTRY is not None:
+    REGISTRY.register(_CacheCollector())
+    REGISTRY.register(_PoolCollector())
+
+
+def instrument_app(app):
+    """Add HTTP metrics middleware and the /metrics endpoint (METRICS_ENABLED)"""
+    if not METRICS_ENABLED:
+        return
+    try:
+        from prometheus_fastapi_instrumentator import Instrumentator
+    except ImportError:
+        print("⚠️  prometheus-fastapi-instrumentator not installed, /metrics disabled")
+        return
+
+    Instrumentator(
+        should_instrument_requests_inprogress=True,
+        inprogress_labels=True,
+        excluded_handlers=["/metrics", "/static.*"]
+    ).instrument(app).expose(app, include_in_schema=False)
@@ -0,0 +1,545 @@
+"""
+OCR pipeline for PDF text extraction with a Vision-Language Model.
+
+Pages are rendered ahead by a producer stage into a bounded queue and
+OCR'd by a pool of workers, so the number of VLM calls in flight is set by
+OCR_CONCURRENCY (i.e. by the Azure quota) instead of by page count.
+VLM calls share the deployment's quota with /llm through app/ratelimit.py;
+rate-limited calls (HTTP 429) are retried per page after the limiter's backoff.
+Page text is cached on disk by rendered-page content (see OCRCache), so
+re-uploaded pages skip the VLM.
+
+Born-digital pages skip the VLM: classify_page() checks the text layer and
+its glyph coverage, and pages with a reliable one return its Markdown in
+milliseconds. Each result reports the path it took in "source".
+
+Rendering adapts to each page (OCR_ADAPTIVE_RENDER): blank pages skip the
+VLM, monochrome pages are sent as grayscale, and DPI and JPEG quality
+follow the content.
+"""
+
+import os
+import base64
+import asyncio
+import hashlib
+import threading
+from io import BytesIO
+from collections import Counter
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from app.cache import OCRCache
+from app.executors import run_cpu_bound
+from app.metrics import OCR_PAGES, OCR_STAGE_SECONDS, time_stage, track_upstream
+from app.ratelimit import PRIORITY_BULK, deployment_limiter, estimate_tokens
+
+OCR_MODEL = "Llama-4-Maverick-17B-128E-Instruct-FP8"
+OCR_DPI = 100
+OCR_JPEG_QUALITY = 85
+
+# Adaptive rendering (OCR_ADAPTIVE_RENDER=false renders every page at OCR_DPI, RGB, quality 85)
+# and the text-layer fast path (OCR_NATIVE_TEXT)
+OCR_ADAPTIVE_RENDER = os.getenv("OCR_ADAPTIVE_RENDER", "true").lower() == "true"
+OCR_NATIVE_TEXT = os.getenv("OCR_NATIVE_TEXT", "true").lower() == "true"
+OCR_TEXT_LAYER_MIN_COVERAGE = float(os.getenv("OCR_TEXT_LAYER_MIN_COVERAGE", "0.5"))  # See classify_page()
+TEXT_LAYER_MIN_CHARS = 16  # Fewer visible characters: a stray header on a scan, not a text layer
+TEXT_LAYER_MAX_BAD_CHARS = 0.01  # Share of undecodable characters (fonts without a Unicode mapping)
+OCR_MAX_DPI = 150  # Ceiling when small print needs more pixels
+OCR_MIN_DPI = 72  # Floor when oversized pages are scaled down
+OCR_MAX_IMAGE_SIDE = int(os.getenv("OCR_MAX_IMAGE_SIDE", "1600"))  # Pixels; larger pages get a lower DPI
+OCR_TEXT_JPEG_QUALITY = 75  # Ink-on-paper pages; photos keep OCR_JPEG_QUALITY
+ANALYSIS_DPI = 25  # Effective resolution at which colour and midtones are sampled
+EMPTY_PAGE_INK = 0.0003  # Below this share of dark pixels a page without text is blank (a few specks of dust)
+
+# Pipeline tuning (configurable via env vars)
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "4"))
+OCR_MAX_RETRIES = int(os.getenv("OCR_MAX_RETRIES", "5"))
+OCR_MAX_TOKENS = 4000
+OCR_IMAGE_TOKENS = 765  # Vision tokens of a ~100 DPI page (4 tiles), for the limiter's TPM estimate
+
+# OCR system prompt
+OCR_SYSTEM_PROMPT = """You are an expert OCR system for historical oil & gas documents.
+
+Extract ALL text from the image with 100% accuracy. Follow these rules:
+1. Preserve EXACT spelling - including Azerbaijani, Russian, and English text
+2. Maintain original Cyrillic characters - DO NOT transliterate
+3. Keep all numbers, symbols, and special characters exactly as shown
+4. Preserve layout structure (paragraphs, line breaks)
+5. Include ALL text - headers, body, footnotes, tables, captions
+
+Output ONLY the extracted text. No explanations, no descriptions."""
+
+# Cache keys change whenever the model or prompt changes
+OCR_PROMPT_VERSION = hashlib.sha256(OCR_SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+# On-disk OCR cache (OCR_CACHE_MAX_MB=0 disables it)
+OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "512"))
+ocr_cache: Optional[OCRCache] = None
+if OCR_CACHE_MAX_MB > 0:
+    try:
+        ocr_cache = OCRCache(os.getenv("OCR_CACHE_DIR") or None, max_bytes=OCR_CACHE_MAX_MB * 1024 * 1024)
+    except OSError as e:
+        print(f"⚠️  OCR cache disabled: {e}")
+
+
+class RenderSettings(NamedTuple):
+    dpi: int
+    grayscale: bool
+    jpeg_quality: int
+
+
+class RenderedPage(NamedTuple):
+    page_number: int
+    image_base64: str
+    num_images: int
+    cache_key: str = ""
+    cached_text: Optional[str] = None  # Set when no VLM call is needed (image_base64 is then empty)
+    source: str = "vlm"  # vlm | cache | empty | text_layer
+    settings: Optional[RenderSettings] = None
+
+
+# Pages served per source since startup (reported by /health)
+ocr_page_sources: Counter = Counter()
+
+
+class PageClassification(NamedTuple):
+    source: str  # text_layer | vlm
+    reason: str  # text_layer | no_text_layer | invisible_text | garbled | mixed
+    visible_chars: int
+    glyph_coverage: float
+
+
+def _is_bad_char(char: str) -> bool:
+    code = ord(char)
+    return code == 0xFFFD or 0xE000 <= code <= 0xF8FF or (code < 32 and char not in "\t\n\r")
+
+
+def classify_page(page: "fitz.Page") -> PageClassification:
+    """
+    Decide whether a page's text layer can replace VLM OCR.
+
+    Only visible glyphs count: OCR layers hidden behind scans (render mode 3)
+    and fully transparent text are ignored. glyph_coverage is the area of
+    visible glyphs divided by that area plus the area of raster images, i.e.
+    the share of the page's visible content that is real text. The text
+    layer is used when it has enough visible, decodable characters and
+    glyph_coverage >= OCR_TEXT_LAYER_MIN_COVERAGE; scans, pages dominated by
+    figures, and broken font encodings go to the VLM.
+    """
+    visible, hidden, bad = 0, 0, 0
+    glyph_area = 0.0
+    for span in page.get_texttrace():
+        chars = [chr(char[0]) if char[0] >= 0 else "\ufffd" for char in span["chars"]]
+        chars = [char for char in chars if not char.isspace()]
+        if span["type"] == 3 or span["opacity"] == 0:
+            hidden += len(chars)
+            continue
+        visible += len(chars)
+        bad += sum(_is_bad_char(char) for char in chars)
+        x0, y0, x1, y1 = span["bbox"]
+        glyph_area += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+
+    page_area = abs(page.rect) or 1.0
+    image_area = 0.0
+    for image in page.get_image_info():
+        clipped = fitz.Rect(image["bbox"]) & page.rect
+        image_area += abs(clipped)
+    image_area = min(image_area, page_area)
+    glyph_coverage = glyph_area / (glyph_area + image_area) if glyph_area else 0.0
+
+    if visible < TEXT_LAYER_MIN_CHARS:
+        reason = "invisible_text" if hidden >= TEXT_LAYER_MIN_CHARS else "no_text_layer"
+        return PageClassification("vlm", reason, visible, round(glyph_coverage, 3))
+    if bad > visible * TEXT_LAYER_MAX_BAD_CHARS:
+        return PageClassification("vlm", "garbled", visible, round(glyph_coverage, 3))
+    if glyph_coverage < OCR_TEXT_LAYER_MIN_COVERAGE:
+        return PageClassification("vlm", "mixed", visible, round(glyph_coverage, 3))
+    return PageClassification("text_layer", "text_layer", visible, round(glyph_coverage, 3))
+
+
+def text_layer_markdown(page: "fitz.Page") -> str:
+    """
+    Markdown from a page's text layer: one paragraph per text block, in
+    reading order; short blocks set clearly larger than the body text
+    become "##" headings.
+    """
+    blocks = [
+        block for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT, sort=True)["blocks"]
+        if block.get("type") == 0
+    ]
+    sizes = [span["size"] for block in blocks for line in block["lines"] for span in line["spans"] if span["text"].strip()]
+    body_size = float(np.median(sizes)) if sizes else 0.0
+
+    paragraphs = []
+    for block in blocks:
+        lines = ["".join(span["text"] for span in line["spans"]).strip() for line in block["lines"]]
+        lines = [line for line in lines if line]
+        if not lines:
+            continue
+        block_size = max(span["size"] for line in block["lines"] for span in line["spans"])
+        text = "\n".join(lines)
+        if body_size and block_size >= body_size * 1.25 and len(text) < 200:
+            text = "## " + " ".join(lines)
+        paragraphs.append(text)
+    return "\n\n".join(paragraphs)
+
+
+def analyze_pixels(pix: "fitz.Pixmap", step: int = 1) -> Dict[str, float]:
+    """
+    Content statistics of an RGB render.
+
+    ink: share of dark pixels away from the page edges (scanner borders),
+         at full resolution so a single faint line still counts
+    midtones: share of pixels that are neither paper nor ink (photos, halftones)
+    chroma: 99th percentile colour deviation from the page's overall tint,
+            so yellowed paper still counts as monochrome
+
+    midtones and chroma are sampled every `step` pixels.
+    """
+    pixels = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    margin_y, margin_x = max(1, pix.height // 20), max(1, pix.width // 20)
+    interior = pixels[margin_y:-margin_y, margin_x:-margin_x, 1]  # Green is a good enough luminance proxy
+
+    sample = pixels[::step, ::step, :3].reshape(-1, 3).astype(np.int16)
+    green = sample[:, 1]
+    tint = np.stack([sample[:, 0] - green, green - sample[:, 2]], axis=1)
+    deviation = np.abs(tint - np.median(tint, axis=0)).max(axis=1)
+
+    return {
+        "ink": float(np.count_nonzero(interior < 160) / interior.size) if interior.size else 0.0,
+        "midtones": float(np.count_nonzero((green >= 64) & (green < 192)) / len(green)),
+        "chroma": float(np.percentile(deviation, 99)),
+    }
+
+
+class PDFPageRenderer:
+    """
+    Render the pages of one PDF for OCR.
+
+    Holds a single open fitz.Document for the whole request, so parsing cost
+    is paid once instead of once per page. Pages are rendered lazily by
+    iter_pages(); each page's pixmap and JPEG buffer go out of scope before
+    the next page is rendered, keeping peak memory flat without forced GC.
+
+    Rendering and close() are serialized by a lock: a render still running in
+    the CPU executor when a request is cancelled finishes before the document
+    is closed underneath it.
+
+    With an OCRCache, each rendered page is looked up by content hash and
+    render settings (DPI, grayscale, JPEG quality) before JPEG encoding; hits
+    carry the cached text instead of an image.
+
+    `pdf` is either the PDF bytes or a file path; a path is opened in place,
+    so large archives are never read into memory as a whole.
+    """
+
+    def __init__(
+        self,
+        pdf: Union[bytes, str, Path],
+        dpi: int = OCR_DPI,
+        cache: Optional[OCRCache] = None,
+        adaptive: bool = OCR_ADAPTIVE_RENDER,
+        native_text: bool = OCR_NATIVE_TEXT
+    ):
+        self.dpi = dpi
+        self.matrix = fitz.Matrix(dpi / 72, dpi / 72)
+        self.adaptive = adaptive
+        self.native_text = native_text
+        self.cache = cache
+        self.cache_params = f"{dpi}|{OCR_MODEL}|{OCR_PROMPT_VERSION}".encode("utf-8")
+        self.document_key = self._document_key(pdf) if cache else ""
+        if isinstance(pdf, bytes):
+            self.doc = fitz.open(stream=pdf, filetype="pdf")
+        else:
+            self.doc = fitz.open(str(pdf), filetype="pdf")
+        self._lock = threading.Lock()
+
+    def _document_key(self, pdf: Union[bytes, str, Path]) -> str:
+        # Page paths (text layer, blank skip) and encode settings depend on the render mode
+        mode = f"|adaptive={int(self.adaptive)}|native_text={int(self.native_text)}|".encode("utf-8")
+        digest = hashlib.blake2b(b"doc|" + self.cache_params + mode, digest_size=20)
+        if isinstance(pdf, bytes):
+            digest.update(pdf)
+        else:
+            with open(pdf, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    @property
+    def page_count(self) -> int:
+        return len(self.doc)
+
+    def _text_key(self, source: str, text: str) -> str:
+        """Cache key for text produced without the VLM, so document cache entries stay complete"""
+        digest = hashlib.blake2b(self.cache_params + f"|{source}|".encode("utf-8"), digest_size=20)
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _native_text(self, page: "fitz.Page") -> Optional[str]:
+        """Markdown from the text layer if classify_page() trusts it, else None"""
+        if not self.native_text or classify_page(page).source != "text_layer":
+            return None
+        return text_layer_markdown(page)
+
+    def choose_dpi(self, page: "fitz.Page") -> int:
+        """
+        Small print (median text-layer font under 9pt) gets up to OCR_MAX_DPI;
+        pages whose long side would exceed OCR_MAX_IMAGE_SIDE pixels get a lower DPI.
+        """
+        dpi = self.dpi
+        sizes = [
+            span["size"]
+            for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"] if block.get("type") == 0
+            for line in block["lines"] for span in line["spans"] if span["text"].strip()
+        ]
+        if sizes:
+            median_size = float(np.median(sizes))
+            if 0 < median_size < 9:
+                dpi = min(OCR_MAX_DPI, round(self.dpi * 9 / median_size))
+
+        long_side = max(page.rect.width, page.rect.height) / 72  # Inches
+        if long_side * dpi > OCR_MAX_IMAGE_SIDE:
+            dpi = max(OCR_MIN_DPI, int(OCR_MAX_IMAGE_SIDE / long_side))
+        return dpi
+
+    def render_page(self, page_num: int) -> RenderedPage:
+        """
+        Render a page (1-indexed) to a base64 JPEG and count its embedded images.
+
+        Pages that need no VLM call come back with cached_text set and source
+        "text_layer" (OCR_NATIVE_TEXT) or "empty" (adaptive only). Otherwise the
+        render is sampled once to pick grayscale (monochrome pages) and JPEG
+        quality (ink-on-paper pages, with few midtones, compress harder).
+        """
+        with self._lock, time_stage(OCR_STAGE_SECONDS, "render"):
+            if self.doc.is_closed:
+                raise ValueError("PDF document is closed")
+            page = self.doc[page_num - 1]  # 0-indexed
+            num_images = len(page.get_images())
+
+            native = self._native_text(page)
+            if native is not None:
+                return RenderedPage(page_num, "", num_images, self._text_key("text_layer", native), native, "text_layer")
+
+            dpi = self.choose_dpi(page) if self.adaptive else self.dpi
+
+            pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72))
+
+            if self.adaptive:
+                stats = analyze_pixels(pix, step=max(1, round(dpi / ANALYSIS_DPI)))
+                if stats["ink"] < EMPTY_PAGE_INK and not page.get_text("text").strip():
+                    return RenderedPage(page_num, "", num_images, self._text_key("empty", ""), "", "empty")
+                settings = RenderSettings(
+                    dpi=dpi,
+                    grayscale=stats["chroma"] < 24,
+                    jpeg_quality=OCR_TEXT_JPEG_QUALITY if stats["midtones"] < 0.2 else OCR_JPEG_QUALITY
+                )
+            else:
+                settings = RenderSettings(dpi, False, OCR_JPEG_QUALITY)
+
+            cache_key = ""
+            if self.cache is not None:
+                digest = hashlib.blake2b(self.cache_params, digest_size=20)
+                digest.update(f"|{pix.width}x{pix.height}|{settings.dpi}|{int(settings.grayscale)}|{settings.jpeg_quality}|".encode("utf-8"))
+                digest.update(pix.samples_mv)
+                cache_key = digest.hexdigest()
+                cached_text = self.cache.get_page(cache_key)
+                if cached_text is not None:
+                    return RenderedPage(page_num, "", num_images, cache_key, cached_text, "cache", settings)
+
+        with time_stage(OCR_STAGE_SECONDS, "encode"):
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            if settings.grayscale:
+                img = img.convert("L")
+            buffered = BytesIO()
+            img.save(buffered, format="JPEG", quality=settings.jpeg_quality, optimize=True)
+            img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+        return RenderedPage(page_num, img_base64, num_images, cache_key, settings=settings)
+
+    def iter_pages(self, pages: Optional[Sequence[int]] = None) -> Iterator[RenderedPage]:
+        """Yield rendered pages (all, or the given 1-indexed page numbers) in order, one at a time"""
+        for page_num in (pages if pages is not None else range(1, self.page_count + 1)):
+            yield self.render_page(page_num)
+
+    def close(self):
+        with self._lock:
+            self.doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def ocr_page(client, image_base64: str, page_num: int) -> str:
+    """
+    Run VLM OCR on one rendered page.
+
+    The call goes through the shared deployment limiter at bulk priority, so
+    OCR uses the quota /llm leaves free. Rate-limited calls (429) and transient
+    errors are retried up to OCR_MAX_RETRIES times so a burst of concurrent pages degrades to
+    slower throughput instead of a failed request.
+    """
+    messages = [
+        {"role": "system", "content": OCR_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": f"Extract all text from page {page_num}:"},
+                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}}
+            ]
+        }
+    ]
+
+    # Retries are handled by the limiter (which backs off for everyone), not inside the SDK
+    client = client.with_options(max_retries=0)
+
+    async def request():
+        # One vlm observation per call; every failed call, 429s too, is counted
+        with time_stage(OCR_STAGE_SECONDS, "vlm"), track_upstream("azure_vlm"):
+            return await client.chat.completions.create(
+                model=OCR_MODEL,
+                messages=messages,
+                temperature=0.0,  # Deterministic OCR
+                max_tokens=OCR_MAX_TOKENS
+            )
+
+    tokens = estimate_tokens(OCR_SYSTEM_PROMPT) + OCR_IMAGE_TOKENS + OCR_MAX_TOKENS
+    response = await deployment_limiter.call(request, tokens, PRIORITY_BULK, OCR_MAX_RETRIES)
+    return response.choices[0].message.content or ""
+
+
+def add_image_references(page_text: str, pdf_filename: str, page_num: int, num_images: int) -> str:
+    """Append Markdown references for images embedded in the page"""
+    for img_idx in range(1, num_images + 1):
+        page_text += f"\n\n![Image]({pdf_filename}/page_{page_num}/image_{img_idx})\n\n"
+    return page_text
+
+
+async def iter_ocr_pages(
+    client,
+    renderer: PDFPageRenderer,
+    pdf_filename: str,
+    concurrency: int = OCR_CONCURRENCY,
+    pages: Optional[Sequence[int]] = None
+) -> AsyncIterator[Dict]:
+    """
+    OCR a PDF, yielding {page_number, MD_text, source} as each page completes.
+    source is the path the page took: vlm, cache, empty or text_layer. Cache
+    hits also carry origin, the path the page took when it was cached.
+    Pass `pages` (1-indexed page numbers) to OCR only those pages.
+
+    Pages come back in completion order, not page order. A producer renders
+    pages into a queue holding at most `concurrency` images, so rendering
+    stays just ahead of the VLM workers without buffering the whole document.
+
+    With an OCR cache on the renderer, an identical re-upload is answered
+    from the document entry without rendering; otherwise only pages whose
+    rendering changed go to the VLM.
+    """
+    pages = sorted(set(pages)) if pages is not None else None
+    total_pages = renderer.page_count if pages is None else len(pages)
+    cache = renderer.cache
+    if total_pages == 0:
+        return
+
+    if cache is not None:
+        cached_pages = await asyncio.to_thread(cache.get_document, renderer.document_key)
+        if cached_pages is not None:
+            for page in cached_pages:
+                if pages is not None and page["page_number"] not in pages:
+                    continue
+                ocr_page_sources["cache"] += 1
+                OCR_PAGES.labels(source="cache").inc()
+                result = {
+                    "page_number": page["page_number"],
+                    "MD_text": add_image_references(page["text"], pdf_filename, page["page_number"], page["num_images"]),
+                    "source": "cache"
+                }
+                if page["source"]:  # Unknown for documents cached before origins were recorded
+                    result["origin"] = page["source"]
+                yield result
+            return
+
+    concurrency = max(1, min(concurrency, total_pages))
+    render_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    result_queue: asyncio.Queue = asyncio.Queue()
+
+    async def producer():
+        try:
+            rendered_pages = renderer.iter_pages(pages)
+            while (rendered := await run_cpu_bound(next, rendered_pages, None)) is not None:
+                await render_queue.put(rendered)
+            for _ in range(concurrency):
+                await render_queue.put(None)  # One stop signal per worker
+        except Exception as e:
+            await result_queue.put(e)
+
+    async def worker():
+        try:
+            while True:
+                item = await render_queue.get()
+                if item is None:
+                    return
+                if item.cached_text is not None:
+                    page_text = item.cached_text
+                    if cache is not None and item.source in ("empty", "text_layer"):
+                        await asyncio.to_thread(cache.put_page, item.cache_key, page_text)
+                else:
+                    page_text = await ocr_page(client, item.image_base64, item.page_number)
+                    if cache is not None:
+                        await asyncio.to_thread(cache.put_page, item.cache_key, page_text)
+                # Page cache hits are always VLM pages: text-layer and blank pages are recognized before the lookup
+                origin = "vlm" if item.source == "cache" else item.source
+                completed_pages.append({
+                    "page_number": item.page_number,
+                    "num_images": item.num_images,
+                    "key": item.cache_key,
+                    "source": origin
+                })
+                ocr_page_sources[item.source] += 1
+                OCR_PAGES.labels(source=item.source).inc()
+                result = {
+                    "page_number": item.page_number,
+                    "MD_text": add_image_references(page_text, pdf_filename, item.page_number, item.num_images),
+                    "source": item.source
+                }
+                if item.source == "cache":
+                    result["origin"] = origin
+                await result_queue.put(result)
+        except Exception as e:
+            await result_queue.put(e)
+
+    completed_pages: List[Dict] = []
+    tasks = [asyncio.create_task(producer())]
+    tasks += [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+    try:
+        for _ in range(total_pages):
+            item = await result_queue.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+        # Every page is cached: record the document for instant re-uploads
+        if cache is not None and pages is None:
+            completed_pages.sort(key=lambda page: page["page_number"])
+            await asyncio.to_thread(cache.put_document, renderer.document_key, completed_pages)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def ocr_document(client, renderer: PDFPageRenderer, pdf_filename: str) -> List[Dict]:
+    """OCR every page of a PDF and return results ordered by page_number"""
+    results = [page async for page in iter_ocr_pages(client, renderer, pdf_filename)]
+    results.sort(key=lambda page: page["page_number"])
+    return results
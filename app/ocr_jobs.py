@@ -0,0 +1,292 @@
+"""
+Asynchronous OCR jobs: submit a PDF, poll for progress and results.
+
+A long PDF through /ocr holds one HTTP connection open for the whole
+document and loses all work if the worker restarts. Jobs decouple the two:
+the upload is stored under OCR_JOBS_DIR, and background workers OCR it page
+by page, committing each page to SQLite as it completes.
+
+Workers claim jobs with an atomic UPDATE and refresh a heartbeat while they
+run, so several API processes can share one job directory. A job whose
+heartbeat stops (its process died) is re-queued after OCR_JOB_STALE_AFTER
+seconds and resumes from the pages not yet stored; finished pages are never
+OCR'd twice. On a graceful shutdown running jobs are re-queued immediately.
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+DEFAULT_OCR_JOBS_DIR = Path(__file__).resolve().parent.parent / "data" / "ocr_jobs"
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETE = "complete"
+STATUS_ERROR = "error"
+
+OCR_JOB_WORKERS = int(os.getenv("OCR_JOB_WORKERS", "2"))  # Jobs processed at once per API process
+OCR_JOB_HEARTBEAT = 15.0  # Seconds between heartbeats of a running job
+OCR_JOB_STALE_AFTER = float(os.getenv("OCR_JOB_STALE_AFTER", "120"))  # Re-queue running jobs silent this long
+OCR_JOB_RETENTION_HOURS = float(os.getenv("OCR_JOB_RETENTION_HOURS", "72"))  # Finished jobs kept (0 = forever)
+OCR_JOB_POLL_INTERVAL = 2.0  # Seconds between checks for jobs submitted by other processes
+
+
+class OCRJobStore:
+    """
+    Job metadata and per-page results in OCR_JOBS_DIR/jobs.sqlite; uploaded
+    PDFs next to it as <job_id>.pdf (deleted once the job is complete).
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or os.getenv("OCR_JOBS_DIR") or DEFAULT_OCR_JOBS_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.directory / "jobs.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, pdf_name TEXT NOT NULL, status TEXT NOT NULL, "
+            "total_pages INTEGER NOT NULL, error TEXT, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL, heartbeat_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "job_id TEXT NOT NULL, page_number INTEGER NOT NULL, md_text TEXT NOT NULL, "
+            "source TEXT NOT NULL DEFAULT 'vlm', PRIMARY KEY (job_id, page_number))"
+        )
+        if "source" not in {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN source TEXT NOT NULL DEFAULT 'vlm'")  # Pre-existing job stores
+        self._conn.commit()
+
+    def pdf_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.pdf"
+
+    def create(self, pdf_name: str, total_pages: int, job_id: Optional[str] = None) -> str:
+        """Register a queued job; its PDF must already be at pdf_path(job_id)"""
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, pdf_name, status, total_pages, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, pdf_name, STATUS_QUEUED, total_pages, now, now)
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str, include_pages: bool = True) -> Optional[Dict]:
+        """Job status with completed pages (ordered by page_number) so far"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, pdf_name, status, total_pages, error, created_at, updated_at "
+                "FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if include_pages:
+                pages = self._conn.execute(
+                    "SELECT page_number, md_text, source FROM pages WHERE job_id = ? ORDER BY page_number", (job_id,)
+                ).fetchall()
+            else:
+                pages = None
+            completed = self._conn.execute("SELECT COUNT(*) FROM pages WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+        job_id, pdf_name, status, total_pages, error, created_at, updated_at = row
+        job = {
+            "job_id": job_id,
+            "pdf_name": pdf_name,
+            "status": status,
+            "total_pages": total_pages,
+            "completed_pages": completed,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+        if pages is not None:
+            job["pages"] = [{"page_number": number, "MD_text": text, "source": source} for number, text, source in pages]
+        return job
+
+    def completed_page_numbers(self, job_id: str) -> List[int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT page_number FROM pages WHERE job_id = ?", (job_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def claim_next(self) -> Optional[Dict]:
+        """Atomically move the oldest queued job to running and return it"""
+        with self._lock:
+            while True:
+                row = self._conn.execute(
+                    "SELECT job_id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (STATUS_QUEUED,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ?, heartbeat_at = ? WHERE job_id = ? AND status = ?",
+                    (STATUS_RUNNING, now, now, row[0], STATUS_QUEUED)
+                ).rowcount
+                self._conn.commit()
+                if claimed:  # Otherwise another process took it first
+                    break
+        return self.get(row[0], include_pages=False)
+
+    def save_page(self, job_id: str, page_number: int, md_text: str, source: str = "vlm"):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (job_id, page_number, md_text, source) VALUES (?, ?, ?, ?)",
+                (job_id, page_number, md_text, source)
+            )
+            self._conn.execute(
+                "UPDATE jobs SET updated_at = ?, heartbeat_at = ? WHERE job_id = ?", (now, now, job_id)
+            )
+            self._conn.commit()
+
+    def heartbeat(self, job_id: str):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE job_id = ?", (time.time(), job_id))
+            self._conn.commit()
+
+    def finish(self, job_id: str, error: Optional[str] = None):
+        """Mark a job complete (and drop its PDF) or failed"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, heartbeat_at = NULL WHERE job_id = ?",
+                (STATUS_ERROR if error else STATUS_COMPLETE, error, time.time(), job_id)
+            )
+            self._conn.commit()
+        if not error:
+            self.pdf_path(job_id).unlink(missing_ok=True)
+
+    def release(self, job_id: str):
+        """Put a running job back in the queue (its worker is shutting down)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, heartbeat_at = NULL WHERE job_id = ? AND status = ?",
+                (STATUS_QUEUED, job_id, STATUS_RUNNING)
+            )
+            self._conn.commit()
+
+    def requeue_stale(self, stale_after: float = OCR_JOB_STALE_AFTER) -> int:
+        """Re-queue running jobs whose worker stopped sending heartbeats (e.g. after a restart)"""
+        with self._lock:
+            count = self._conn.execute(
+                "UPDATE jobs SET status = ?, heartbeat_at = NULL WHERE status = ? AND heartbeat_at < ?",
+                (STATUS_QUEUED, STATUS_RUNNING, time.time() - stale_after)
+            ).rowcount
+            self._conn.commit()
+        return count
+
+    def purge(self, older_than_hours: float = OCR_JOB_RETENTION_HOURS) -> int:
+        """Delete finished jobs (and their pages and PDFs) older than the retention period"""
+        if older_than_hours <= 0:
+            return 0
+        cutoff = time.time() - older_than_hours * 3600
+        with self._lock:
+            job_ids = [row[0] for row in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (STATUS_COMPLETE, STATUS_ERROR, cutoff)
+            ).fetchall()]
+            for job_id in job_ids:
+                self._conn.execute("DELETE FROM pages WHERE job_id = ?", (job_id,))
+                self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+        for job_id in job_ids:
+            self.pdf_path(job_id).unlink(missing_ok=True)
+        return len(job_ids)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+# process_job(job, pdf_path, completed_pages, save_page) OCRs the pages not in completed_pages;
+# save_page(page_number, md_text, source)
+JobProcessor = Callable[[Dict, Path, List[int], Callable[..., Awaitable[None]]], Awaitable[None]]
+
+
+class OCRJobQueue:
+    """
+    Background workers for OCRJobStore jobs; start() from the app lifespan.
+
+    Each worker claims one job at a time and runs process_job for the pages
+    it still lacks. Workers are woken by submit() in this process and poll
+    the store for jobs submitted by other processes.
+    """
+
+    def __init__(self, store: OCRJobStore, process_job: JobProcessor, workers: int = OCR_JOB_WORKERS):
+        self.store = store
+        self.process_job = process_job
+        self.workers = max(1, workers)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        requeued = self.store.requeue_stale()
+        if requeued:
+            print(f"♻️  Resuming {requeued} interrupted OCR job(s)")
+        self.store.purge()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after a job was created"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim_next)
+                if job is not None:
+                    await self._run(job)
+                    continue
+                await asyncio.to_thread(self.store.requeue_stale)
+            except Exception as e:  # e.g. "database is locked": keep the worker alive, retry after the poll interval
+                print(f"⚠️  OCR job worker error: {type(e).__name__}: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OCR_JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _run(self, job: Dict):
+        job_id = job["job_id"]
+
+        async def heartbeat():
+            while True:
+                await asyncio.sleep(OCR_JOB_HEARTBEAT)
+                try:
+                    await asyncio.to_thread(self.store.heartbeat, job_id)
+                except Exception as e:  # A missed beat is retried; a dead heartbeat would get the job re-queued
+                    print(f"⚠️  OCR job {job_id} heartbeat failed: {e}")
+
+        async def save_page(page_number: int, md_text: str, source: str = "vlm"):
+            await asyncio.to_thread(self.store.save_page, job_id, page_number, md_text, source)
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+        try:
+            completed = await asyncio.to_thread(self.store.completed_page_numbers, job_id)
+            await self.process_job(job, self.store.pdf_path(job_id), completed, save_page)
+            await asyncio.to_thread(self.store.finish, job_id)
+        except asyncio.CancelledError:
+            # Shutdown: resume from the stored pages on next start
+            await asyncio.shield(asyncio.to_thread(self.store.release, job_id))
+            raise
+        except Exception as e:
+            print(f"❌ OCR job {job_id} failed: {e}")
+            await asyncio.to_thread(self.store.finish, job_id, f"OCR Error: {str(e)}")
+        finally:
+            heartbeat_task.cancel()
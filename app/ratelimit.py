@@ -0,0 +1,266 @@
+"""
+Shared rate limiting for the Azure model deployment.
+
+/llm answers and OCR pages go to the same Llama-4-Maverick deployment, so
+they share one quota. Without coordination, overlapping traffic turns into
+429s that surface as failed requests. Every call to the deployment goes
+through deployment_limiter, which combines:
+
+- Token buckets for requests and tokens per minute (LLM_DEPLOYMENT_RPM,
+  LLM_DEPLOYMENT_TPM; 0 = not enforced). A call reserves its estimated
+  tokens (prompt + max_tokens, as Azure counts them), and the estimate is
+  corrected with the reported usage once the call returns.
+- An AIMD concurrency limit: +1/limit per success, halved on a 429. A 429
+  (or Retry-After) also pauses all new calls until the backoff has passed.
+- Priorities: queued interactive calls (/llm) always go before bulk calls
+  (OCR pages, /llm/batch), and bulk calls may not use the last
+  RATE_LIMIT_INTERACTIVE_RESERVE share of the concurrency limit or budgets,
+  so chat latency stays flat while OCR soaks up the rest.
+
+Calls go out with the SDK's own retries disabled, so open() also retries
+connection errors, timeouts and 5xx responses: those back off only the
+failing call and leave the concurrency limit alone.
+
+State is per process; each API worker and ingestion run has its own limiter.
+"""
+
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from typing import Awaitable, Callable, Optional
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from app.metrics import RATE_LIMIT_CONCURRENCY, RATE_LIMIT_IN_FLIGHT, RATE_LIMIT_THROTTLED, RATE_LIMIT_WAIT_SECONDS
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BULK: "bulk"}
+
+LLM_DEPLOYMENT_RPM = float(os.getenv("LLM_DEPLOYMENT_RPM", "0"))
+LLM_DEPLOYMENT_TPM = float(os.getenv("LLM_DEPLOYMENT_TPM", "0"))
+RATE_LIMIT_MIN_CONCURRENCY = int(os.getenv("RATE_LIMIT_MIN_CONCURRENCY", "1"))
+RATE_LIMIT_MAX_CONCURRENCY = int(os.getenv("RATE_LIMIT_MAX_CONCURRENCY", "32"))
+RATE_LIMIT_INITIAL_CONCURRENCY = int(os.getenv("RATE_LIMIT_INITIAL_CONCURRENCY", "16"))
+RATE_LIMIT_INTERACTIVE_RESERVE = float(os.getenv("RATE_LIMIT_INTERACTIVE_RESERVE", "0.25"))
+RATE_LIMIT_BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", os.getenv("OCR_BACKOFF_BASE", "1.0")))  # seconds
+RATE_LIMIT_BACKOFF_MAX = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", os.getenv("OCR_BACKOFF_MAX", "30.0")))  # seconds
+BURST_SECONDS = 10.0  # Bucket capacity: Azure evaluates per-minute quotas over short windows
+TRANSIENT_ERRORS = (APIConnectionError, InternalServerError)  # APIConnectionError covers APITimeoutError
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt token count (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Refills at `per_minute / 60` units per second up to BURST_SECONDS worth; per_minute <= 0 disables it"""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = self.rate * BURST_SECONDS
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, reserve: float) -> float:
+        """Seconds until `amount` can be taken while keeping `reserve` (a share of capacity) untouched"""
+        if not self.enabled:
+            return 0.0
+        amount = min(amount, self.capacity * (1 - reserve))  # Oversized calls go through from a full bucket
+        missing = amount + self.capacity * reserve - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        if self.enabled:
+            self.level -= amount
+
+    def give_back(self, amount: float):
+        """Correct a reservation (negative amounts take more)"""
+        if self.enabled:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class Lease:
+    """One admitted call; pass it back to release() when the call ends"""
+
+    def __init__(self, priority: int, tokens: int):
+        self.priority = priority
+        self.tokens = tokens
+        self.started = time.monotonic()
+
+
+class DeploymentLimiter:
+    """Token buckets + AIMD concurrency limit + priority queue (see module docstring)"""
+
+    def __init__(
+        self,
+        rpm: float = LLM_DEPLOYMENT_RPM,
+        tpm: float = LLM_DEPLOYMENT_TPM,
+        min_concurrency: int = RATE_LIMIT_MIN_CONCURRENCY,
+        max_concurrency: int = RATE_LIMIT_MAX_CONCURRENCY,
+        initial_concurrency: int = RATE_LIMIT_INITIAL_CONCURRENCY,
+        interactive_reserve: float = RATE_LIMIT_INTERACTIVE_RESERVE,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.interactive_reserve = interactive_reserve
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._consecutive_throttles = 0
+        self._last_decrease = 0.0
+        self._waiters: list = []  # Heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        RATE_LIMIT_CONCURRENCY.set(self.limit)
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _admission_wait(self, ticket: tuple, priority: int, tokens: int) -> Optional[float]:
+        """0 if the call can start now, else seconds to wait (None: until a call finishes)"""
+        if self._waiters[0] != ticket:
+            return None  # Someone with higher priority, or earlier, goes first
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        reserve = self.interactive_reserve if priority == PRIORITY_BULK else 0.0
+        concurrency = max(1, int(self.limit * (1 - reserve)))
+        if self.in_flight >= concurrency:
+            return None
+
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self.requests.wait_time(1, reserve), self.tokens.wait_time(tokens, reserve))
+
+    async def acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> Lease:
+        """Wait until a call of `tokens` estimated tokens may start"""
+        start = time.monotonic()
+        ticket = (priority, next(self._sequence))
+        async with self.condition:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    wait = self._admission_wait(ticket, priority, tokens)
+                    if wait == 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self.condition.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self.condition.notify_all()
+
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+
+        priority_name = PRIORITY_NAMES.get(priority, str(priority))
+        RATE_LIMIT_WAIT_SECONDS.labels(priority=priority_name).observe(time.monotonic() - start)
+        RATE_LIMIT_IN_FLIGHT.labels(priority=priority_name).inc()
+        return Lease(priority, tokens)
+
+    async def release(self, lease: Lease, error: Optional[BaseException] = None, used_tokens: Optional[int] = None):
+        """
+        End a call: success grows the concurrency limit, a 429 halves it (once
+        per burst: calls started before the last decrease don't count again)
+        and pauses new calls for Retry-After or an exponential backoff.
+        """
+        async with self.condition:
+            self.in_flight -= 1
+            if used_tokens is not None:
+                self.tokens.give_back(lease.tokens - used_tokens)
+
+            if isinstance(error, RateLimitError):
+                self.throttled += 1
+                self._consecutive_throttles += 1
+                RATE_LIMIT_THROTTLED.inc()
+                now = time.monotonic()
+                self.paused_until = max(self.paused_until, now + self.backoff(error))
+                if lease.started >= self._last_decrease:
+                    self.limit = max(float(self.min_concurrency), self.limit / 2)
+                    self._last_decrease = now
+            elif error is None:
+                self._consecutive_throttles = 0
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+            RATE_LIMIT_CONCURRENCY.set(self.limit)
+            self.condition.notify_all()
+        RATE_LIMIT_IN_FLIGHT.labels(priority=PRIORITY_NAMES.get(lease.priority, str(lease.priority))).dec()
+
+    def backoff(self, error: RateLimitError) -> float:
+        """Honour Retry-After, else exponential (by consecutive 429s) with jitter"""
+        retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), RATE_LIMIT_BACKOFF_MAX)
+            except ValueError:
+                pass
+        return self.retry_delay(self._consecutive_throttles - 1)
+
+    @staticmethod
+    def retry_delay(attempt: int) -> float:
+        """Exponential backoff with jitter for the given (0-based) retry"""
+        delay = min(RATE_LIMIT_BACKOFF_BASE * (2 ** attempt), RATE_LIMIT_BACKOFF_MAX)
+        return delay * (0.5 + random.random() / 2)
+
+    async def open(self, request: Callable[[], Awaitable], tokens: int, priority: int, max_retries: int):
+        """
+        Start `await request()` under the limiter, retrying 429s and
+        transient errors up to max_retries times. Returns (response, lease) with the lease still
+        held, for calls that keep the connection busy (streams); release it
+        when done.
+        """
+        for attempt in range(max_retries + 1):
+            lease = await self.acquire(tokens, priority)
+            try:
+                return await request(), lease
+            except BaseException as e:
+                await self.release(lease, e)
+                if attempt == max_retries or not isinstance(e, (RateLimitError, *TRANSIENT_ERRORS)):
+                    raise
+                if not isinstance(e, RateLimitError):
+                    await asyncio.sleep(self.retry_delay(attempt))  # 429s wait on the shared pause instead
+
+    async def call(self, request: Callable[[], Awaitable], tokens: int, priority: int, max_retries: int):
+        """open() + release() with the usage the response reports"""
+        response, lease = await self.open(request, tokens, priority, max_retries)
+        usage = getattr(response, "usage", None)
+        await self.release(lease, used_tokens=getattr(usage, "total_tokens", None))
+        return response
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "throttled": self.throttled,
+            "rpm": self.requests.rate * 60,
+            "tpm": self.tokens.rate * 60,
+        }
+
+
+# One limiter per process for the Llama-4-Maverick deployment (chat and OCR)
+deployment_limiter = DeploymentLimiter()
@@ -90,70 +90,91 @@ async function handleOCRUpload() {
         </div>
     `;
 
-    // Animated OCR status updates
-    const ocrStatuses = [
-        '📄 Converting PDF to images...',
-        '🔍 Analyzing document layout...',
-        '🤖 Running Vision-Language Model...',
-        '📝 Extracting text with 88.3% accuracy...',
-        '🔤 Preserving Cyrillic and Latin characters...',
-        '🖼️ Detecting embedded images...',
-        '✨ Finalizing OCR results...'
-    ];
-
-    let ocrStatusIndex = 0;
     const statusElement = resultArea.querySelector('.loading-status');
     const progressBar = resultArea.querySelector('.progress-bar');
 
-    const ocrStatusInterval = setInterval(() => {
-        if (ocrStatusIndex < ocrStatuses.length) {
-            statusElement.textContent = ocrStatuses[ocrStatusIndex];
-            progressBar.style.width = `${((ocrStatusIndex + 1) / ocrStatuses.length) * 100}%`;
-            ocrStatusIndex++;
-        }
-    }, 1500);
-
     try {
         const formData = new FormData();
         formData.append('file', file);
 
-        const response = await fetch('/ocr', {
+        // Streaming endpoint: one NDJSON line per page as soon as it is OCR'd
+        const response = await fetch('/ocr/stream', {
             method: 'POST',
             body: formData
         });
 
-        clearInterval(ocrStatusInterval);
-
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const data = await response.json();
+        const totalPages = parseInt(response.headers.get('X-Total-Pages'), 10) || 0;
+        statusElement.textContent = `🤖 Running Vision-Language Model on ${totalPages} page(s)...`;
 
-        // Display results
-        let html = '<div class="success">OCR Completed Successfully!</div>';
-        html += '<h4>Extracted Text by Page:</h4>';
+        // Pages are rendered as they arrive, kept in page order
+        const pagesContainer = document.createElement('div');
+        const heading = document.createElement('h4');
+        heading.textContent = 'Extracted Text by Page:';
+        resultArea.appendChild(heading);
+        resultArea.appendChild(pagesContainer);
 
-        data.forEach((page, index) => {
-            html += `
-                <div style="margin: 20px 0; padding: 20px; background: #f8f9fa; border-left: 4px solid var(--primary-color); border-radius: 5px;">
-                    <h5 style="color: var(--primary-color); margin-bottom: 10px;">Page ${page.page_number}</h5>
-                    <div style="white-space: pre-wrap; font-family: 'Courier New', monospace; line-height: 1.6;">
-                        ${escapeHtml(page.MD_text)}
-                    </div>
-                </div>
-            `;
-        });
+        let completed = 0;
+        const onPage = (page) => {
+            if (page.error) {
+                throw new Error(page.error);
+            }
+            insertOCRPage(pagesContainer, page);
+            completed++;
+            statusElement.textContent = `📝 Extracted ${completed} of ${totalPages} page(s)...`;
+            progressBar.style.width = totalPages ? `${(completed / totalPages) * 100}%` : '100%';
+        };
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();  // Keep any partial line for the next chunk
+            lines.filter(line => line.trim()).forEach(line => onPage(JSON.parse(line)));
+        }
+        if (buffer.trim()) {
+            onPage(JSON.parse(buffer));
+        }
 
-        resultArea.innerHTML = html;
+        // Replace loading indicator with completion banner
+        const loading = resultArea.querySelector('.loading-animated');
+        const success = document.createElement('div');
+        success.className = 'success';
+        success.textContent = 'OCR Completed Successfully!';
+        resultArea.replaceChild(success, loading);
 
     } catch (error) {
-        clearInterval(ocrStatusInterval);
         resultArea.innerHTML = `<div class="error">Error processing PDF: ${error.message}</div>`;
         console.error('OCR Error:', error);
     }
 }
 
+// Insert an OCR page result into the container, keeping pages ordered by page_number
+function insertOCRPage(container, page) {
+    const pageDiv = document.createElement('div');
+    pageDiv.dataset.pageNumber = page.page_number;
+    pageDiv.style.cssText = 'margin: 20px 0; padding: 20px; background: #f8f9fa; border-left: 4px solid var(--primary-color); border-radius: 5px;';
+    pageDiv.innerHTML = `
+        <h5 style="color: var(--primary-color); margin-bottom: 10px;">Page ${page.page_number}</h5>
+        <div style="white-space: pre-wrap; font-family: 'Courier New', monospace; line-height: 1.6;">
+            ${escapeHtml(page.MD_text)}
+        </div>
+    `;
+
+    const next = Array.from(container.children)
+        .find(child => parseInt(child.dataset.pageNumber, 10) > page.page_number);
+    container.insertBefore(pageDiv, next || null);
+}
+
 // Ask Question (LLM)
 async function askQuestion() {
     const questionInput = document.getElementById('questionInput');
@@ -210,61 +231,133 @@ async function askQuestion() {
         }
     }, 1200);
 
+    // Remove loading indicator once the first part of the answer is shown
+    let loadingRemoved = false;
+    const removeLoading = () => {
+        if (!loadingRemoved) {
+            clearInterval(statusInterval);
+            chatMessages.removeChild(loadingDiv);
+            loadingRemoved = true;
+        }
+    };
+
     try {
+        // Opt in to token streaming: sources first, then answer tokens (SSE)
         const response = await fetch('/llm', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Accept': 'text/event-stream',
             },
-            body: JSON.stringify({ question: question })
+            body: JSON.stringify({ question: question, stream: true })
         });
 
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const data = await response.json();
-
-        // Clear status interval and remove loading
-        clearInterval(statusInterval);
-        chatMessages.removeChild(loadingDiv);
-
-        // Add bot response
-        const botMessageDiv = document.createElement('div');
-        botMessageDiv.className = 'message bot-message';
-
-        let responseHtml = `<div style="margin-bottom: 10px;">${escapeHtml(data.answer)}</div>`;
+        // Validation errors come back as a regular JSON AnswerResponse
+        if (!(response.headers.get('Content-Type') || '').includes('text/event-stream')) {
+            const data = await response.json();
+            removeLoading();
+            const botMessageDiv = createBotMessage(chatMessages);
+            botMessageDiv.querySelector('.answer-text').textContent = data.answer;
+            renderSources(botMessageDiv, data.sources);
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+            return;
+        }
 
-        if (data.sources && data.sources.length > 0) {
-            responseHtml += '<div style="margin-top: 15px; padding-top: 15px; border-top: 1px solid #dee2e6;">';
-            responseHtml += '<strong style="color: var(--primary-color);">Sources:</strong><ul style="margin-top: 10px; padding-left: 20px;">';
-            data.sources.forEach(source => {
-                responseHtml += `<li style="margin: 5px 0;"><em>${source.pdf_name}</em> - Page ${source.page_number}</li>`;
+        let botMessageDiv = null;
+        let answerText = '';
+        let sources = [];
+
+        const handleEvent = (event, data) => {
+            if (event === 'sources') {
+                sources = data;
+                statusElement.textContent = '🤖 Generating answer with Llama-4-Maverick-17B...';
+            } else if (event === 'token') {
+                if (!botMessageDiv) {
+                    removeLoading();
+                    botMessageDiv = createBotMessage(chatMessages);
+                }
+                answerText += data.text;
+                botMessageDiv.querySelector('.answer-text').textContent = answerText;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if (event === 'done') {
+                if (!botMessageDiv) {
+                    removeLoading();
+                    botMessageDiv = createBotMessage(chatMessages);
+                }
+                renderSources(botMessageDiv, sources);
+            } else if (event === 'error') {
+                throw new Error(data.message);
+            }
+        };
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const messages = buffer.split('\n\n');
+            buffer = messages.pop();  // Keep any partial message for the next chunk
+
+            messages.forEach(message => {
+                let event = 'message';
+                let data = '';
+                message.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                if (data) handleEvent(event, JSON.parse(data));
             });
-            responseHtml += '</ul></div>';
         }
 
-        botMessageDiv.innerHTML = responseHtml;
-        chatMessages.appendChild(botMessageDiv);
-
         // Scroll to bottom
         chatMessages.scrollTop = chatMessages.scrollHeight;
 
     } catch (error) {
         // Clear status interval and remove loading
-        clearInterval(statusInterval);
-        chatMessages.removeChild(loadingDiv);
+        removeLoading();
 
         // Add error message
         const errorDiv = document.createElement('div');
         errorDiv.className = 'message bot-message';
-        errorDiv.innerHTML = `<div class="error">Error: ${error.message}</div>`;
+        errorDiv.innerHTML = `<div class="error">Error: ${escapeHtml(error.message)}</div>`;
         chatMessages.appendChild(errorDiv);
 
         console.error('LLM Error:', error);
     }
 }
 
+// Create an empty bot message that answer text is streamed into
+function createBotMessage(chatMessages) {
+    const botMessageDiv = document.createElement('div');
+    botMessageDiv.className = 'message bot-message';
+    botMessageDiv.innerHTML = '<div class="answer-text" style="margin-bottom: 10px; white-space: pre-wrap;"></div>';
+    chatMessages.appendChild(botMessageDiv);
+    return botMessageDiv;
+}
+
+// Append the sources list to a bot message
+function renderSources(botMessageDiv, sources) {
+    if (!sources || sources.length === 0) {
+        return;
+    }
+
+    let sourcesHtml = '<div style="margin-top: 15px; padding-top: 15px; border-top: 1px solid #dee2e6;">';
+    sourcesHtml += '<strong style="color: var(--primary-color);">Sources:</strong><ul style="margin-top: 10px; padding-left: 20px;">';
+    sources.forEach(source => {
+        sourcesHtml += `<li style="margin: 5px 0;"><em>${escapeHtml(source.pdf_name)}</em> - Page ${source.page_number}</li>`;
+    });
+    sourcesHtml += '</ul></div>';
+    botMessageDiv.insertAdjacentHTML('beforeend', sourcesHtml);
+}
+
 // Handle Enter key in question input
 document.addEventListener('DOMContentLoaded', function() {
     const questionInput = document.getElementById('questionInput');
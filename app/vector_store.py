@@ -0,0 +1,313 @@
+"""
+Vector store backends for document retrieval.
+
+PineconeVectorStore wraps the hosted Pinecone index used in production.
+LocalVectorStore keeps the whole corpus in-process: a memory-mapped
+float32/float16 matrix (vectors.npy) with metadata in a columnar JSON sidecar
+(metadata.json), searched with a vectorized NumPy dot product or, when
+hnswlib is installed and requested, an HNSW index. For the ~2,100 x 1024
+corpus a brute-force top-k takes well under a millisecond and needs no
+network, so it doubles as an offline/dev backend.
+
+Both backends return matches as {"id", "score", "metadata"} dicts, the
+shape retrieve_documents() already consumes from Pinecone.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.clients import pinecone_request_timeout
+
+try:
+    import hnswlib
+except ImportError:  # Optional: brute-force search is used without it
+    hnswlib = None
+
+METADATA_COLUMNS = ("pdf_name", "page_number", "content")
+
+
+class VectorStore:
+    """Interface shared by the vector store backends"""
+
+    def query(self, vector: Sequence[float], top_k: int = 3) -> List[Dict]:
+        raise NotImplementedError
+
+    def query_many(self, vectors: Sequence[Sequence[float]], top_k: int = 3) -> List[List[Dict]]:
+        """Top-k matches for each of several query vectors (one query() call each by default)"""
+        return [self.query(vector, top_k) for vector in vectors]
+
+    def upsert(self, ids: List[str], vectors: Sequence[Sequence[float]], metadata: List[Dict]):
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]):
+        raise NotImplementedError
+
+    def describe(self) -> Dict:
+        """Return {"total_vector_count", "dimension"}"""
+        raise NotImplementedError
+
+    def iter_records(self) -> Iterable[tuple[str, Dict]]:
+        """Yield (id, metadata) for every stored vector (e.g. to build the lexical index)"""
+        raise NotImplementedError
+
+    def existing_ids(self, ids: List[str]) -> set:
+        """The subset of `ids` that is stored"""
+        raise NotImplementedError
+
+
+class PineconeVectorStore(VectorStore):
+    """Pinecone index backend; every call is bounded by the (connect, read) request_timeout"""
+
+    def __init__(self, index, request_timeout: Optional[tuple[float, float]] = None):
+        self.index = index
+        self.request_timeout = request_timeout or pinecone_request_timeout()
+
+    def query(self, vector: Sequence[float], top_k: int = 3) -> List[Dict]:
+        results = self.index.query(
+            vector=list(vector), top_k=top_k, include_metadata=True, _request_timeout=self.request_timeout
+        )
+        return [
+            {"id": match.get("id"), "score": match.get("score", 0.0), "metadata": match.get("metadata") or {}}
+            for match in results["matches"]
+        ]
+
+    def upsert(self, ids: List[str], vectors: Sequence[Sequence[float]], metadata: List[Dict], batch_size: int = 100):
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self.index.upsert(vectors=[
+                {"id": vector_id, "values": list(map(float, values)), "metadata": meta}
+                for vector_id, values, meta in zip(ids[start:end], vectors[start:end], metadata[start:end])
+            ], _request_timeout=self.request_timeout)
+
+    def delete(self, ids: List[str], batch_size: int = 1000):
+        for start in range(0, len(ids), batch_size):
+            self.index.delete(ids=ids[start:start + batch_size], _request_timeout=self.request_timeout)
+
+    def describe(self) -> Dict:
+        stats = self.index.describe_index_stats(_request_timeout=self.request_timeout)
+        return {
+            "total_vector_count": stats.get("total_vector_count", 0),
+            "dimension": stats.get("dimension", 0),
+        }
+
+    def iter_records(self, batch_size: int = 100) -> Iterable[tuple[str, Dict]]:
+        for id_batch in _batched(_iter_pinecone_ids(self.index, self.request_timeout), batch_size):
+            fetched = self.index.fetch(ids=id_batch, _request_timeout=self.request_timeout).vectors
+            for vector_id in id_batch:
+                if vector_id in fetched:
+                    yield vector_id, dict(fetched[vector_id].metadata or {})
+
+    def existing_ids(self, ids: List[str]) -> set:
+        # fetch works on pod and serverless indexes (list() is serverless-only)
+        return set(self.index.fetch(ids=ids, _request_timeout=self.request_timeout).vectors) if ids else set()
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store backed by files in `directory`.
+
+    vectors.npy holds L2-normalized rows (scores are cosine similarity) and is
+    opened with mmap_mode="r", so startup is instant and the OS page cache
+    shares it across workers. Writes (upsert/delete) copy the matrix into
+    memory; call save() to persist them. Writers build new arrays and swap
+    them in under a lock, so a concurrent query sees either the old or the new
+    corpus, never a mix.
+
+    float16 halves the file size; NumPy has no fp16 BLAS, so the first query
+    upcasts the matrix once into a float32 copy used for search.
+    """
+
+    def __init__(self, directory: str, dtype: str = "float32", use_hnsw: bool = False):
+        self.directory = Path(directory)
+        self.dtype = np.dtype(dtype)
+        self.use_hnsw = use_hnsw and hnswlib is not None
+        self.vectors = np.zeros((0, 0), dtype=self.dtype)
+        self.ids: List[str] = []
+        self.metadata: Dict[str, List] = {column: [] for column in METADATA_COLUMNS}
+        self._hnsw = None
+        self._search_matrix = None
+        self._lock = threading.RLock()
+
+        if (self.directory / "vectors.npy").exists():
+            self.vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+            self.dtype = self.vectors.dtype
+            with open(self.directory / "metadata.json", encoding="utf-8") as f:
+                sidecar = json.load(f)
+            self.ids = sidecar["id"]
+            self.metadata = {column: sidecar[column] for column in METADATA_COLUMNS}
+            self._build_hnsw()
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+
+    def _build_hnsw(self):
+        self._search_matrix = None  # Vectors changed: rebuild the search matrix lazily
+        if not self.use_hnsw or len(self.ids) == 0:
+            self._hnsw = None
+            return
+        index = hnswlib.Index(space="ip", dim=self.dimension)
+        index.init_index(max_elements=len(self.ids), ef_construction=200, M=32)
+        index.add_items(np.asarray(self.vectors, dtype=np.float32), np.arange(len(self.ids)))
+        index.set_ef(64)
+        self._hnsw = index
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def query(self, vector: Sequence[float], top_k: int = 3) -> List[Dict]:
+        return self.query_many([vector], top_k)[0]
+
+    def query_many(self, vectors: Sequence[Sequence[float]], top_k: int = 3) -> List[List[Dict]]:
+        """All queries in one matrix product (or one HNSW call) instead of one scan each"""
+        with self._lock:  # Snapshot; writers replace these objects rather than mutate them
+            ids, metadata, hnsw = self.ids, self.metadata, self._hnsw
+            if hnsw is None and self._search_matrix is None and len(ids):
+                self._search_matrix = self.vectors if self.dtype == np.float32 else self.vectors.astype(np.float32)
+            search_matrix = self._search_matrix
+
+        if len(ids) == 0:
+            return [[] for _ in vectors]
+        top_k = min(top_k, len(ids))
+        queries = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1))
+
+        if hnsw is not None:
+            labels, distances = hnsw.knn_query(queries, k=top_k)
+            all_rows, all_scores = labels, 1.0 - distances
+        else:
+            similarities = queries @ search_matrix.T
+            all_rows = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+            order = np.argsort(-np.take_along_axis(similarities, all_rows, axis=1), axis=1)
+            all_rows = np.take_along_axis(all_rows, order, axis=1)
+            all_scores = np.take_along_axis(similarities, all_rows, axis=1)
+
+        return [
+            [
+                {
+                    "id": ids[row],
+                    "score": float(score),
+                    "metadata": {column: metadata[column][row] for column in METADATA_COLUMNS},
+                }
+                for row, score in zip(rows, scores)
+            ]
+            for rows, scores in zip(all_rows, all_scores)
+        ]
+
+    def upsert(self, ids: List[str], vectors: Sequence[Sequence[float]], metadata: List[Dict]):
+        new_vectors = self._normalize(np.asarray(vectors, dtype=np.float32)).astype(self.dtype)
+        with self._lock:
+            existing = set(self.ids)
+            self.delete([vector_id for vector_id in ids if vector_id in existing])
+
+            current = np.asarray(self.vectors) if len(self.ids) else np.zeros((0, new_vectors.shape[1]), dtype=self.dtype)
+            self.vectors = np.concatenate([current, new_vectors])
+            self.ids = self.ids + list(ids)
+            self.metadata = {
+                column: self.metadata[column] + [meta.get(column) for meta in metadata] for column in METADATA_COLUMNS
+            }
+            self._build_hnsw()
+
+    def delete(self, ids: List[str]):
+        to_delete = set(ids)
+        if not to_delete:
+            return
+        with self._lock:
+            keep = [row for row, vector_id in enumerate(self.ids) if vector_id not in to_delete]
+            self.vectors = np.asarray(self.vectors)[keep]
+            self.ids = [self.ids[row] for row in keep]
+            self.metadata = {column: [self.metadata[column][row] for row in keep] for column in METADATA_COLUMNS}
+            self._build_hnsw()
+
+    def describe(self) -> Dict:
+        return {"total_vector_count": len(self.ids), "dimension": self.dimension}
+
+    def iter_records(self) -> Iterable[tuple[str, Dict]]:
+        with self._lock:
+            ids, metadata = self.ids, self.metadata
+        for row, vector_id in enumerate(ids):
+            yield vector_id, {column: metadata[column][row] for column in METADATA_COLUMNS}
+
+    def existing_ids(self, ids: List[str]) -> set:
+        return set(ids).intersection(self.ids)
+
+    def save(self):
+        """Write vectors.npy and metadata.json atomically"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        vectors_tmp = self.directory / "vectors.tmp.npy"
+        metadata_tmp = self.directory / "metadata.tmp.json"
+
+        with self._lock:  # One writer at a time, and vectors/metadata from the same version
+            np.save(vectors_tmp, np.asarray(self.vectors, dtype=self.dtype))
+            with open(metadata_tmp, "w", encoding="utf-8") as f:
+                json.dump({"id": self.ids, **self.metadata}, f, ensure_ascii=False)
+
+            os.replace(vectors_tmp, self.directory / "vectors.npy")
+            os.replace(metadata_tmp, self.directory / "metadata.json")
+
+
+def export_pinecone_to_local(
+    index, directory: str, dtype: str = "float32", batch_size: int = 100,
+    request_timeout: Optional[tuple[float, float]] = None
+) -> int:
+    """
+    Copy every vector and its metadata from a Pinecone index into a local store.
+
+    Returns the number of vectors exported.
+    """
+    request_timeout = request_timeout or pinecone_request_timeout()
+    store = LocalVectorStore(directory, dtype=dtype)
+    store.delete(list(store.ids))
+
+    for id_batch in _batched(_iter_pinecone_ids(index, request_timeout), batch_size):
+        fetched = index.fetch(ids=id_batch, _request_timeout=request_timeout).vectors
+        ids = [vector_id for vector_id in id_batch if vector_id in fetched]
+        store.upsert(
+            ids,
+            [fetched[vector_id].values for vector_id in ids],
+            [dict(fetched[vector_id].metadata or {}) for vector_id in ids]
+        )
+
+    store.save()
+    return len(store.ids)
+
+
+def _iter_pinecone_ids(index, request_timeout: tuple[float, float]) -> Iterable[str]:
+    for id_page in index.list(_request_timeout=request_timeout):
+        yield from id_page
+
+
+def _batched(items: Iterable[str], size: int) -> Iterable[List[str]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_vector_store(pinecone_index_factory=None) -> VectorStore:
+    """
+    Build the vector store selected by VECTOR_DB_TYPE ("pinecone" or "local").
+
+    The local backend reads VECTOR_DB_PATH, VECTOR_DB_DTYPE (float32/float16)
+    and VECTOR_DB_HNSW (true/false).
+    """
+    backend = os.getenv("VECTOR_DB_TYPE", "pinecone").lower()
+    if backend == "local":
+        return LocalVectorStore(
+            os.getenv("VECTOR_DB_PATH", "./data/vector_db"),
+            dtype=os.getenv("VECTOR_DB_DTYPE", "float32"),
+            use_hnsw=os.getenv("VECTOR_DB_HNSW", "false").lower() == "true"
+        )
+    if backend == "pinecone":
+        return PineconeVectorStore(pinecone_index_factory())
+    raise ValueError(f"Unknown VECTOR_DB_TYPE: {backend} (expected 'pinecone' or 'local')")
@@ -0,0 +1,175 @@
+"""
+Benchmark: fixed vs adaptive page rendering for VLM OCR
+Renders the VLM OCR benchmark document twice, once with the fixed settings
+(100 DPI, RGB, JPEG quality 85 on every page) and once with adaptive
+rendering plus the text-layer fast path (blank-page skip, text layer,
+grayscale, per-page DPI/quality), and reports payload bytes and render time
+per page. With --ocr, every VLM page is also OCR'd and CSR is measured
+against the ground truth, to check the smaller payloads cost no accuracy.
+
+Usage:
+    python scripts/benchmark_adaptive_render.py                 # render only, no API calls
+    python scripts/benchmark_adaptive_render.py --ocr           # + VLM latency and CSR (needs Azure credentials)
+    python scripts/benchmark_adaptive_render.py --pdf path/to/file.pdf --ground-truth path/to/file.md --ocr
+"""
+
+import re
+import sys
+import csv
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Project paths
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTPUT_DIR = PROJECT_ROOT / "output" / "vlm_ocr_benchmark"
+DEFAULT_PDF = PROJECT_ROOT / "data" / "pdfs" / "document_00.pdf"
+DEFAULT_GROUND_TRUTH = PROJECT_ROOT / "data" / "document_00.md"
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.ocr import PDFPageRenderer, ocr_page
+
+MODES = {"fixed": False, "adaptive": True}
+
+
+def load_ground_truth(md_path: Path) -> str:
+    """Ground truth text without Markdown markup (same cleanup as the VLM OCR notebook)"""
+    text = md_path.read_text(encoding="utf-8")
+    text = re.sub(r"^#+\s+", "", text, flags=re.MULTILINE)  # Headers
+    text = re.sub(r"\*\*(.+?)\*\*", r"\1", text)  # Bold
+    text = re.sub(r"\*(.+?)\*", r"\1", text)  # Italic
+    text = re.sub(r"---+", "", text)  # Horizontal rules
+    text = re.sub(r"\n\s*\n+", "\n\n", text)  # Normalize newlines
+    return text.strip()
+
+
+def character_success_rate(reference: str, hypothesis: str) -> float:
+    from jiwer import cer  # Notebook dependency (notebooks/requirements.txt)
+
+    return round(max(0.0, 100 - cer(reference.lower().strip(), hypothesis.lower().strip()) * 100), 2)
+
+
+async def run_mode(pdf_bytes: bytes, adaptive: bool, client=None) -> list[dict]:
+    """Render every page (and OCR it when a client is given); one row per page"""
+    rows = []
+    with PDFPageRenderer(pdf_bytes, adaptive=adaptive, native_text=adaptive) as renderer:
+        for page_num in range(1, renderer.page_count + 1):
+            t0 = time.perf_counter()
+            page = renderer.render_page(page_num)
+            render_ms = (time.perf_counter() - t0) * 1000
+
+            row = {
+                "page_number": page_num,
+                "source": page.source,
+                "dpi": page.settings.dpi if page.settings else "",
+                "grayscale": page.settings.grayscale if page.settings else "",
+                "jpeg_quality": page.settings.jpeg_quality if page.settings else "",
+                "payload_bytes": len(page.image_base64),
+                "render_ms": round(render_ms, 2),
+                "vlm_s": 0.0,
+                "text": page.cached_text or "",
+            }
+            if client is not None and page.source == "vlm":
+                t0 = time.perf_counter()
+                row["text"] = await ocr_page(client, page.image_base64, page_num)
+                row["vlm_s"] = round(time.perf_counter() - t0, 2)
+            rows.append(row)
+    return rows
+
+
+def summarize(mode: str, rows: list[dict], ground_truth: str = None) -> dict:
+    sources = [row["source"] for row in rows]
+    summary = {
+        "mode": mode,
+        "pages": len(rows),
+        "vlm_pages": sources.count("vlm"),
+        "skipped_empty": sources.count("empty"),
+        "text_layer": sources.count("text_layer"),
+        "grayscale_pages": sum(row["grayscale"] is True for row in rows),
+        "payload_kb_total": round(sum(row["payload_bytes"] for row in rows) / 1024, 1),
+        "payload_kb_per_page": round(statistics.mean(row["payload_bytes"] for row in rows) / 1024, 1),
+        "render_ms_per_page": round(statistics.mean(row["render_ms"] for row in rows), 2),
+    }
+    if any(row["vlm_s"] for row in rows):
+        summary["vlm_s_total"] = round(sum(row["vlm_s"] for row in rows), 2)
+        summary["vlm_s_per_page"] = round(summary["vlm_s_total"] / len(rows), 2)
+        if ground_truth:
+            summary["CSR"] = character_success_rate(ground_truth, "\n\n".join(row["text"] for row in rows))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fixed and adaptive page rendering for VLM OCR")
+    parser.add_argument("--pdf", type=Path, default=DEFAULT_PDF, help="PDF to benchmark (default: document_00.pdf)")
+    parser.add_argument("--ground-truth", type=Path, default=DEFAULT_GROUND_TRUTH, help="Markdown ground truth for CSR")
+    parser.add_argument("--ocr", action="store_true", help="Also OCR every page with the VLM (latency + CSR)")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("ADAPTIVE RENDER BENCHMARK")
+    print("="*70)
+
+    if not args.pdf.exists():
+        print(f"❌ PDF not found: {args.pdf}")
+        return
+    pdf_bytes = args.pdf.read_bytes()
+    ground_truth = load_ground_truth(args.ground_truth) if args.ocr and args.ground_truth.exists() else None
+
+    client = None
+    if args.ocr:
+        from app.clients import create_azure_client
+
+        client = create_azure_client("azure_vlm")
+
+    print(f"📄 Source: {args.pdf.name} ({len(pdf_bytes) / 1024 / 1024:.2f} MB)")
+    print(f"🔍 VLM OCR: {'on' if client else 'off (render only)'}\n")
+
+    all_rows, summaries = [], []
+    for mode, adaptive in MODES.items():
+        print(f"🖼️  {mode}...")
+        rows = asyncio.run(run_mode(pdf_bytes, adaptive, client))
+        summaries.append(summarize(mode, rows, ground_truth))
+        all_rows += [{"mode": mode, **{k: v for k, v in row.items() if k != "text"}} for row in rows]
+
+    print(f"\n{'Mode':<10} {'VLM pages':>9} {'Skipped':>8} {'KB/page':>8} {'Render ms':>10} {'VLM s/page':>11} {'CSR':>7}")
+    print("-" * 70)
+    for summary in summaries:
+        print(f"{summary['mode']:<10} {summary['vlm_pages']:>9} {summary['skipped_empty'] + summary['text_layer']:>8} "
+              f"{summary['payload_kb_per_page']:>8} {summary['render_ms_per_page']:>10} "
+              f"{summary.get('vlm_s_per_page', '-'):>11} {summary.get('CSR', '-'):>7}")
+
+    fixed, adaptive = summaries
+    if fixed["payload_kb_total"]:
+        print(f"\n📉 Payload: {100 * (1 - adaptive['payload_kb_total'] / fixed['payload_kb_total']):.1f}% smaller")
+    if "CSR" in fixed and "CSR" in adaptive:
+        print(f"🎯 CSR: {fixed['CSR']}% fixed vs {adaptive['CSR']}% adaptive ({adaptive['CSR'] - fixed['CSR']:+.2f})")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    pages_file = OUTPUT_DIR / "adaptive_render_pages.csv"
+    with open(pages_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(all_rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(all_rows)
+
+    summary_file = OUTPUT_DIR / "adaptive_render_summary.json"
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "source": args.pdf.name,
+            "results": summaries
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"\n📄 Per-page results saved to: {pages_file}")
+    print(f"📄 Summary saved to: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: query-embedding micro-batching throughput vs latency
+Fires bursts of concurrent queries through MicroBatcher with different
+max_batch_size / max_wait_ms settings and reports queries/s and p50/p95
+latency, compared with unbatched per-query encodes
+
+Usage:
+    python scripts/benchmark_embedding_batching.py
+    python scripts/benchmark_embedding_batching.py --concurrency 1 8 32 64 --requests 256
+"""
+
+import sys
+import csv
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Project paths
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTPUT_DIR = PROJECT_ROOT / "output" / "embedding_batching_benchmark"
+QUESTIONS_FILE = PROJECT_ROOT / "docs" / "sample_questions.json"
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.batching import MicroBatcher
+from app.executors import CPU_WORKERS, run_cpu_bound
+
+# (max_batch_size, max_wait_ms); batch size 1 = no batching
+CONFIGS = [(1, 0), (8, 2), (16, 5), (32, 5), (32, 10), (64, 20)]
+
+
+def load_queries() -> list[str]:
+    """Sample questions from docs/, varied so the model sees distinct inputs"""
+    with open(QUESTIONS_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    questions = []
+    for item in (data.values() if isinstance(data, dict) else data):
+        messages = item if isinstance(item, list) else [item]
+        questions += [m["content"] for m in messages if isinstance(m, dict) and m.get("content")]
+    return questions or ["Palçıq vulkanlarının təsir radiusu nə qədərdir?"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def run_load(batcher: MicroBatcher, queries: list[str], concurrency: int, total: int) -> dict:
+    """Keep `concurrency` queries in flight until `total` have completed"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            t0 = time.perf_counter()
+            await batcher.submit(f"{queries[i % len(queries)]} #{i}")
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "throughput_qps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "avg_batch_size": batcher.stats()["avg_batch_size"],
+    }
+
+
+async def main_async(args):
+    from sentence_transformers import SentenceTransformer
+
+    print(f"⏳ Loading {args.model}...")
+    model = SentenceTransformer(args.model)
+
+    def encode_batch(texts: list[str]) -> list:
+        return model.encode(texts, batch_size=len(texts)).tolist()
+
+    queries = load_queries()
+    await run_cpu_bound(encode_batch, queries[:2])  # Warm-up
+
+    rows = []
+    print(f"\n{'Batch':>5} {'Wait ms':>7} {'Conc':>5} {'q/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'Avg batch':>9}")
+    print("-" * 58)
+    for concurrency in args.concurrency:
+        for max_batch_size, max_wait_ms in CONFIGS:
+            batcher = MicroBatcher(encode_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+            result = await run_load(batcher, queries, concurrency, args.requests)
+            row = {"max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms, "concurrency": concurrency, **result}
+            rows.append(row)
+            print(f"{max_batch_size:>5} {max_wait_ms:>7} {concurrency:>5} {result['throughput_qps']:>8} "
+                  f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['avg_batch_size']:>9}")
+        print()
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    results_file = OUTPUT_DIR / "results.csv"
+    with open(results_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"📄 Results saved to: {results_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding micro-batching")
+    parser.add_argument("--model", default="BAAI/bge-large-en-v1.5")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=128, help="Queries per configuration")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("EMBEDDING MICRO-BATCHING BENCHMARK")
+    print("="*70)
+    print(f"🧠 Model: {args.model}")
+    print(f"⚡ CPU workers: {CPU_WORKERS}")
+    print(f"📊 Requests per config: {args.requests}")
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
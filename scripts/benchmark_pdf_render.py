@@ -0,0 +1,174 @@
+"""
+Micro-benchmark: per-page PDF rendering for OCR
+Compares the legacy renderer (re-open the PDF for every page + forced GC)
+with PDFPageRenderer (one open document per request, lazy page generator)
+
+Usage:
+    python scripts/benchmark_pdf_render.py                 # synthetic 120-page PDF
+    python scripts/benchmark_pdf_render.py --pages 300
+    python scripts/benchmark_pdf_render.py --pdf path/to/scanned.pdf
+"""
+
+import gc
+import sys
+import json
+import time
+import base64
+import argparse
+import statistics
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+# Project paths
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTPUT_DIR = PROJECT_ROOT / "output" / "render_benchmark"
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.ocr import PDFPageRenderer, OCR_DPI
+
+
+def legacy_process_pdf_page(pdf_bytes: bytes, page_num: int, dpi: int = OCR_DPI) -> tuple[str, int]:
+    """Renderer as it was before PDFPageRenderer: re-opens the PDF for every page"""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    page = doc[page_num - 1]
+
+    zoom = dpi / 72
+    mat = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=mat)
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    num_images = len(page.get_images())
+
+    doc.close()
+    del pix, page, doc
+
+    buffered = BytesIO()
+    img.save(buffered, format="JPEG", quality=85, optimize=True)
+    img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+    del img, buffered
+    gc.collect()
+
+    return img_base64, num_images
+
+
+def make_synthetic_pdf(num_pages: int) -> bytes:
+    """Build a scan-like PDF: a text block and an embedded raster image on every page"""
+    scan = Image.effect_noise((400, 300), 64).convert("RGB")
+    buffered = BytesIO()
+    scan.save(buffered, format="PNG")
+    scan_bytes = buffered.getvalue()
+
+    doc = fitz.open()
+    for page_num in range(1, num_pages + 1):
+        page = doc.new_page()
+        page.insert_image(fitz.Rect(72, 200, 522, 540), stream=scan_bytes)
+        page.insert_text(
+            (72, 72),
+            f"Page {page_num}\nSOCAR historical archive - synthetic benchmark page\n" * 3,
+            fontsize=11
+        )
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def summarize(name: str, timings: list[float], total: float, peak_bytes: int) -> dict:
+    timings_ms = sorted(t * 1000 for t in timings)
+    return {
+        "renderer": name,
+        "pages": len(timings_ms),
+        "total_s": round(total, 3),
+        "mean_ms": round(statistics.mean(timings_ms), 2),
+        "p50_ms": round(timings_ms[len(timings_ms) // 2], 2),
+        "p95_ms": round(timings_ms[int(len(timings_ms) * 0.95) - 1], 2),
+        "max_ms": round(timings_ms[-1], 2),
+        "python_peak_mb": round(peak_bytes / 1024 / 1024, 2),
+    }
+
+
+def bench_legacy(pdf_bytes: bytes, num_pages: int) -> dict:
+    timings = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for page_num in range(1, num_pages + 1):
+        t0 = time.perf_counter()
+        legacy_process_pdf_page(pdf_bytes, page_num)
+        timings.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize("legacy (open per page + gc)", timings, total, peak)
+
+
+def bench_renderer(pdf_bytes: bytes) -> dict:
+    timings = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    with PDFPageRenderer(pdf_bytes) as renderer:
+        pages = renderer.iter_pages()
+        while True:
+            t0 = time.perf_counter()
+            if next(pages, None) is None:
+                break
+            timings.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize("PDFPageRenderer (single open)", timings, total, peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-page PDF rendering for OCR")
+    parser.add_argument("--pdf", type=Path, help="PDF to benchmark (default: synthetic scan-like PDF)")
+    parser.add_argument("--pages", type=int, default=120, help="Pages in the synthetic PDF (default: 120)")
+    args = parser.parse_args()
+
+    if args.pdf:
+        pdf_bytes = args.pdf.read_bytes()
+        source = args.pdf.name
+    else:
+        pdf_bytes = make_synthetic_pdf(args.pages)
+        source = f"synthetic ({args.pages} pages)"
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        num_pages = len(doc)
+
+    print("="*70)
+    print("PDF RENDER MICRO-BENCHMARK")
+    print("="*70)
+    print(f"📄 Source: {source}")
+    print(f"📑 Pages: {num_pages} @ {OCR_DPI} DPI")
+    print(f"📦 Size: {len(pdf_bytes) / 1024 / 1024:.2f} MB\n")
+
+    results = [bench_legacy(pdf_bytes, num_pages), bench_renderer(pdf_bytes)]
+
+    print(f"{'Renderer':<32} {'Total s':>8} {'Mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'Peak MB':>8}")
+    print("-" * 78)
+    for r in results:
+        print(f"{r['renderer']:<32} {r['total_s']:>8} {r['mean_ms']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['python_peak_mb']:>8}")
+
+    speedup = results[0]["mean_ms"] / results[1]["mean_ms"]
+    print(f"\n⚡ Per-page speedup: {speedup:.2f}x")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    results_file = OUTPUT_DIR / "results.json"
+    with open(results_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "source": source,
+            "pages": num_pages,
+            "dpi": OCR_DPI,
+            "results": results,
+            "speedup": round(speedup, 2)
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"📄 Results saved to: {results_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Embedding backend parity check
+Re-encodes chunks already stored in the vector index with each
+EMBEDDING_BACKEND and reports cosine drift against the stored vectors,
+top-k retrieval agreement with the fp32 torch reference, per-query latency
+and peak memory. Each backend runs in its own process so memory is isolated.
+
+Usage:
+    python scripts/check_embedding_parity.py
+    python scripts/check_embedding_parity.py --backends torch onnx-int8 --samples 500
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Project paths
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTPUT_DIR = PROJECT_ROOT / "output" / "embedding_parity"
+QUESTIONS_FILE = PROJECT_ROOT / "docs" / "sample_questions.json"
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.embeddings import EMBEDDING_BACKENDS, load_embedding_model
+from app.vector_store import LocalVectorStore, _batched, _iter_pinecone_ids
+
+
+def load_index_sample(samples: int) -> tuple[list[str], np.ndarray]:
+    """Up to `samples` (content, stored vector) pairs from the configured index"""
+    if os.getenv("VECTOR_DB_TYPE", "pinecone").lower() == "local":
+        store = LocalVectorStore(os.getenv("VECTOR_DB_PATH", "./data/vector_db"))
+        rows = list(range(min(samples, len(store.ids))))
+        return [store.metadata["content"][row] for row in rows], np.asarray(store.vectors[rows], dtype=np.float32)
+
+    from app.clients import create_pinecone_index, pinecone_request_timeout
+
+    index = create_pinecone_index()
+    request_timeout = pinecone_request_timeout()
+    texts, vectors = [], []
+    for id_batch in _batched(_iter_pinecone_ids(index, request_timeout), 100):
+        fetched = index.fetch(ids=id_batch, _request_timeout=request_timeout).vectors
+        for vector_id in id_batch:
+            match = fetched.get(vector_id)
+            if match and (match.metadata or {}).get("content"):
+                texts.append(match.metadata["content"])
+                vectors.append(match.values)
+        if len(texts) >= samples:
+            break
+    return texts[:samples], np.asarray(vectors[:samples], dtype=np.float32)
+
+
+def load_queries() -> list[str]:
+    with open(QUESTIONS_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    questions = []
+    for item in (data.values() if isinstance(data, dict) else data):
+        messages = item if isinstance(item, list) else [item]
+        questions += [m["content"] for m in messages if isinstance(m, dict) and m.get("content")]
+    return questions
+
+
+def run_backend(model_name: str, backend: str, texts: list[str], queries: list[str]) -> dict:
+    """Runs in a child process: load, encode, time, report peak RSS"""
+    start = time.perf_counter()
+    model = load_embedding_model(model_name, backend)
+    load_s = time.perf_counter() - start
+
+    chunk_vectors = model.encode(texts, batch_size=32, normalize_embeddings=True)
+    model.encode(queries[:2])  # Warm-up
+
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        t0 = time.perf_counter()
+        query_vectors.append(model.encode(query, normalize_embeddings=True))
+        latencies.append(time.perf_counter() - t0)
+
+    return {
+        "chunk_vectors": np.asarray(chunk_vectors, dtype=np.float32),
+        "query_vectors": np.asarray(query_vectors, dtype=np.float32),
+        "load_s": round(load_s, 1),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "query_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),  # KiB on Linux
+    }
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def top_k(query_vectors: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(query_vectors @ corpus.T), axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check embedding backend parity against the index")
+    parser.add_argument("--model", default="BAAI/bge-large-en-v1.5")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--samples", type=int, default=300, help="Indexed chunks to re-encode")
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    print("="*70)
+    print("EMBEDDING BACKEND PARITY CHECK")
+    print("="*70)
+
+    print(f"📥 Loading up to {args.samples} chunks from the index...")
+    texts, stored = load_index_sample(args.samples)
+    queries = load_queries()
+    if not texts:
+        print("❌ No chunks with content found in the index")
+        return
+    stored = normalize(stored)
+    print(f"✅ {len(texts)} chunks, {len(queries)} queries, dimension {stored.shape[1]}")
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        print(f"\n🧠 {backend}...")
+        with context.Pool(1) as pool:
+            try:
+                results[backend] = pool.apply(run_backend, (args.model, backend, texts, queries))
+            except Exception as e:
+                print(f"   ❌ Failed: {e}")
+
+    reference = results.get("torch")
+    if reference is None:
+        print("\n❌ torch reference backend failed; cannot compare")
+        return
+
+    # Ground-truth retrieval: reference query vectors against the stored corpus
+    reference_top = top_k(reference["query_vectors"], stored, args.top_k)
+
+    rows = []
+    print(f"\n{'Backend':<11} {'cos(stored) mean':>16} {'min':>7} {'cos(ref)':>9} {f'top{args.top_k}':>6} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'RSS MB':>7}")
+    print("-" * 78)
+    for backend, result in results.items():
+        stored_cos = np.sum(result["chunk_vectors"] * stored, axis=1)
+        reference_cos = np.sum(result["query_vectors"] * reference["query_vectors"], axis=1)
+        overlap = np.mean([
+            len(set(a) & set(b)) / args.top_k
+            for a, b in zip(top_k(result["query_vectors"], stored, args.top_k), reference_top)
+        ])
+        row = {
+            "backend": backend,
+            "stored_cosine_mean": round(float(stored_cos.mean()), 5),
+            "stored_cosine_min": round(float(stored_cos.min()), 5),
+            "reference_query_cosine_mean": round(float(reference_cos.mean()), 5),
+            f"top{args.top_k}_overlap": round(float(overlap), 3),
+            "query_p50_ms": result["query_p50_ms"],
+            "query_p95_ms": result["query_p95_ms"],
+            "peak_rss_mb": result["peak_rss_mb"],
+            "load_s": result["load_s"],
+        }
+        rows.append(row)
+        print(f"{backend:<11} {row['stored_cosine_mean']:>16} {row['stored_cosine_min']:>7} "
+              f"{row['reference_query_cosine_mean']:>9} {row[f'top{args.top_k}_overlap']:>6} "
+              f"{row['query_p50_ms']:>7} {row['query_p95_ms']:>7} {row['peak_rss_mb']:>7}")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    results_file = OUTPUT_DIR / "results.json"
+    with open(results_file, "w", encoding="utf-8") as f:
+        json.dump({"model": args.model, "chunks": len(texts), "queries": len(queries), "results": rows}, f, indent=2)
+    print(f"\n📄 Results saved to: {results_file}")
+    print("💡 Aim for stored cosine > 0.99 and full top-k overlap before switching EMBEDDING_BACKEND")
+
+
+if __name__ == "__main__":
+    main()
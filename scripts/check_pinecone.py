@@ -4,20 +4,24 @@ Quick utility to inspect vector database
 """
 
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from pinecone import Pinecone
 
 # Load environment variables
 load_dotenv()
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.clients import create_pinecone_index
+
 def check_pinecone_status():
     """Display Pinecone index information"""
 
     try:
-        # Initialize Pinecone
-        pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
+        # Initialize Pinecone (shared pooled client)
         index_name = os.getenv('PINECONE_INDEX_NAME', 'hackathon')
-        index = pc.Index(index_name)
+        index = create_pinecone_index(index_name)
 
         # Get index statistics
         stats = index.describe_index_stats()
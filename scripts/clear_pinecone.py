@@ -4,18 +4,24 @@ One-time script for data cleanup before re-ingestion
 """
 
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from pinecone import Pinecone
 
 # Load environment variables
 load_dotenv()
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.cache import bump_index_generation
+from app.clients import create_pinecone_index
+from app.manifest import IngestionManifest
+
 def clear_pinecone_index():
     """Delete all vectors from Pinecone index"""
 
-    # Initialize Pinecone
-    pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
-    index = pc.Index(os.getenv('PINECONE_INDEX_NAME', 'hackathon'))
+    # Initialize Pinecone (shared pooled client)
+    index = create_pinecone_index()
 
     # Get current stats
     stats = index.describe_index_stats()
@@ -48,6 +54,14 @@ def clear_pinecone_index():
 
         print("✅ Deletion completed!")
 
+        # Index contents changed: invalidate cached /llm answers
+        bump_index_generation()
+
+        # Forget what was ingested so the next ingestion run re-ingests everything
+        manifest = IngestionManifest()
+        for entry in manifest.entries():
+            manifest.remove(entry["pdf_name"])
+
         # Verify deletion
         import time
         time.sleep(2)  # Wait for deletion to propagate
@@ -1,14 +1,29 @@
 """
 Ingest ONLY PDFs from hackathon_data folder
-Parallel processing with 4 workers using ThreadPoolExecutor (better for I/O-bound tasks)
+Staged pipeline (app/ingestion.py): a process pool renders pages on every
+core, async workers OCR them, one stage embeds chunks in large cross-document
+batches, and async workers bulk-upsert to Pinecone.
+
+Incremental: a manifest (data/ingestion_manifest.sqlite) records each PDF's
+content hash and vector IDs. Unchanged PDFs are skipped, modified ones are
+re-ingested, and vectors of changed or removed PDFs are deleted. After a
+crash, rerunning resumes with the files that did not complete.
+
+Usage:
+    python scripts/ingest_hackathon_data.py                  # ingest new/changed PDFs into Pinecone
+    python scripts/ingest_hackathon_data.py --force          # re-ingest every PDF
+    python scripts/ingest_hackathon_data.py --export-local   # ingest, then export to VECTOR_DB_PATH
+    python scripts/ingest_hackathon_data.py --export-only    # only export Pinecone -> local store
+    python scripts/ingest_hackathon_data.py --lexical-only   # only rebuild the BM25 index
 """
 
 import os
 import sys
 import time
 import json
+import asyncio
+import argparse
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
 # Load environment first (before any imports that need env vars)
@@ -19,39 +34,89 @@ PROJECT_ROOT = Path(__file__).parent.parent
 PDFS_DIR = PROJECT_ROOT / "data" / "hackathon_data"  # Changed to hackathon_data
 OUTPUT_DIR = PROJECT_ROOT / "output" / "ingestion"
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+# Add project root to path for imports
+sys.path.insert(0, str(PROJECT_ROOT))
 
+from app.cache import bump_index_generation
+from app.clients import create_azure_client, create_pinecone_index
+from app.lexical import build_lexical_index
+from app.ingestion import (
+    INGEST_EMBED_BATCH_SIZE, INGEST_PAGES_PER_TASK, INGEST_UPSERT_BATCH_SIZE, INGEST_UPSERT_CONCURRENCY, INGEST_WORKERS,
+    IngestionPipeline
+)
+from app.ocr import OCR_CONCURRENCY
+from app.manifest import IngestionManifest, file_sha256
+from app.vector_store import PineconeVectorStore, export_pinecone_to_local
 
-def worker_ingest(pdf_path: str):
-    """
-    Worker function to ingest a single PDF.
-    Uses lazy imports to avoid issues with multiprocessing/threading.
-    """
-    try:
-        # Import here to avoid global state issues in parallel execution
-        import ingest_pdfs
 
-        # Call the ingestion function
-        result = ingest_pdfs.ingest_pdf(str(pdf_path))
-        return result
-    except Exception as e:
-        import traceback
-        return {
-            "pdf_name": Path(pdf_path).name,
-            "status": "error",
-            "error": str(e),
-            "traceback": traceback.format_exc()
-        }
+def build_pipeline(store: PineconeVectorStore) -> IngestionPipeline:
+    """OCR client + fp32 embedding model (the reference the index is built with)"""
+    from app.embeddings import EMBEDDING_MODEL_NAME, load_embedding_model
+
+    client = create_azure_client("azure_vlm")
+
+    print(f"⏳ Loading {EMBEDDING_MODEL_NAME}...")
+    model = load_embedding_model(EMBEDDING_MODEL_NAME, "torch")
+
+    def embed(texts):
+        return model.encode(texts, batch_size=min(len(texts), 64)).tolist()
+
+    return IngestionPipeline(client, store, embed)
+
+
+def export_local():
+    """Export the Pinecone index to the local vector store (VECTOR_DB_PATH)"""
+    local_path = os.getenv("VECTOR_DB_PATH", "./data/vector_db")
+    dtype = os.getenv("VECTOR_DB_DTYPE", "float32")
+    print(f"\n💾 Exporting Pinecone index to local vector store: {local_path} ({dtype})")
+
+    index = create_pinecone_index()
+
+    start_time = time.time()
+    total = export_pinecone_to_local(index, local_path, dtype=dtype)
+    print(f"✅ Exported {total} vectors in {time.time() - start_time:.1f}s")
+    print(f"   Use it with VECTOR_DB_TYPE=local")
+
+
+def rebuild_lexical_index(store):
+    """Rebuild the BM25 index (hybrid retrieval) from every chunk in the vector store"""
+    print("\n🔤 Rebuilding lexical (BM25) index from the vector store...")
+    start_time = time.time()
+    index = build_lexical_index(store.iter_records())
+    print(f"✅ Indexed {len(index)} chunks, {len(index.vocab)} terms in {time.time() - start_time:.1f}s")
 
 
 def main():
     """Main parallel ingestion pipeline"""
+    parser = argparse.ArgumentParser(description="Ingest hackathon PDFs into the vector database")
+    parser.add_argument("--export-local", action="store_true",
+                        help="After ingestion, export the index to the local vector store")
+    parser.add_argument("--export-only", action="store_true",
+                        help="Skip ingestion and only export the index to the local vector store")
+    parser.add_argument("--lexical-only", action="store_true",
+                        help="Skip ingestion and only rebuild the lexical (BM25) index")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-ingest every PDF, even if the manifest says it is unchanged")
+    parser.add_argument("--manifest", default=None,
+                        help="Manifest path (default: INGESTION_MANIFEST_PATH or data/ingestion_manifest.sqlite)")
+    args = parser.parse_args()
+
+    if args.export_only:
+        export_local()
+        return
+
+    if args.lexical_only:
+        rebuild_lexical_index(PineconeVectorStore(create_pinecone_index()))
+        generation = bump_index_generation()
+        print(f"🔄 Index generation bumped to {generation} (API reloads the lexical index)")
+        return
+
     print("\n" + "="*70)
-    print("🚀 HACKATHON DATA INGESTION (4x PARALLEL)")
+    print("🚀 HACKATHON DATA INGESTION (STAGED PIPELINE)")
     print("="*70)
     print(f"📂 PDF Directory: {PDFS_DIR}")
-    print(f"⚡ Workers: 4 PDFs at once")
+    print(f"⚡ Render processes: {INGEST_WORKERS} ({INGEST_PAGES_PER_TASK} pages per task), "
+          f"OCR concurrency: {OCR_CONCURRENCY}, upsert concurrency: {INGEST_UPSERT_CONCURRENCY}")
     print(f"🎯 Vector Database: Pinecone ({os.getenv('PINECONE_INDEX_NAME', 'hackathon')})")
     print("="*70)
 
@@ -86,53 +151,82 @@ def main():
         print(f"   Please add PDF files to: {PDFS_DIR}")
         return
 
+    # Compare against the manifest: skip unchanged, clean up removed
+    manifest = IngestionManifest(args.manifest)
+    print(f"📒 Manifest: {manifest.path}")
+
+    store = PineconeVectorStore(create_pinecone_index())
+
+    on_disk = {pdf.name for pdf in all_pdfs}
+    removed = [entry for entry in manifest.entries() if entry["pdf_name"] not in on_disk]
+    for entry in removed:
+        store.delete(entry["vector_ids"])
+        manifest.remove(entry["pdf_name"])
+        print(f"   🗑️  {entry['pdf_name']} removed from folder, deleted {len(entry['vector_ids'])} vectors")
+
+    content_hashes = {}
+    pdfs_to_ingest = []
     for pdf in all_pdfs:
-        print(f"   → {pdf.name}")
+        content_hashes[pdf.name] = file_sha256(str(pdf))
+        if not args.force and manifest.is_current(pdf.name, content_hashes[pdf.name]):
+            print(f"   ⏭️  {pdf.name} (unchanged)")
+            continue
+        entry = manifest.get(pdf.name)
+        state = "new" if entry is None else ("modified" if entry["content_hash"] != content_hashes[pdf.name] else entry["status"])
+        print(f"   → {pdf.name} ({state})")
+        pdfs_to_ingest.append(pdf)
+
+    skipped = len(all_pdfs) - len(pdfs_to_ingest)
+    if not pdfs_to_ingest:
+        print("\n✅ Index is up to date, nothing to ingest")
+        if removed:
+            rebuild_lexical_index(store)
+            generation = bump_index_generation()
+            print(f"🔄 Index generation bumped to {generation} (answer caches invalidated)")
+        if args.export_local:
+            export_local()
+        return
+
+    print(f"\n⚡ Ingesting {len(pdfs_to_ingest)} PDFs ({skipped} skipped)")
+    print(f"   Render processes: {INGEST_WORKERS}, embed batch: {INGEST_EMBED_BATCH_SIZE}, "
+          f"upsert batch: {INGEST_UPSERT_BATCH_SIZE}\n")
 
-    print(f"\n⚡ Starting parallel processing with 4 workers...")
-    print(f"⏱️  Estimated time: ~{len(all_pdfs) * 80 / 4 / 60:.1f} minutes\n")
+    pipeline = build_pipeline(store)
+
+    # Vector IDs of the previous version are kept for cleanup
+    previous_ids = {}
+    for pdf in pdfs_to_ingest:
+        entry = manifest.get(pdf.name)
+        previous_ids[pdf.name] = entry["vector_ids"] if entry else []
+        manifest.mark_started(pdf.name, content_hashes[pdf.name])
 
-    # Process in parallel using ThreadPoolExecutor
-    # (Better for I/O-bound tasks like API calls to Azure and Pinecone)
     results = []
-    completed = 0
     start_time = time.time()
 
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        # Submit all jobs
-        future_to_pdf = {
-            executor.submit(worker_ingest, str(pdf)): pdf
-            for pdf in all_pdfs
-        }
-
-        # Collect results as they complete
-        for future in as_completed(future_to_pdf):
-            pdf = future_to_pdf[future]
-            completed += 1
-
-            try:
-                result = future.result()
-                results.append(result)
-
-                if result.get("status") == "success":
-                    elapsed = time.time() - start_time
-                    avg_time = elapsed / completed
-                    remaining = len(all_pdfs) - completed
-                    eta = remaining * avg_time / 60
-
-                    print(f"✅ [{completed}/{len(all_pdfs)}] {pdf.name}")
-                    print(f"   📊 {result['num_vectors']} vectors, {result['time_total']:.1f}s")
-                    print(f"   ⏱️  ETA: {eta:.1f} minutes remaining\n")
-                else:
-                    print(f"❌ [{completed}/{len(all_pdfs)}] {pdf.name} - {result.get('error', 'Unknown error')}\n")
-
-            except Exception as e:
-                print(f"❌ [{completed}/{len(all_pdfs)}] {pdf.name} - Error: {e}\n")
-                results.append({
-                    "pdf_name": pdf.name,
-                    "status": "error",
-                    "error": str(e)
-                })
+    async def on_result(result):
+        """Called by the pipeline as each PDF finishes (Pinecone and SQLite calls run in threads)"""
+        name = result["pdf_name"]
+        vector_ids = result.pop("vector_ids", [])
+        results.append(result)
+        completed = len(results)
+
+        if result.get("status") == "success":
+            stale_ids = sorted(set(previous_ids[name]) - set(vector_ids))
+            await asyncio.to_thread(store.delete, stale_ids)
+            await asyncio.to_thread(manifest.mark_complete, name, content_hashes[name], vector_ids)
+
+            elapsed = time.time() - start_time
+            eta = (len(pdfs_to_ingest) - completed) * elapsed / completed / 60
+
+            print(f"✅ [{completed}/{len(pdfs_to_ingest)}] {name}")
+            print(f"   📊 {result['num_vectors']} vectors, {result['time_total']:.1f}s"
+                  + (f", {len(stale_ids)} stale vectors deleted" if stale_ids else ""))
+            print(f"   ⏱️  ETA: {eta:.1f} minutes remaining\n")
+        else:
+            await asyncio.to_thread(manifest.mark_error, name, result.get("error", "Unknown error"), vector_ids)
+            print(f"❌ [{completed}/{len(pdfs_to_ingest)}] {name} - {result.get('error', 'Unknown error')}\n")
+
+    asyncio.run(pipeline.run([str(pdf) for pdf in pdfs_to_ingest], on_result=on_result))
 
     total_time = time.time() - start_time
 
@@ -144,8 +238,10 @@ def main():
     successful = [r for r in results if r.get("status") == "success"]
     failed = [r for r in results if r.get("status") == "error"]
 
-    print(f"\n✅ Successful: {len(successful)}/{len(all_pdfs)}")
+    print(f"\n✅ Successful: {len(successful)}/{len(pdfs_to_ingest)}")
     print(f"❌ Failed: {len(failed)}")
+    print(f"⏭️  Skipped (unchanged): {skipped}")
+    print(f"🗑️  Removed: {len(removed)}")
     print(f"⏱️  Total Time: {total_time/60:.1f} minutes")
 
     if successful:
@@ -163,6 +259,9 @@ def main():
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
             "source_folder": "hackathon_data",
             "total_pdfs": len(all_pdfs),
+            "ingested": len(pdfs_to_ingest),
+            "skipped": skipped,
+            "removed": [entry["pdf_name"] for entry in removed],
             "successful": len(successful),
             "failed": len(failed),
             "total_time_seconds": round(total_time, 2),
@@ -171,12 +270,15 @@ def main():
 
     print(f"\n📄 Results saved to: {results_file}")
 
+    # Index contents changed: rebuild BM25 and invalidate cached /llm answers
+    if successful or removed:
+        rebuild_lexical_index(store)
+        generation = bump_index_generation()
+        print(f"🔄 Index generation bumped to {generation} (answer caches invalidated)")
+
     # Final Pinecone stats
     try:
-        from pinecone import Pinecone
-        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-        index = pc.Index(os.getenv("PINECONE_INDEX_NAME", "hackathon"))
-        stats = index.describe_index_stats()
+        stats = create_pinecone_index().describe_index_stats()
 
         print(f"\n📊 Final Pinecone Stats:")
         # Handle both dict-like and object attribute access
@@ -193,6 +295,9 @@ def main():
         print(f"\n⚠️  Could not fetch Pinecone stats: {e}")
         print(f"   (This is non-fatal - ingestion was still successful)")
 
+    if args.export_local:
+        export_local()
+
     print("\n" + "="*70)
     print("🎉 HACKATHON DATA INGESTION COMPLETE!")
     print("="*70)
@@ -3,22 +3,22 @@ List all deployed Azure OpenAI models
 Useful for verifying available models
 """
 
-import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import AzureOpenAI
 
 # Load environment variables
 load_dotenv()
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.clients import create_sync_azure_client
+
 def list_azure_models():
     """List all deployed Azure OpenAI models"""
 
     try:
-        client = AzureOpenAI(
-            api_key=os.getenv('AZURE_OPENAI_API_KEY'),
-            api_version=os.getenv('AZURE_OPENAI_API_VERSION', '2024-08-01-preview'),
-            azure_endpoint=os.getenv('AZURE_OPENAI_ENDPOINT')
-        )
+        client = create_sync_azure_client()
 
         print("="*80)
         print("AZURE OPENAI DEPLOYED MODELS")
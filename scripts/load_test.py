@@ -0,0 +1,519 @@
+"""
+Load test: latency, throughput and error rate of /llm and /ocr under load
+Drives the API with a closed loop (--concurrency: N clients, each sending its
+next request when the previous one returns) or an open loop (--rate: Poisson
+arrivals at R requests/s, however fast the API answers) and reports
+p50/p95/p99 latency, throughput and error rate per scenario and load level.
+In open-loop mode latency is measured from each request's scheduled start,
+so requests queued behind a slow API still count (no coordinated omission).
+
+Scenarios:
+    llm          POST /llm, JSON answer
+    llm_stream   POST /llm with "stream": true (also time to first token)
+    ocr          POST /ocr with a synthetic scanned PDF (or --pdf)
+
+With --offline the script starts scripts/mock_upstreams.py and the API
+(uvicorn, caches off) pointed at it, so runs need no Azure or Pinecone
+credentials and results are comparable between commits; the mock's latency
+profiles, quotas and fault injection are set with --mock-args. Only the
+upstreams are mocked: the API still embeds queries with the real
+BAAI/bge-large-en-v1.5 model (part of what is measured), so offline runs
+need app/requirements.txt installed (sentence-transformers) and the model in
+the Hugging Face cache (~1.3 GB, downloaded on the first run; afterwards
+HF_HUB_OFFLINE=1 works without network).
+
+--baseline compares p95 and error rate with an earlier summary and exits
+non-zero on regression.
+
+Usage:
+    python scripts/load_test.py --offline
+    python scripts/load_test.py --offline --scenario llm llm_stream ocr --concurrency 1 8 32
+    python scripts/load_test.py --url http://localhost:8000 --scenario llm --rate 1 2 5 --duration 60
+    python scripts/load_test.py --offline --baseline output/load_test_benchmark/baseline.json
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shlex
+import socket
+import shutil
+import asyncio
+import argparse
+import tempfile
+import itertools
+import statistics
+import subprocess
+from io import BytesIO
+from pathlib import Path
+from collections import Counter
+from contextlib import contextmanager
+
+import httpx
+
+# Project paths
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTPUT_DIR = PROJECT_ROOT / "output" / "load_test_benchmark"
+QUESTIONS_FILE = PROJECT_ROOT / "docs" / "sample_questions.json"
+MOCK_UPSTREAMS = PROJECT_ROOT / "scripts" / "mock_upstreams.py"
+
+SCENARIOS = ["llm", "llm_stream", "ocr"]
+STAGE_METRICS = ("rag_llm_stage_seconds", "rag_ocr_stage_seconds")
+
+
+def load_questions() -> list[str]:
+    """User questions from docs/sample_questions.json"""
+    with open(QUESTIONS_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    questions = []
+    for item in (data.values() if isinstance(data, dict) else data):
+        messages = item if isinstance(item, list) else [item]
+        questions += [m["content"] for m in messages if isinstance(m, dict) and m.get("role", "user") == "user" and m.get("content")]
+    return questions or ["Palçıq vulkanlarının təsir radiusu nə qədərdir?"]
+
+
+def make_scanned_pdf(num_pages: int) -> bytes:
+    """Image-only pages (no text layer), so every page goes through the VLM"""
+    import fitz
+    from PIL import Image
+
+    doc = fitz.open()
+    for page_num in range(num_pages):
+        scan = Image.effect_noise((600, 800), 40 + page_num).convert("L")
+        buffered = BytesIO()
+        scan.save(buffered, format="PNG")
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=buffered.getvalue())
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def percentile(values: list[float], pct: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct))], 1)
+
+
+# ---------------------------------------------------------------------------
+# Requests
+# ---------------------------------------------------------------------------
+
+async def send_llm(client: httpx.AsyncClient, question: str) -> dict:
+    response = await client.post("/llm", json={"question": question})
+    if response.status_code != 200:
+        return {"status": response.status_code, "error": f"HTTP {response.status_code}"}
+    answer = response.json().get("answer", "")
+    # /llm reports failures as a 200 with an "Error: ..." answer
+    return {"status": 200, "error": answer[:200] if answer.startswith("Error:") else ""}
+
+
+async def send_llm_stream(client: httpx.AsyncClient, question: str) -> dict:
+    first_token, done, error, event = None, False, "", None
+    async with client.stream("POST", "/llm", json={"question": question, "stream": True}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return {"status": response.status_code, "error": f"HTTP {response.status_code}"}
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter()
+                done = done or event == "done"
+            elif line.startswith("data:") and event == "error":
+                error = line[5:].strip()[:200]
+    if not error and not done:
+        error = "stream ended without a done event"
+    return {"status": 200, "error": error, "first_token": first_token}
+
+
+async def send_ocr(client: httpx.AsyncClient, pdf_bytes: bytes, pages: int) -> dict:
+    response = await client.post("/ocr", files={"file": ("load_test.pdf", pdf_bytes, "application/pdf")})
+    if response.status_code != 200:
+        return {"status": response.status_code, "error": f"HTTP {response.status_code}: {response.text[:150]}"}
+    returned = len(response.json())
+    return {"status": 200, "error": "" if returned == pages else f"{returned}/{pages} pages returned"}
+
+
+def make_request(scenario: str, client: httpx.AsyncClient, i: int, args):
+    """Coroutine for the i-th request of a scenario"""
+    if scenario == "ocr":
+        return send_ocr(client, args.pdf_bytes, args.pdf_pages)
+    question = args.questions[i % len(args.questions)]
+    if not args.cache_hits:
+        question = f"{question} #{args.run_id}-{i}"  # Unique, so the answer/embedding caches cannot hit
+    return send_llm_stream(client, question) if scenario == "llm_stream" else send_llm(client, question)
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+async def timed_request(scenario: str, client: httpx.AsyncClient, i: int, args, start: float) -> dict:
+    """Run one request; latency counts from `start` (the scheduled time in open-loop mode)"""
+    try:
+        result = await make_request(scenario, client, i, args)
+    except httpx.HTTPError as e:
+        result = {"status": 0, "error": f"{type(e).__name__}: {e}"[:200]}
+    end = time.perf_counter()
+    first_token = result.get("first_token")
+    return {
+        "index": i,
+        "offset_s": round(start - args.level_start, 3),
+        "status": result["status"],
+        "ok": not result["error"],
+        "error": result["error"],
+        "latency_ms": round((end - start) * 1000, 1),
+        "ttft_ms": round((first_token - start) * 1000, 1) if first_token else "",
+    }
+
+
+async def run_closed_loop(scenario: str, client: httpx.AsyncClient, concurrency: int, args) -> list[dict]:
+    """`concurrency` clients back to back, for --requests requests or --duration seconds"""
+    rows, counter = [], itertools.count()
+    deadline = args.level_start + args.duration if args.duration else None
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if (deadline and time.perf_counter() >= deadline) or (not deadline and i >= args.requests):
+                return
+            rows.append(await timed_request(scenario, client, i, args, time.perf_counter()))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return rows
+
+
+async def run_open_loop(scenario: str, client: httpx.AsyncClient, rate: float, args) -> list[dict]:
+    """Poisson arrivals at `rate` requests/s: --requests arrivals, or rate x --duration"""
+    total = round(rate * args.duration) if args.duration else args.requests
+    tasks, scheduled = [], args.level_start
+    for i in range(total):
+        scheduled += args.rng.expovariate(rate)
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(timed_request(scenario, client, i, args, scheduled)))
+    return list(await asyncio.gather(*tasks))
+
+
+async def scrape_stage_totals(client: httpx.AsyncClient) -> dict:
+    """(stage, sum|count) totals of the per-stage histograms at /metrics, {} if not exposed"""
+    try:
+        from prometheus_client.parser import text_string_to_metric_families
+
+        response = await client.get("/metrics")
+    except (ImportError, httpx.HTTPError):
+        return {}
+    if response.status_code != 200:
+        return {}
+
+    totals = {}
+    for family in text_string_to_metric_families(response.text):
+        if family.name not in STAGE_METRICS:
+            continue
+        for sample in family.samples:
+            kind = sample.name.rsplit("_", 1)[-1]
+            if kind in ("sum", "count"):
+                key = (sample.labels["stage"], kind)
+                totals[key] = totals.get(key, 0.0) + sample.value
+    return totals
+
+
+def stage_means(before: dict, after: dict) -> dict:
+    """Mean ms per pipeline stage between two scrapes"""
+    means = {}
+    for (stage, kind), value in sorted(after.items()):
+        count = value - before.get((stage, "count"), 0.0) if kind == "count" else 0
+        if count > 0:
+            total = after[(stage, "sum")] - before.get((stage, "sum"), 0.0)
+            means[stage] = round(total / count * 1000, 1)
+    return means
+
+
+def summarize(scenario: str, mode: str, level, rows: list[dict], elapsed: float) -> dict:
+    latencies = [row["latency_ms"] for row in rows if row["ok"]]
+    ttfts = [row["ttft_ms"] for row in rows if row["ok"] and row["ttft_ms"] != ""]
+    errors = [row for row in rows if not row["ok"]]
+    summary = {
+        "scenario": scenario,
+        "mode": mode,
+        "level": level,
+        "requests": len(rows),
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(rows), 4) if rows else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": round(statistics.mean(latencies), 1) if latencies else None,
+        "max_ms": max(latencies) if latencies else None,
+    }
+    if ttfts:
+        summary["ttft_p50_ms"] = percentile(ttfts, 0.50)
+        summary["ttft_p95_ms"] = percentile(ttfts, 0.95)
+    if errors:
+        summary["top_errors"] = dict(Counter(row["error"][:80] for row in errors).most_common(3))
+    return summary
+
+
+async def run_benchmark(url: str, args) -> tuple[list[dict], list[dict]]:
+    """Every scenario at every load level; returns (request rows, summaries)"""
+    mode, levels = ("open", args.rate) if args.rate else ("closed", args.concurrency)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)  # The client must not be the bottleneck
+    all_rows, summaries = [], []
+
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        for scenario in args.scenario:
+            if args.warmup:
+                args.level_start = time.perf_counter()
+                await asyncio.gather(*(timed_request(scenario, client, -1 - i, args, time.perf_counter()) for i in range(args.warmup)))
+
+            for level in levels:
+                label = f"{level:g} req/s" if mode == "open" else f"{level} concurrent"
+                print(f"🚀 {scenario} @ {label}...")
+                before = await scrape_stage_totals(client)
+                args.level_start = time.perf_counter()
+                if mode == "open":
+                    rows = await run_open_loop(scenario, client, level, args)
+                else:
+                    rows = await run_closed_loop(scenario, client, level, args)
+                elapsed = time.perf_counter() - args.level_start
+
+                summary = summarize(scenario, mode, level, rows, elapsed)
+                stages = stage_means(before, await scrape_stage_totals(client))
+                if stages:
+                    summary["stage_mean_ms"] = stages
+                summaries.append(summary)
+                all_rows += [{"scenario": scenario, "mode": mode, "level": level, **row} for row in sorted(rows, key=lambda r: r["index"])]
+
+                print(f"   {summary['requests']} requests in {elapsed:.1f}s | {summary['throughput_rps']} req/s | "
+                      f"p50 {summary['p50_ms']} ms | p95 {summary['p95_ms']} ms | p99 {summary['p99_ms']} ms | "
+                      f"errors {summary['error_rate']:.1%}")
+                if stages:
+                    print("   stages (mean ms): " + ", ".join(f"{stage} {ms}" for stage, ms in stages.items()))
+    return all_rows, summaries
+
+
+# ---------------------------------------------------------------------------
+# Offline stack: mock upstreams + API
+# ---------------------------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float):
+    """Poll `url` until it returns 200; fail early if the process exits or reports a warm-up error"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args[:4])} exited with code {process.returncode}")
+        try:
+            response = httpx.get(url, timeout=2)
+            if response.status_code == 200:
+                return
+            error = response.json().get("error") if "json" in response.headers.get("content-type", "") else None
+            if error:
+                raise RuntimeError(f"API warm-up failed: {error}")
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+@contextmanager
+def offline_stack(args):
+    """Start mock_upstreams.py and the API against it; yields the API URL"""
+    mock_url = f"http://127.0.0.1:{free_port()}"
+    api_port = free_port()
+    state_dir = Path(tempfile.mkdtemp(prefix="load_test_"))
+    env = {
+        **os.environ,
+        "AZURE_OPENAI_ENDPOINT": mock_url,
+        "AZURE_OPENAI_API_KEY": "mock",
+        "PINECONE_API_KEY": "mock",
+        "PINECONE_INDEX_HOST": mock_url,
+        "VECTOR_DB_TYPE": "pinecone",
+        "HYBRID_SEARCH": "false",
+        "METRICS_ENABLED": "true",
+        # Keep the run's state out of data/
+        "EMBEDDING_CACHE_PATH": "",
+        "INDEX_GENERATION_PATH": str(state_dir / "index_generation"),
+        "OCR_CACHE_DIR": str(state_dir / "ocr_cache"),
+        "OCR_JOBS_DIR": str(state_dir / "ocr_jobs"),
+    }
+    if not args.cache_hits:
+        env.update(ANSWER_CACHE_SIZE="0", EMBEDDING_CACHE_SIZE="0", OCR_CACHE_MAX_MB="0")
+
+    processes = []
+    try:
+        mock = subprocess.Popen(
+            [sys.executable, str(MOCK_UPSTREAMS), "--port", mock_url.rsplit(":", 1)[1], *shlex.split(args.mock_args)],
+            cwd=PROJECT_ROOT
+        )
+        processes.append(mock)
+        wait_until_ready(f"{mock_url}/openapi.json", mock, timeout=30)
+
+        api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(api_port), "--log-level", "warning"],
+            cwd=PROJECT_ROOT, env=env
+        )
+        processes.append(api)
+        api_url = f"http://127.0.0.1:{api_port}"
+        args.mock_url = mock_url
+        print(f"⏳ Waiting for the API to warm up (mock upstreams at {mock_url})...")
+        wait_until_ready(f"{api_url}/health/ready", api, timeout=args.startup_timeout)
+        yield api_url
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def find_regressions(summaries: list[dict], baseline_file: Path, max_regression: float) -> list[str]:
+    """p95 more than max_regression slower, or error rate up by more than a point, vs the baseline"""
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = {(s["scenario"], s["mode"], s["level"]): s for s in json.load(f)["results"]}
+
+    regressions = []
+    for summary in summaries:
+        previous = baseline.get((summary["scenario"], summary["mode"], summary["level"]))
+        if previous is None:
+            continue
+        name = f"{summary['scenario']} {summary['mode']}={summary['level']}"
+        if previous.get("p95_ms") and summary["p95_ms"] is not None:
+            change = summary["p95_ms"] / previous["p95_ms"] - 1
+            if change > max_regression:
+                regressions.append(f"{name}: p95 {previous['p95_ms']} → {summary['p95_ms']} ms ({change:+.0%})")
+        if summary["error_rate"] > previous["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {previous['error_rate']:.1%} → {summary['error_rate']:.1%}")
+    return regressions
+
+
+def save_results(rows: list[dict], summaries: list[dict], url: str, args) -> Path:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    requests_file = OUTPUT_DIR / "load_test_requests.csv"
+    with open(requests_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    summary_csv = OUTPUT_DIR / "load_test_summary.csv"
+    fieldnames = list(dict.fromkeys(key for s in summaries for key in s if key not in ("stage_mean_ms", "top_errors")))
+    with open(summary_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval="", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(summaries)
+
+    summary_file = OUTPUT_DIR / "load_test_summary.json"
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "label": args.label,
+            "target": "offline (mock upstreams)" if args.offline else url,
+            "mock_args": args.mock_args if args.offline else None,
+            "mock_stats": getattr(args, "mock_stats", None),
+            "cache_hits": args.cache_hits,
+            "seed": args.seed,
+            "results": summaries
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"\n📄 Per-request results saved to: {requests_file}")
+    print(f"📄 Summary saved to: {summary_csv}")
+    print(f"📄 Summary saved to: {summary_file}")
+    return summary_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /llm and /ocr: p50/p95/p99 latency, throughput and error rate")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL (ignored with --offline)")
+    parser.add_argument("--offline", action="store_true", help="Start mock upstreams and the API locally and test that "
+                        "(needs sentence-transformers and the embedding model, downloaded on first use)")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=["llm"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32], help="Closed loop: clients in flight per level")
+    parser.add_argument("--rate", nargs="+", type=float, help="Open loop: Poisson arrival rates (req/s) per level, instead of --concurrency")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per level")
+    parser.add_argument("--duration", type=float, help="Seconds per level (instead of --requests)")
+    parser.add_argument("--warmup", type=int, default=3, help="Unrecorded requests before each scenario")
+    parser.add_argument("--pdf", type=Path, help="PDF for the ocr scenario (default: synthetic scanned PDF)")
+    parser.add_argument("--pages", type=int, default=2, help="Pages of the synthetic PDF")
+    parser.add_argument("--cache-hits", action="store_true", help="Send sample questions verbatim and keep the API caches on")
+    parser.add_argument("--timeout", type=float, default=180.0, help="Per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for open-loop arrivals")
+    parser.add_argument("--label", default="", help="Free-form tag stored in the summary (e.g. a commit hash)")
+    parser.add_argument("--baseline", type=Path, help="Earlier load_test_summary.json to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 slowdown vs --baseline (0.2 = 20%%)")
+    parser.add_argument("--mock-args", default="", help="Extra mock_upstreams.py arguments with --offline, e.g. \"--tpm 30000 --error-rate 0.01\"")
+    parser.add_argument("--startup-timeout", type=float, default=300.0, help="Seconds to wait for the offline API warm-up")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("API LOAD TEST")
+    print("="*70)
+
+    args.rng = random.Random(args.seed)
+    args.run_id = f"{int(time.time()) % 100000}"
+    args.questions = load_questions()
+    if "ocr" in args.scenario:
+        if args.pdf and not args.pdf.exists():
+            print(f"❌ PDF not found: {args.pdf}")
+            sys.exit(1)
+        args.pdf_bytes = args.pdf.read_bytes() if args.pdf else make_scanned_pdf(args.pages)
+        import fitz
+        with fitz.open(stream=args.pdf_bytes, filetype="pdf") as doc:
+            args.pdf_pages = doc.page_count
+
+    load = f"rates {args.rate} req/s (open loop)" if args.rate else f"concurrency {args.concurrency} (closed loop)"
+    amount = f"{args.duration:g}s" if args.duration else f"{args.requests} requests"
+    print(f"🎯 Target: {'offline (mock upstreams)' if args.offline else args.url}")
+    print(f"📋 Scenarios: {', '.join(args.scenario)} | {load} | {amount} per level\n")
+
+    try:
+        if args.offline:
+            with offline_stack(args) as url:
+                rows, summaries = asyncio.run(run_benchmark(url, args))
+                args.mock_stats = httpx.get(f"{args.mock_url}/mock/stats", timeout=5).json()
+            print(f"\n🧪 Mock upstreams: {args.mock_stats}")
+        else:
+            url = args.url
+            rows, summaries = asyncio.run(run_benchmark(url, args))
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"\n{'Scenario':<11} {'Level':>7} {'Req':>5} {'Req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>7}")
+    print("-" * 70)
+    for s in summaries:
+        print(f"{s['scenario']:<11} {s['level']:>7g} {s['requests']:>5} {s['throughput_rps']:>7} "
+              f"{s['p50_ms'] or '-':>8} {s['p95_ms'] or '-':>8} {s['p99_ms'] or '-':>8} {s['error_rate']:>7.1%}")
+
+    save_results(rows, summaries, url, args)
+
+    if args.baseline:
+        regressions = find_regressions(summaries, args.baseline, args.max_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline.name}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline.name} (p95 within {args.max_regression:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+Mock upstreams: a local stand-in for Azure OpenAI and Pinecone
+Serves the endpoints the API and ingestion call, so the async, caching and
+concurrency work can be load-tested and profiled on a laptop without Azure
+quota or a Pinecone index:
+
+- POST /openai/deployments/{deployment}/chat/completions   chat (also streamed) and vision OCR
+- POST /query, /vectors/upsert, /vectors/delete, /describe_index_stats,
+  GET /vectors/fetch, /vectors/list                         Pinecone data plane (in-memory index)
+- GET /mock/stats                                           requests, injected faults, tokens served
+
+Simulated behaviour (all draws come from one --seed, so runs repeat):
+- Latency per upstream (llm, vlm, vector): a median drawn from a fixed,
+  uniform, normal, lognormal or exponential distribution, plus rare
+  --tail-ms stalls to exercise p99
+- Token throughput: completions take latency (time to first token) +
+  output tokens / --tokens-per-second, and streams are paced the same way
+- Deployment quota: --rpm / --tpm token buckets (prompt + max_tokens, as
+  Azure counts them) answer 429 with Retry-After once exhausted
+- Fault injection: random 429s (--rate-limit-rate) and 500s (--error-rate)
+
+Point the API at it with:
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8765  AZURE_OPENAI_API_KEY=mock
+    PINECONE_INDEX_HOST=http://127.0.0.1:8765    PINECONE_API_KEY=mock
+
+Usage:
+    python scripts/mock_upstreams.py
+    python scripts/mock_upstreams.py --distribution lognormal --spread 0.4 --tail-probability 0.01 --tail-ms 5000
+    python scripts/mock_upstreams.py --tpm 30000 --rate-limit-rate 0.02 --error-rate 0.01 --index-size 2100
+"""
+
+import math
+import time
+import json
+import uuid
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DIMENSION = 1024
+BURST_SECONDS = 10.0  # Quota bucket capacity, as in app/ratelimit.py
+IMAGE_TOKENS = 765  # Prompt tokens per image part
+DISTRIBUTIONS = ["fixed", "uniform", "normal", "lognormal", "exponential"]
+UPSTREAMS = ["llm", "vlm", "vector"]
+
+ANSWER = (
+    "Qərbi Abşeron yatağında suvurma tədbirləri 1958-ci ildə QD-12 quyusu ətrafında tətbiq edilmişdir "
+    "(PDF: document_03.pdf, Səhifə: 11). Məqsəd lay təzyiqinin saxlanması idi (PDF: document_03.pdf, Səhifə: 12)."
+)
+OCR_TEXT = (
+    "NEFT VƏ QAZ YATAQLARININ İŞLƏNMƏSİ\n\n"
+    "Bakı arxipelaqı strukturlarında 1253 nömrəli quyudan götürülmüş nümunələrdə SiO2 və CaO "
+    "oksidləri arasında tərs korrelyasiya müşahidə olunur. Месторождение Нефтяные Камни, 1949 г."
+)
+
+
+class LatencyProfile:
+    """Latency draws (seconds) around a median, plus rare tail stalls"""
+
+    def __init__(self, median_ms: float, distribution: str = "fixed", spread: float = 0.3,
+                 tail_probability: float = 0.0, tail_ms: float = 0.0):
+        self.median = median_ms / 1000
+        self.distribution = distribution
+        self.spread = spread
+        self.tail_probability = tail_probability
+        self.tail = tail_ms / 1000
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "uniform":
+            latency = rng.uniform(self.median * (1 - self.spread), self.median * (1 + self.spread))
+        elif self.distribution == "normal":
+            latency = rng.gauss(self.median, self.median * self.spread)
+        elif self.distribution == "lognormal":
+            latency = self.median * math.exp(rng.gauss(0, self.spread))
+        elif self.distribution == "exponential":
+            latency = rng.expovariate(math.log(2) / self.median) if self.median > 0 else 0.0
+        else:
+            latency = self.median
+        if self.tail_probability and rng.random() < self.tail_probability:
+            latency += self.tail
+        return max(0.0, latency)
+
+
+class QuotaBucket:
+    """Per-minute quota refilled continuously, holding at most BURST_SECONDS worth; 0 = unlimited"""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = self.rate * BURST_SECONDS
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def try_take(self, amount: float) -> float:
+        """0 if taken, else seconds until `amount` would be available"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            self.level -= amount
+            return 0.0
+        return (amount - self.level) / self.rate
+
+
+class MockState:
+    """Simulation settings, the in-memory Pinecone index and counters"""
+
+    def __init__(self):
+        self.rng = random.Random(0)
+        self.latency = {upstream: LatencyProfile(0) for upstream in UPSTREAMS}
+        self.tokens_per_second = 0.0
+        self.completion_tokens = 150
+        self.page_tokens = 250
+        self.requests = QuotaBucket(0)
+        self.tokens = QuotaBucket(0)
+        self.error_rate = 0.0
+        self.rate_limit_rate = 0.0
+        self.retry_after = 1.0
+        self.fault_targets = set(UPSTREAMS)
+        self.vectors: dict = {}  # id -> (unit vector, metadata)
+        self._matrix = None  # (ids, stacked vectors), rebuilt after writes
+        self.counters = Counter()
+
+    def delay(self, upstream: str) -> float:
+        return self.latency[upstream].sample(self.rng)
+
+    def fault(self, upstream: str):
+        """'rate_limited', 'error' or None for this call"""
+        if upstream not in self.fault_targets:
+            return None
+        draw = self.rng.random()
+        if draw < self.rate_limit_rate:
+            return "rate_limited"
+        if draw < self.rate_limit_rate + self.error_rate:
+            return "error"
+        return None
+
+    def matrix(self):
+        if self._matrix is None and self.vectors:
+            ids = list(self.vectors)
+            self._matrix = (ids, np.stack([self.vectors[vector_id][0] for vector_id in ids]))
+        return self._matrix
+
+    def put(self, vector_id: str, values, metadata: dict):
+        vector = np.asarray(values, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        self.vectors[vector_id] = (vector / norm if norm else vector, metadata or {})
+        self._matrix = None
+
+
+state = MockState()
+app = FastAPI(title="Mock upstreams (Azure OpenAI + Pinecone)")
+
+
+# ---------------------------------------------------------------------------
+# Errors in the upstreams' formats
+# ---------------------------------------------------------------------------
+
+def azure_error(status: int, code: str, message: str, retry_after: float = None) -> JSONResponse:
+    headers = {"retry-after": str(max(1, math.ceil(retry_after)))} if retry_after is not None else None
+    return JSONResponse(status_code=status, content={"error": {"code": code, "message": message}}, headers=headers)
+
+
+def pinecone_error(status: int, code: str, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"error": {"code": code, "message": message}, "status": status})
+
+
+def injected_fault(upstream: str):
+    """Error response for a randomly injected fault, or None"""
+    fault = state.fault(upstream)
+    if fault is None:
+        return None
+    state.counters[f"injected_{fault}"] += 1
+    if upstream == "vector":
+        if fault == "rate_limited":
+            return pinecone_error(429, "RESOURCE_EXHAUSTED", "Request rate limit exceeded (mock)")
+        return pinecone_error(500, "UNKNOWN", "Internal error (mock)")
+    if fault == "rate_limited":
+        return azure_error(429, "429", "Requests have exceeded the call rate limit (mock)", state.retry_after)
+    return azure_error(500, "InternalServerError", "The server had an error processing the request (mock)")
+
+
+# ---------------------------------------------------------------------------
+# Azure OpenAI
+# ---------------------------------------------------------------------------
+
+def prompt_tokens(messages: list) -> int:
+    tokens = 0
+    for message in messages:
+        content = message.get("content")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+        for part in parts:
+            tokens += IMAGE_TOKENS if part.get("type") == "image_url" else len(part.get("text", "")) // 4 + 1
+    return tokens
+
+
+def generate_text(base: str, tokens: int) -> str:
+    """About `tokens` tokens (~4 characters each) of `base`, repeated as needed"""
+    words, text, length = base.split(" "), [], 0
+    while length < tokens * 4:
+        word = words[len(text) % len(words)]
+        text.append(word)
+        length += len(word) + 1
+    return " ".join(text)
+
+
+def chunk_id() -> str:
+    return f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+
+def completion(deployment: str, content: str, prompt: int) -> dict:
+    completion_tokens = len(content) // 4
+    return {
+        "id": chunk_id(),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": deployment,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt, "completion_tokens": completion_tokens, "total_tokens": prompt + completion_tokens}
+    }
+
+
+def stream_chunk(response_id: str, deployment: str, delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": response_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": deployment,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+
+async def stream_completion(deployment: str, content: str, first_token_delay: float):
+    """SSE chat.completion.chunk events, one word each, paced at --tokens-per-second"""
+    response_id = chunk_id()
+    await asyncio.sleep(first_token_delay)
+    start, tokens = time.monotonic(), 0.0
+    words = content.split(" ")
+    for i, word in enumerate(words):
+        text = word + (" " if i < len(words) - 1 else "")
+        if state.tokens_per_second > 0:
+            tokens += len(text) / 4
+            await asyncio.sleep(max(0.0, start + tokens / state.tokens_per_second - time.monotonic()))
+        yield stream_chunk(response_id, deployment, {"content": text})
+    yield stream_chunk(response_id, deployment, {}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+    state.counters["completion_tokens"] += len(content) // 4
+
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(deployment: str, request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    is_vision = any(isinstance(message.get("content"), list) for message in messages)
+    upstream = "vlm" if is_vision else "llm"
+    state.counters[f"{upstream}_requests"] += 1
+
+    prompt = prompt_tokens(messages)
+    output_tokens = min(state.page_tokens if is_vision else state.completion_tokens, body.get("max_tokens") or 4096)
+    wait = max(state.requests.try_take(1), state.tokens.try_take(prompt + (body.get("max_tokens") or output_tokens)))
+    if wait > 0:
+        state.counters["quota_rate_limited"] += 1
+        return azure_error(429, "429", "Requests to the deployment have exceeded the token rate limit (mock)", wait)
+    fault = injected_fault(upstream)
+    if fault is not None:
+        return fault
+
+    state.counters["prompt_tokens"] += prompt
+    content = generate_text(OCR_TEXT if is_vision else ANSWER, output_tokens)
+    if body.get("stream"):
+        return StreamingResponse(stream_completion(deployment, content, state.delay(upstream)), media_type="text/event-stream")
+
+    generation = len(content) / 4 / state.tokens_per_second if state.tokens_per_second > 0 else 0.0
+    await asyncio.sleep(state.delay(upstream) + generation)
+    state.counters["completion_tokens"] += len(content) // 4
+    return completion(deployment, content, prompt)
+
+
+# ---------------------------------------------------------------------------
+# Pinecone data plane
+# ---------------------------------------------------------------------------
+
+def synthetic_metadata(i: int) -> dict:
+    return {"pdf_name": f"document_{i % 28:02d}.pdf", "page_number": float(1 + i % 20), "content": f"{OCR_TEXT} ({i})"}
+
+
+@app.post("/query")
+async def pinecone_query(request: Request):
+    body = await request.json()
+    state.counters["vector_queries"] += 1
+    fault = injected_fault("vector")
+    if fault is not None:
+        return fault
+    await asyncio.sleep(state.delay("vector"))
+
+    top_k = int(body.get("topK", 3))
+    include_metadata = body.get("includeMetadata", False)
+    matrix = state.matrix()
+    if matrix is not None and body.get("vector"):
+        # Real cosine search over the in-memory index
+        ids, vectors = matrix
+        scores = vectors @ np.asarray(body["vector"], dtype=np.float32) / (np.linalg.norm(body["vector"]) or 1.0)
+        top = np.argsort(-scores)[:top_k]
+        matches = [(ids[i], float(scores[i]), state.vectors[ids[i]][1]) for i in top]
+    else:
+        matches = [(f"document_{i % 28:02d}.pdf_chunk_{i}", round(0.9 - i * 0.01, 4), synthetic_metadata(i)) for i in range(top_k)]
+
+    return {
+        "matches": [
+            {"id": vector_id, "score": score, "values": [], **({"metadata": metadata} if include_metadata else {})}
+            for vector_id, score, metadata in matches
+        ],
+        "namespace": body.get("namespace", ""),
+        "usage": {"readUnits": 5}
+    }
+
+
+@app.post("/vectors/upsert")
+async def pinecone_upsert(request: Request):
+    body = await request.json()
+    state.counters["vector_upserts"] += 1
+    fault = injected_fault("vector")
+    if fault is not None:
+        return fault
+    await asyncio.sleep(state.delay("vector"))
+    vectors = body.get("vectors", [])
+    for vector in vectors:
+        state.put(vector["id"], vector["values"], vector.get("metadata"))
+    return {"upsertedCount": len(vectors)}
+
+
+@app.post("/vectors/delete")
+async def pinecone_delete(request: Request):
+    body = await request.json()
+    state.counters["vector_deletes"] += 1
+    fault = injected_fault("vector")
+    if fault is not None:
+        return fault
+    await asyncio.sleep(state.delay("vector"))
+    if body.get("deleteAll"):
+        state.vectors.clear()
+    for vector_id in body.get("ids") or []:
+        state.vectors.pop(vector_id, None)
+    state._matrix = None
+    return {}
+
+
+@app.get("/vectors/fetch")
+async def pinecone_fetch(request: Request):
+    await asyncio.sleep(state.delay("vector"))
+    ids = request.query_params.getlist("ids")
+    vectors = {
+        vector_id: {"id": vector_id, "values": state.vectors[vector_id][0].tolist(), "metadata": state.vectors[vector_id][1]}
+        for vector_id in ids if vector_id in state.vectors
+    }
+    return {"vectors": vectors, "namespace": request.query_params.get("namespace", ""), "usage": {"readUnits": 1}}
+
+
+@app.get("/vectors/list")
+async def pinecone_list(request: Request):
+    await asyncio.sleep(state.delay("vector"))
+    limit = int(request.query_params.get("limit", 100))
+    start = int(request.query_params.get("paginationToken") or 0)
+    prefix = request.query_params.get("prefix", "")
+    matching = sorted(vector_id for vector_id in state.vectors if vector_id.startswith(prefix))
+    ids = matching[start:start + limit]
+    response = {"vectors": [{"id": vector_id} for vector_id in ids], "namespace": request.query_params.get("namespace", ""), "usage": {"readUnits": 1}}
+    if start + limit < len(matching):
+        response["pagination"] = {"next": str(start + limit)}
+    return response
+
+
+@app.post("/describe_index_stats")
+async def pinecone_describe_index_stats():
+    state.counters["vector_describes"] += 1
+    fault = injected_fault("vector")
+    if fault is not None:
+        return fault
+    await asyncio.sleep(state.delay("vector"))
+    count = len(state.vectors)
+    return {"namespaces": {"": {"vectorCount": count}} if count else {}, "dimension": DIMENSION, "indexFullness": 0.0, "totalVectorCount": count}
+
+
+@app.get("/mock/stats")
+async def mock_stats():
+    return {**dict(sorted(state.counters.items())), "index_vectors": len(state.vectors)}
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def configure(args):
+    state.rng = random.Random(args.seed)
+    for upstream in UPSTREAMS:
+        state.latency[upstream] = LatencyProfile(
+            getattr(args, f"{upstream}_latency_ms"), args.distribution, args.spread, args.tail_probability, args.tail_ms
+        )
+    state.tokens_per_second = args.tokens_per_second
+    state.completion_tokens = args.completion_tokens
+    state.page_tokens = args.page_tokens
+    state.requests = QuotaBucket(args.rpm)
+    state.tokens = QuotaBucket(args.tpm)
+    state.error_rate = args.error_rate
+    state.rate_limit_rate = args.rate_limit_rate
+    state.retry_after = args.retry_after
+    state.fault_targets = set(args.fault_targets)
+
+    vectors = np.random.default_rng(args.seed).standard_normal((args.index_size, DIMENSION)).astype(np.float32)
+    for i, vector in enumerate(vectors):
+        state.put(f"document_{i % 28:02d}.pdf_chunk_{i}", vector, synthetic_metadata(i))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Azure OpenAI and Pinecone endpoints the API uses")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-latency-ms", type=float, default=500, help="Median chat latency to the first token")
+    parser.add_argument("--vlm-latency-ms", type=float, default=1500, help="Median vision (OCR page) latency to the first token")
+    parser.add_argument("--vector-latency-ms", type=float, default=30, help="Median Pinecone call latency")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="fixed", help="Latency distribution around the medians")
+    parser.add_argument("--spread", type=float, default=0.3, help="Relative spread (sigma for lognormal)")
+    parser.add_argument("--tail-probability", type=float, default=0.0, help="Share of calls that stall an extra --tail-ms")
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="Output token rate (0: whole output at once)")
+    parser.add_argument("--completion-tokens", type=int, default=150, help="Chat answer length in tokens")
+    parser.add_argument("--page-tokens", type=int, default=250, help="OCR page text length in tokens")
+    parser.add_argument("--rpm", type=float, default=0, help="Deployment requests per minute before 429s (0: unlimited)")
+    parser.add_argument("--tpm", type=float, default=0, help="Deployment tokens per minute before 429s (0: unlimited)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls answered with a random 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with a 500")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After (s) on injected 429s")
+    parser.add_argument("--fault-targets", nargs="+", choices=UPSTREAMS, default=UPSTREAMS, help="Upstreams that get injected faults")
+    parser.add_argument("--index-size", type=int, default=0, help="Random vectors preloaded into the mock index (0: synthetic matches)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency draws, faults and preloaded vectors")
+    args = parser.parse_args()
+
+    configure(args)
+
+    print("="*70)
+    print("MOCK UPSTREAMS (Azure OpenAI + Pinecone)")
+    print("="*70)
+    print(f"🌐 http://{args.host}:{args.port}")
+    print(f"⏱️  Latency ({args.distribution}): LLM {args.llm_latency_ms:.0f} ms | VLM {args.vlm_latency_ms:.0f} ms | "
+          f"vector {args.vector_latency_ms:.0f} ms | {args.tokens_per_second:g} tokens/s")
+    if args.rpm or args.tpm:
+        print(f"🚦 Quota: {args.rpm:g} RPM, {args.tpm:g} TPM")
+    if args.rate_limit_rate or args.error_rate:
+        print(f"💥 Faults on {', '.join(args.fault_targets)}: {args.rate_limit_rate:.1%} 429s, {args.error_rate:.1%} 500s")
+    if args.index_size:
+        print(f"📦 Index: {args.index_size} random vectors")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()